@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -43,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'restapp.metrics.metrics_middleware',
+    'restapp.routers.replica_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,7 +78,11 @@ WSGI_APPLICATION = 'quiz1.wsgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'restapp.auth.ClaimsJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'restapp.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -94,6 +101,59 @@ DATABASES = {
     }
 }
 
+# A read replica for GET requests, e.g. QUIZ_REPLICA_DB=replica.sqlite3 kept in
+# step locally with `manage.py sync_replica`. Tests read from `default`.
+if os.environ.get('QUIZ_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['QUIZ_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['restapp.routers.ReplicaRouter']
+
+# Seconds a user reads from the primary after writing, covering replication lag. The pin is
+# kept in the `default` cache, set QUIZ_CACHE for it to hold across workers.
+REPLICA_STICKY_SECONDS = 5
+
+# Rendered catalogue listings are cached in `responses`: in process by default,
+# QUIZ_RESPONSE_CACHE=file:///var/tmp/quiz-responses for a directory shared by
+# the workers of a host, or redis://localhost:6379/1 for a local Redis
+# (or Redis-compatible) server, with its maxmemory policy doing the eviction.
+RESPONSE_CACHE_TTL = 300
+RESPONSE_CACHE_MAX_ENTRIES = 5000
+RESPONSE_CACHE = os.environ.get('QUIZ_RESPONSE_CACHE', 'locmem://')
+
+# The `default` cache holds the users of authenticated requests (see USER_CACHE_TTL),
+# QUIZ_CACHE takes the same URLs. Shared by the workers, saving or deleting a user
+# drops its entry for all of them at once.
+DEFAULT_CACHE = os.environ.get('QUIZ_CACHE', 'locmem://')
+
+
+def cache_backend(url, name, max_entries=None):
+    """CACHES entry for a locmem://, file:// or redis:// URL, Redis evicts by its own policy"""
+
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': url}
+    options = {'OPTIONS': {'MAX_ENTRIES': max_entries}} if max_entries else {}
+    if url.startswith('file://'):
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': url[len('file://'):], **options
+        }
+    return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': name, **options}
+
+
+CACHES = {
+    'default': cache_backend(DEFAULT_CACHE, 'restapp-default'),
+    'responses': {
+        **cache_backend(RESPONSE_CACHE, 'restapp-responses', RESPONSE_CACHE_MAX_ENTRIES),
+        'TIMEOUT': RESPONSE_CACHE_TTL,
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -162,3 +222,37 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_LIFETIME': timedelta(days=7),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=17),
 }
+
+# Seconds a User looked up for an authenticated request stays cached. With the in-process
+# `default` cache this is the longest a demoted, deactivated or deleted user's tokens keep
+# working in the other workers, set QUIZ_CACHE to revoke them everywhere at once.
+USER_CACHE_TTL = 60
+
+# Seconds a worker uses its cached answer keys of a game before checking the game's content version,
+# and so the longest it keeps scoring with keys another worker has changed
+ANSWER_KEY_CACHE_TTL = 10
+
+# /metrics is served to clients of these networks, and from anywhere with
+# `Authorization: Bearer <QUIZ_METRICS_TOKEN>` when that is set. Behind a proxy
+# REMOTE_ADDR is the proxy's, leave the networks empty and use the token there.
+METRICS_ALLOWED_NETWORKS = ('127.0.0.0/8', '::1')
+METRICS_TOKEN = os.environ.get('QUIZ_METRICS_TOKEN')
+
+# Queue play results in process and write them in batches from a background thread
+PLAY_WRITE_BEHIND = False
+WRITE_BEHIND_FLUSH_MS = 5
+WRITE_BEHIND_BATCH_ROWS = 500
+WRITE_BEHIND_MAX_QUEUE = 10000
+# 'buffered' answers as soon as the result is queued, 'commit' once its batch is committed
+WRITE_BEHIND_DURABILITY = 'buffered'
+
+# Hourly score rollups are folded into days after this many hours, daily ones into weeks after this many days
+ROLLUP_KEEP_HOURS = 48
+ROLLUP_KEEP_DAYS = 35
+
+# QUIZ_WARMUP=1 warms each worker up when the server imports quiz1.wsgi or quiz1.asgi instead of
+# on its first requests. Off by default, so manage.py commands and tests run no queries on import.
+# Warm-up closes its database connections, so it is safe before fork (gunicorn --preload).
+# The answer keys and bundles of this many of the most played games are loaded.
+WARMUP_ON_BOOT = os.environ.get('QUIZ_WARMUP') == '1'
+WARMUP_GAMES = 10
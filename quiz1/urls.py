@@ -16,16 +16,31 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.schemas import get_schema_view
+from restapp.auth import ClaimsTokenObtainPairSerializer, ClaimsTokenRefreshSerializer
+from restapp.metrics import metrics_view
+from restapp.openapi import CachedSchemaGenerator, SCHEMA_RENDERERS
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api-auth/', include('rest_framework.urls')),
     path('openapi', get_schema_view(
         title='Who wants to be a millionaire',
-        version='1.0.0'
+        version='1.0.0',
+        generator_class=CachedSchemaGenerator,
+        renderer_classes=[*SCHEMA_RENDERERS, BrowsableAPIRenderer]
     ), name='openapi-schema'),
+    path('metrics', metrics_view, name='metrics'),
     path('', include('restapp.urls')),
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh')
+    path(
+        'api/token/',
+        TokenObtainPairView.as_view(serializer_class=ClaimsTokenObtainPairSerializer),
+        name='token_obtain'
+    ),
+    path(
+        'api/token/refresh/',
+        TokenRefreshView.as_view(serializer_class=ClaimsTokenRefreshSerializer),
+        name='token_refresh'
+    )
 ]
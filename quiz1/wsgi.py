@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz1.settings')
 
 application = get_wsgi_application()
+
+# Needs the app registry that the line above sets up
+from restapp.warmup import on_boot  # noqa: E402
+
+on_boot()
@@ -1,7 +1,10 @@
 from django.contrib import admin
-from .models import Question, Answer, Game, User, Rank
+from .models import Question, Answer, Game, User, Rank, UserScore, UserGameScore, ScoreBucket
 
 admin.site.register(Question)
 admin.site.register(Game)
 admin.site.register(Answer)
 admin.site.register(Rank)
+admin.site.register(UserScore)
+admin.site.register(UserGameScore)
+admin.site.register(ScoreBucket)
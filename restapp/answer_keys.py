@@ -0,0 +1,222 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from django.conf import settings
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Concat
+from .models import Answer, ContentVersion, Question
+from .versions import game_key
+
+ANSWER_KEY_CACHE_SIZE = getattr(settings, 'ANSWER_KEY_CACHE_SIZE', 10000)
+ANSWER_KEY_CACHE_TTL = getattr(settings, 'ANSWER_KEY_CACHE_TTL', 10)
+
+AnswerKey = namedtuple(
+    'AnswerKey', ['questid', 'game_id', 'status', 'points', 'correct_choiceid', 'correct_variant']
+)
+
+
+class AnswerKeyCache:
+    """Per-process LRU of choiceid -> AnswerKey, the data `Play` needs to score a choice.
+
+    A miss loads every answer of the missing choices' questions in one query.
+    Writes to Answer, Question and Game must invalidate the affected questions,
+    see `restapp.signals` and the explicit calls in the CRUD views.
+
+    Those invalidations only reach this process. Each game's keys are stored
+    with the game's content version, and once they are `ttl` seconds old the
+    next lookup compares it with the current version in one query. Keys of a
+    game changed by another worker are dropped and reloaded, so they are
+    stale for at most `ttl` seconds.
+    """
+
+    def __init__(self, maxsize=ANSWER_KEY_CACHE_SIZE, ttl=ANSWER_KEY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._keys = OrderedDict()
+        self._by_quest = {}
+        self._by_game = {}
+        # game_id -> (content version, monotonic time it was last checked)
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, choiceid):
+        return self.get_many([choiceid]).get(choiceid)
+
+    def get_many(self, choiceids):
+        """Map each known choiceid to its AnswerKey, unknown ids are left out"""
+
+        found = {}
+        with self._lock:
+            for choiceid in choiceids:
+                key = self._keys.get(choiceid)
+                if key is not None:
+                    self._keys.move_to_end(choiceid)
+                    found[choiceid] = key
+            expired = self._expired({key.game_id for key in found.values()})
+
+        if expired:
+            self._revalidate(expired)
+            with self._lock:
+                found = {choiceid: key for choiceid, key in found.items() if choiceid in self._keys}
+
+        with self._lock:
+            missing = [choiceid for choiceid in choiceids if choiceid not in found]
+            self.hits += len(choiceids) - len(missing)
+            self.misses += len(missing)
+            generation = self._generation
+
+        if missing:
+            loaded = self._load(set(missing))
+            found.update((choiceid, loaded[choiceid][0]) for choiceid in missing if choiceid in loaded)
+            self._store(loaded, generation)
+
+        return found
+
+    def preload_games(self, game_ids):
+        """Load the answers of every question of the games in one query, returns how many were loaded"""
+
+        with self._lock:
+            generation = self._generation
+        loaded = self._load_questions(Question.objects.filter(game_id__in=game_ids).values('questid'))
+        self._store(loaded, generation)
+        return len(loaded)
+
+    def invalidate_questions(self, questids):
+        with self._lock:
+            self._generation += 1
+            for questid in questids:
+                self._drop_question(questid)
+
+    def invalidate_games(self, game_ids):
+        with self._lock:
+            self._generation += 1
+            for game_id in game_ids:
+                self._drop_game(game_id)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._keys.clear()
+            self._by_quest.clear()
+            self._by_game.clear()
+            self._versions.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._keys),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def _expired(self, game_ids):
+        now = time.monotonic()
+        return {
+            game_id: self._versions[game_id][0] for game_id in game_ids
+            if now - self._versions[game_id][1] >= self.ttl
+        }
+
+    def _revalidate(self, expired):
+        """Keep the games whose content version is unchanged, drop the keys of the others"""
+
+        current = dict(
+            ContentVersion.objects.filter(key__in=[game_key(game_id) for game_id in expired])
+            .values_list('key', 'version')
+        )
+        now = time.monotonic()
+        with self._lock:
+            for game_id, version in expired.items():
+                if self._versions.get(game_id, (None,))[0] != version:
+                    # Reloaded or invalidated meanwhile
+                    continue
+                if current.get(game_key(game_id), 0) == version:
+                    self._versions[game_id] = (version, now)
+                else:
+                    self._drop_game(game_id)
+
+    def _load(self, choiceids):
+        return self._load_questions(Answer.objects.filter(choiceid__in=choiceids).values('quest_id'))
+
+    def _load_questions(self, questids):
+        """choiceid -> (AnswerKey, game content version) of every answer of the questions"""
+
+        # Read in the same statement as the answers, so a write can not slip in between
+        game_version = ContentVersion.objects.filter(
+            key=Concat(Value('game:'), Cast(OuterRef('quest__game_id'), CharField()))
+        ).values('version')
+        answers = (
+            Answer.objects.select_related('quest').filter(quest_id__in=questids)
+            .annotate(game_version=Coalesce(Subquery(game_version), 0))
+            .order_by('-choiceid')
+        )
+
+        correct = {}
+        for answer in answers:
+            if answer.status:
+                correct[answer.quest_id] = answer
+
+        loaded = {}
+        for answer in answers:
+            right = correct.get(answer.quest_id)
+            loaded[answer.choiceid] = (AnswerKey(
+                answer.quest_id, answer.quest.game_id, answer.status, answer.quest.points,
+                right.choiceid if right else None, right.variant if right else None
+            ), answer.game_version)
+        return loaded
+
+    def _store(self, loaded, generation):
+        now = time.monotonic()
+        with self._lock:
+            # An invalidation ran while we were loading, the rows may be stale
+            if generation != self._generation:
+                return
+
+            for choiceid, (key, version) in loaded.items():
+                cached_version = self._versions.get(key.game_id, (version,))[0]
+                if version < cached_version:
+                    # Another lookup already stored newer rows of the game
+                    continue
+                if version > cached_version:
+                    self._drop_game(key.game_id)
+                self._versions[key.game_id] = (version, now)
+                self._keys[choiceid] = key
+                self._keys.move_to_end(choiceid)
+                self._by_quest.setdefault(key.questid, set()).add(choiceid)
+                self._by_game.setdefault(key.game_id, set()).add(key.questid)
+
+            while len(self._keys) > self.maxsize:
+                choiceid, key = self._keys.popitem(last=False)
+                self._unindex(choiceid, key)
+                self.evictions += 1
+
+    def _drop_question(self, questid):
+        for choiceid in self._by_quest.get(questid, set()).copy():
+            self._unindex(choiceid, self._keys.pop(choiceid))
+
+    def _drop_game(self, game_id):
+        for questid in list(self._by_game.get(game_id, ())):
+            self._drop_question(questid)
+        self._versions.pop(game_id, None)
+
+    def _unindex(self, choiceid, key):
+        choices = self._by_quest.get(key.questid)
+        if choices is None:
+            return
+        choices.discard(choiceid)
+        if not choices:
+            del self._by_quest[key.questid]
+            quests = self._by_game.get(key.game_id)
+            if quests is not None:
+                quests.discard(key.questid)
+                if not quests:
+                    del self._by_game[key.game_id]
+                    self._versions.pop(key.game_id, None)
+
+
+answer_keys = AnswerKeyCache()
@@ -0,0 +1,232 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from .auth import ClaimsJWTAuthentication
+from .bundles import get_bundle
+from .models import Game, Question, Answer
+from .pagination import list_response
+from .renderers import FastJSONRenderer
+from .serializers import GameSerializer, QuestionSerializer, AnswerSerializer
+from .views import int_param
+from . import response_cache, scores, versions
+
+ASYNC_DB_WORKERS = getattr(settings, 'ASYNC_DB_WORKERS', 16)
+
+db_executor = ThreadPoolExecutor(max_workers=ASYNC_DB_WORKERS, thread_name_prefix='restapp-db')
+
+
+def _in_db_thread(func, *args):
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func, *args):
+    """Run blocking ORM work on the bounded database thread pool"""
+    loop = asyncio.get_running_loop()
+    # run_in_executor does not carry context variables, the database routing needs them
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(db_executor, context.run, partial(_in_db_thread, func, *args))
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(FastJSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+class AsyncAPIView(View):
+    """Async counterpart of the JWT protected APIViews, served natively by ASGI workers.
+
+    Only the database work leaves the event loop, on `db_executor`, so a
+    worker holds many slow connections while at most ASYNC_DB_WORKERS
+    threads touch the database. Users found in the user cache authenticate
+    on the loop itself.
+    """
+    authentication = ClaimsJWTAuthentication()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        # Django 4.0 only detects coroutine functions as async views
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        async_view.__doc__ = view.__doc__
+        async_view.__module__ = view.__module__
+        async_view.__dict__.update(view.__dict__)
+        # Like APIView, token authenticated views are exempt from CSRF
+        async_view.csrf_exempt = True
+        return async_view
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if handler is None:
+            return self.http_method_not_allowed(request, *args, **kwargs)
+
+        try:
+            authenticated = await self.authenticate(request)
+        except APIException as exc:
+            return self.unauthorized(request, exc.detail)
+
+        if authenticated is None:
+            return self.unauthorized(request, "Authentication credentials were not provided.")
+
+        request.user, request.auth = authenticated
+        return await handler(request, *args, **kwargs)
+
+    async def authenticate(self, request):
+        header = self.authentication.get_header(request)
+        raw_token = self.authentication.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+
+        token = self.authentication.get_validated_token(raw_token)
+        user = self.authentication.get_cached(token)
+        if user is None:
+            user = await run_db(self.authentication.get_user, token)
+        return user, token
+
+    def unauthorized(self, request, detail):
+        # Same body as DRF's exception handler
+        data = detail if isinstance(detail, dict) else {"detail": detail}
+        response = json_response(data, status.HTTP_401_UNAUTHORIZED)
+        response['WWW-Authenticate'] = self.authentication.authenticate_header(request)
+        return response
+
+
+def _int_param(request, param, invalid=None):
+    """(value, error response) for a required integer query parameter, as the sync views check it"""
+
+    value, error = int_param(request.GET, param, invalid)
+    if error:
+        return None, json_response({"details": error}, status.HTTP_400_BAD_REQUEST)
+    return value, None
+
+
+def _catalogue(request, key, queryset, serializer_class):
+    """The sync listings' `versioned(cached=True)` and `list_response`, without streaming"""
+
+    etag, last_modified, response = versions.check_conditional(request, key)
+    if response is None:
+        response = response_cache.get(request, etag)
+    if response is None:
+        try:
+            response = list_response(request, queryset, serializer_class, streaming=False)
+        except serializers.ValidationError as exc:
+            # Same body as DRF's exception handler
+            return json_response(exc.detail, status.HTTP_400_BAD_REQUEST)
+        response = response_cache.store(request, etag, response)
+    return versions.set_validators(response, etag, last_modified)
+
+
+class AsyncPlay(AsyncAPIView):
+
+    async def post(self, request):
+        """Add choice"""
+
+        choiceid, error = _int_param(request, 'choiceid', "choiceid must be integer value")
+        if error:
+            return error
+
+        result = await run_db(scores.play_choice, request.user.id, choiceid)
+        if result is None:
+            return json_response({"details": "Answer not found"}, status.HTTP_400_BAD_REQUEST)
+
+        return json_response(result)
+
+
+class AsyncPoints(AsyncAPIView):
+
+    async def get(self, request):
+        """Get current user points"""
+
+        points_total = await run_db(scores.user_points, request.user.id)
+        return json_response({"points_total": points_total})
+
+
+class AsyncRankView(AsyncAPIView):
+
+    async def get(self, request):
+        """Get users rank by game"""
+
+        game_id = request.GET.get('game_id')
+        score = await run_db(scores.user_counters, request.user.id, game_id)
+
+        if not game_id:
+            return json_response({
+                'total_answers': score['total_answers'],
+                'correct_answers_count': score['correct_answers']
+            })
+
+        if not score['total_answers']:
+            return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+        return json_response({
+            "game_id": game_id,
+            "total_answers": score['total_answers'],
+            "correct_answers_count": score['correct_answers']
+        })
+
+
+class AsyncGames(AsyncAPIView):
+
+    async def get(self, request):
+        """Get game list"""
+
+        return await run_db(
+            _catalogue, request, versions.GAME_LIST_KEY, Game.objects.all(), GameSerializer
+        )
+
+
+class AsyncQuestions(AsyncAPIView):
+
+    async def get(self, request):
+        """Get questions"""
+
+        gameid, error = _int_param(request, 'gameid')
+        if error:
+            return error
+
+        return await run_db(
+            _catalogue, request, versions.game_key(gameid),
+            Question.objects.filter(game_id=gameid), QuestionSerializer
+        )
+
+
+class AsyncAnswers(AsyncAPIView):
+
+    async def get(self, request):
+        """Gets all answers"""
+
+        questid, error = _int_param(request, 'questid')
+        if error:
+            return error
+
+        return await run_db(
+            _catalogue, request, versions.question_key(questid),
+            Answer.objects.filter(quest_id=questid), AnswerSerializer
+        )
+
+
+class AsyncGameBundle(AsyncAPIView):
+
+    async def get(self, request):
+        """Get game with all questions and answer variants"""
+
+        gameid, error = _int_param(request, 'gameid')
+        if error:
+            return error
+
+        content = await run_db(get_bundle, gameid)
+        if content is None:
+            return json_response({"details": "Game not found"}, status.HTTP_404_NOT_FOUND)
+
+        return HttpResponse(content, content_type='application/json')
@@ -1,8 +1,105 @@
-from rest_framework_simplejwt.tokens import AccessToken
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from .models import User
 
+USER_CACHE_TTL = getattr(settings, 'USER_CACHE_TTL', 60)
+
+PRIVILEGE_CLAIMS = ('is_superuser', 'is_staff')
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Signs the privilege flags into issued tokens"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in PRIVILEGE_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Re-reads the user, so refreshed access tokens carry the current privilege flags.
+
+    Deleted and inactive users cannot refresh.
+    """
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        user = check_user(get_cached_user(refresh.get(api_settings.USER_ID_CLAIM)))
+        for claim in PRIVILEGE_CLAIMS:
+            refresh[claim] = getattr(user, claim)
+        return super().validate({**attrs, 'refresh': str(refresh)})
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication through the short-lived user cache.
+
+    The user is looked up by id in the cache, a query only on a miss, and
+    must still exist and be active. A token whose signed privilege claims
+    no longer match the user's flags is refused, so a demotion revokes
+    older tokens as soon as the cache entry goes. With the in-process
+    `default` cache that is at once in the process that saved the user and
+    within USER_CACHE_TTL in the others. A shared cache (QUIZ_CACHE) drops
+    the entry for every worker at once.
+    """
+
+    def get_user(self, validated_token):
+        return check_user(get_cached_user(self.user_id(validated_token)), validated_token)
+
+    def get_cached(self, validated_token):
+        """`get_user` from the cache alone, None on a miss"""
+
+        user = cache.get(_user_cache_key(self.user_id(validated_token)))
+        return None if user is None else check_user(user, validated_token)
+
+    def user_id(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        return validated_token[api_settings.USER_ID_CLAIM]
+
+
+def check_user(user, token=None):
+    """`user` if it may authenticate with `token`, raises AuthenticationFailed otherwise"""
+
+    if user is None:
+        raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+    if not user.is_active:
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+    if token is not None and any(
+        claim in token and token[claim] != getattr(user, claim) for claim in PRIVILEGE_CLAIMS
+    ):
+        raise AuthenticationFailed(_('Token privileges are out of date'), code='token_revoked')
+
+    return user
+
 
 def get_current_user(request):
-    access_token = AccessToken(request.headers['Authorization'].split(' ')[1])
-    user = User.objects.get(id=access_token['user_id'])
+    """User authenticated by DRF for this request, decoded once per request"""
+    return request.user
+
+
+def get_cached_user(user_id):
+    key = _user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(id=user_id).first()
+        if user is not None:
+            cache.set(key, user, USER_CACHE_TTL)
     return user
+
+
+def forget_user(user_id):
+    cache.delete(_user_cache_key(user_id))
+
+
+def _user_cache_key(user_id):
+    return f'restapp:user:{user_id}'
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from .models import Game, Question, Answer
+from .renderers import FastJSONRenderer
+from . import versions
+
+BUNDLE_CACHE_TTL = getattr(settings, 'BUNDLE_CACHE_TTL', 24 * 60 * 60)
+
+
+def get_bundle(gameid):
+    """Rendered JSON of a game with its questions and answer variants, None if no such game.
+
+    The bytes are cached under the game content version, so any write to the
+    game bumps the version and the next request renders a fresh bundle.
+    """
+    version, _ = versions.get_version(versions.game_key(gameid))
+    key = f'restapp:bundle:{gameid}:{version}'
+
+    content = cache.get(key)
+    if content is None:
+        bundle = build_bundle(gameid)
+        if bundle is None:
+            return None
+        content = FastJSONRenderer().render(bundle)
+        cache.set(key, content, BUNDLE_CACHE_TTL)
+
+    return content
+
+
+def build_bundle(gameid):
+    """Game, questions and answers in three queries"""
+
+    answers = Answer.objects.order_by('choiceid').only('choiceid', 'quest_id', 'variant')
+    questions = Question.objects.order_by('questid').prefetch_related(
+        Prefetch('answer_set', queryset=answers)
+    )
+    game = Game.objects.prefetch_related(
+        Prefetch('question_set', queryset=questions)
+    ).filter(gameid=gameid).first()
+
+    if game is None:
+        return None
+
+    return {
+        'gameid': game.gameid,
+        'name': game.name,
+        'questions': [
+            {
+                'questid': quest.questid,
+                'question': quest.question,
+                'points': quest.points,
+                'answers': [
+                    {'choiceid': answer.choiceid, 'variant': answer.variant}
+                    for answer in quest.answer_set.all()
+                ]
+            }
+            for quest in game.question_set.all()
+        ]
+    }
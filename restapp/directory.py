@@ -0,0 +1,79 @@
+from collections import defaultdict
+from django.db.models import Q
+from .models import User, UserSearchKey
+
+DIRECTORY_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name',
+    'is_active', 'is_staff', 'is_superuser', 'date_joined', 'last_login'
+)
+# Sorts after any character, so [prefix, prefix + PREFIX_END) holds every string starting with prefix
+PREFIX_END = chr(0x10FFFF)
+
+
+def user_page(search=None, after_id=None, page_size=100):
+    """One keyset page of users as DIRECTORY_FIELDS dicts with their group and permission ids.
+
+    `search` keeps users whose username or email starts with it, ignoring
+    case, as ranges over the indexed `UserSearchKey` columns. Three
+    queries per page whatever its size, no password hashes. Returns
+    (rows, more) where `more` tells whether another page follows.
+    """
+    users = User.objects.order_by('id')
+    if search:
+        prefix = search_key(search)
+        users = users.filter(
+            id__in=UserSearchKey.objects.filter(_prefix('username', prefix) | _prefix('email', prefix))
+            .values('user_id')
+        )
+    if after_id is not None:
+        users = users.filter(id__gt=after_id)
+
+    rows = list(users.values(*DIRECTORY_FIELDS)[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    user_ids = [row['id'] for row in rows]
+    groups = _related_ids(User.groups.through, 'group_id', user_ids)
+    permissions = _related_ids(User.user_permissions.through, 'permission_id', user_ids)
+    for row in rows:
+        row['groups'] = groups.get(row['id'], [])
+        row['user_permissions'] = permissions.get(row['id'], [])
+
+    return rows, more
+
+
+def search_key(value):
+    """Lowercased by Python for the stored keys and the searches alike, SQLite's LOWER() only folds ASCII"""
+    return value.lower()
+
+
+def update_search_key(user):
+    UserSearchKey.objects.update_or_create(
+        user_id=user.id, defaults={'username': search_key(user.username), 'email': search_key(user.email)}
+    )
+
+
+def index_users(users):
+    """Add the search keys of users inserted without `save`, e.g. by `bulk_create`"""
+
+    UserSearchKey.objects.bulk_create(
+        (
+            UserSearchKey(user_id=user.id, username=search_key(user.username), email=search_key(user.email))
+            for user in users
+        ),
+        ignore_conflicts=True
+    )
+
+
+def _prefix(field, prefix):
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + PREFIX_END})
+
+
+def _related_ids(through, column, user_ids):
+    related = defaultdict(list)
+    if user_ids:
+        for user_id, related_id in (
+            through.objects.filter(user_id__in=user_ids).order_by('user_id', column).values_list('user_id', column)
+        ):
+            related[user_id].append(related_id)
+    return related
@@ -0,0 +1,64 @@
+import csv
+import json
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Rank
+
+EXPORT_FIELDS = ('id', 'user_id', 'game_id', 'quest_id', 'points', 'answered')
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 5000)
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+def rank_rows(user_id=None, game_id=None, min_id=None, max_id=None, after_id=None,
+        chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield `Rank` rows as EXPORT_FIELDS tuples in id order.
+
+    Each chunk is its own short keyset query (id > last seen), so no cursor
+    stays open across the export and SQLite writers are never blocked by it.
+    `after_id` resumes an interrupted export from the last id it received.
+    """
+    ranks = Rank.objects.order_by('id')
+    if user_id is not None:
+        ranks = ranks.filter(user_id=user_id)
+    if game_id is not None:
+        ranks = ranks.filter(game_id=game_id)
+    if max_id is not None:
+        ranks = ranks.filter(id__lte=max_id)
+
+    bounds = [after_id] if after_id is not None else []
+    if min_id is not None:
+        bounds.append(min_id - 1)
+    last_id = max(bounds, default=None)
+
+    while True:
+        chunk = ranks if last_id is None else ranks.filter(id__gt=last_id)
+        rows = list(chunk.values_list(*EXPORT_FIELDS)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def render(rows, export_format):
+    """Yield the rows as NDJSON lines or CSV lines with a header"""
+
+    if export_format == 'csv':
+        return _csv_lines(rows)
+    return _ndjson_lines(rows)
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), separators=(',', ':'), cls=DjangoJSONEncoder) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
@@ -0,0 +1,101 @@
+import random
+import struct
+from django.db.models import F
+from django.utils import timezone
+from .models import GameSession, Question, Answer, Game
+from . import scores
+
+QUESTION_ID = struct.Struct('<I')
+
+
+def start_session(user_id, gameid):
+    """New session over the game's questions in shuffled order.
+
+    The order is shuffled here instead of with ORDER BY RANDOM(), which
+    sorts the whole table. Returns None if there is no such game, a
+    session with no questions if the game has none.
+    """
+    question_ids = list(Question.objects.filter(game_id=gameid).values_list('questid', flat=True))
+    if not question_ids and not Game.objects.filter(gameid=gameid).exists():
+        return None
+
+    random.shuffle(question_ids)
+    return GameSession.objects.create(
+        user_id=user_id, game_id=gameid, order=pack(question_ids), created=timezone.now()
+    )
+
+
+def get_session(user_id, session_id):
+    return GameSession.objects.filter(id=session_id, user_id=user_id).first()
+
+
+def pack(question_ids):
+    return b''.join(QUESTION_ID.pack(questid) for questid in question_ids)
+
+
+def total(session):
+    return len(session.order) // QUESTION_ID.size
+
+
+def question_at(session, position):
+    """Question id at `position` of the session order, None past either end"""
+
+    if not 0 <= position < total(session):
+        return None
+    return QUESTION_ID.unpack_from(session.order, position * QUESTION_ID.size)[0]
+
+
+def state(session):
+    return {
+        'session_id': session.id,
+        'gameid': session.game_id,
+        'position': session.position,
+        'total': total(session),
+        'finished': session.position >= total(session)
+    }
+
+
+def next_question(session):
+    """The question at the session cursor with its answer variants, None when finished.
+
+    Two indexed lookups whatever the game size. A question deleted since
+    the session started is skipped.
+    """
+    while True:
+        questid = question_at(session, session.position)
+        if questid is None:
+            return None
+
+        question = Question.objects.filter(questid=questid).values('questid', 'question', 'points').first()
+        if question is not None:
+            question['answers'] = list(
+                Answer.objects.filter(quest_id=questid).order_by('choiceid').values('choiceid', 'variant')
+            )
+            return question
+
+        advance(session, session.position)
+
+
+def answer(session, user_id, answer_key):
+    """Record a choice for the current question and move the cursor past it.
+
+    A choice for the question just answered is a retry, it returns the
+    first result and leaves the cursor alone. Returns None if the choice
+    belongs to neither question.
+    """
+    if answer_key.questid == question_at(session, session.position):
+        result = scores.play(user_id, answer_key)
+        advance(session, session.position)
+        return result
+
+    if answer_key.questid == question_at(session, session.position - 1):
+        return scores.play(user_id, answer_key)
+
+    return None
+
+
+def advance(session, position):
+    """Move the cursor from `position` to the next question, unless a concurrent request did"""
+
+    GameSession.objects.filter(id=session.id, position=position).update(position=F('position') + 1)
+    session.position = position + 1
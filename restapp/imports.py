@@ -0,0 +1,367 @@
+import csv
+import io
+import json
+import re
+import time
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from .models import Game, Question, Answer
+from . import schemas, versions
+
+IMPORT_CHUNK_SIZE = getattr(settings, 'IMPORT_CHUNK_SIZE', 1000)
+IMPORT_FORMATS = ('json', 'ndjson', 'csv')
+MAX_REPORTED_ERRORS = 100
+# Characters read from a JSON import at a time
+JSON_READ_SIZE = 64 * 1024
+
+CSV_COLUMNS = ('game', 'question', 'points', 'variant', 'status')
+
+
+def read_events(stream, import_format):
+    """Yield ('game' | 'question' | 'answer', location, payload) from a text stream.
+
+    `json` is a list of games with nested `questions` and `answers`, `ndjson`
+    is one such game per line and `csv` is one answer per row with the
+    CSV_COLUMNS header, consecutive rows sharing a game and question.
+    All three are read incrementally, one game at a time, `json` in either
+    its top-level list or its `{"games": [...]}` form.
+    """
+    if import_format == 'csv':
+        return _csv_events(stream)
+    if import_format == 'ndjson':
+        return _ndjson_events(stream)
+    return _json_events(stream)
+
+
+def _json_events(stream):
+    for index, game in enumerate(json_items(stream, 'games'), 1):
+        yield from _game_events(f"game {index}", game)
+
+
+def json_items(stream, member):
+    """Items of a top-level JSON list, or of the `member` list of a top-level object, one at a time"""
+
+    reader = _JSONReader(stream)
+    if reader.take('['):
+        yield from _json_list(reader)
+    elif reader.take('{'):
+        yield from _json_member_list(reader, member)
+    else:
+        raise ValueError(f"expected a list or {{\"{member}\": [...]}}")
+    if reader.peek():
+        raise ValueError("extra data after the list")
+
+
+def _json_list(reader):
+    """Items of a list whose '[' was taken"""
+
+    index = 0
+    while not reader.take(']'):
+        if index and not reader.take(','):
+            raise ValueError(f"expected ',' or ']' after item {index}")
+        index += 1
+        yield reader.value()
+
+
+def _json_member_list(reader, member):
+    """Items of the `member` list of an object whose '{' was taken, other members are skipped"""
+
+    first = True
+    while not reader.take('}'):
+        if not first and not reader.take(','):
+            raise ValueError("expected ',' or '}' between members")
+        first = False
+        key = reader.value()
+        if not isinstance(key, str) or not reader.take(':'):
+            raise ValueError("expected a member name and ':'")
+        if key == member and reader.take('['):
+            yield from _json_list(reader)
+        else:
+            reader.value()
+
+
+class _JSONReader:
+    """Reads a JSON document value by value from JSON_READ_SIZE chunks.
+
+    `value()` first finds where the value ends, scanning each chunk once and
+    keeping the chunks it spans, then decodes it in one go. Reading a value
+    costs time linear in its size, however many chunks it spans.
+    """
+
+    decoder = json.JSONDecoder()
+    # Text between brackets, whole strings included, and the rest of a string
+    between_brackets = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*', re.S)
+    string_rest = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.S)
+    scalar_end = re.compile(r'[\s,\]}:]')
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.size = JSON_READ_SIZE
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def peek(self):
+        """Next non-whitespace character, '' at the end of the input"""
+
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def take(self, char):
+        if self.peek() != char:
+            return False
+        self.pos += 1
+        return True
+
+    def value(self):
+        first = self.peek()
+        if not first:
+            raise ValueError("unexpected end of input")
+
+        scan = self._scan_scalar if first not in '[{"' else self._scan_nested
+        state = {'depth': 0, 'in_string': first == '"', 'escaped': False, 'start': self.pos + (first == '"')}
+        spanned = []
+        start = self.pos
+        while True:
+            end = scan(state)
+            if end is not None:
+                break
+            spanned.append(self.buffer[start:])
+            start = state['start'] = self.pos = len(self.buffer)
+            if not self._fill():
+                if first in '[{"':
+                    raise ValueError("unexpected end of input")
+                end = len(self.buffer)
+                break
+            start = state['start'] = 0
+
+        text = ''.join(spanned) + self.buffer[start:end]
+        value, stop = self.decoder.raw_decode(text)
+        if stop != len(text):
+            raise ValueError(f"invalid JSON value: {text[:50]!r}")
+        self.pos = end
+        return value
+
+    def _scan_scalar(self, state):
+        match = self.scalar_end.search(self.buffer, state['start'])
+        return match.start() if match else None
+
+    def _scan_nested(self, state):
+        """End of the string, list or object being read, None if it continues in the next chunk"""
+
+        pos = state['start']
+        buffer = self.buffer
+        if state['escaped'] and pos < len(buffer):
+            state['escaped'] = False
+            pos += 1
+        while pos < len(buffer):
+            if state['in_string']:
+                pos = self.string_rest.match(buffer, pos).end()
+                if pos >= len(buffer) - 1 and buffer[pos:] == '\\':
+                    # The escaped character is in the next chunk
+                    state['escaped'] = True
+                    return None
+                if pos == len(buffer):
+                    return None
+                state['in_string'] = False
+            else:
+                pos = self.between_brackets.match(buffer, pos).end()
+                if pos == len(buffer):
+                    return None
+                char = buffer[pos]
+                if char == '"':
+                    # A string running into the next chunk
+                    state['in_string'] = True
+                    pos += 1
+                    continue
+                state['depth'] += 1 if char in '[{' else -1
+            pos += 1
+            if not state['depth']:
+                return pos
+        return None
+
+    def _fill(self):
+        chunk = '' if self.eof else self.stream.read(self.size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+
+def _ndjson_events(stream):
+    for line_no, line in enumerate(stream, 1):
+        if line.strip():
+            yield from _game_events(f"line {line_no}", json.loads(line))
+
+
+def _game_events(location, game):
+    if not isinstance(game, dict):
+        yield 'game', location, {}
+        return
+
+    yield 'game', location, game
+    for quest_no, quest in enumerate(game.get('questions', []), 1):
+        quest_location = f"{location}, question {quest_no}"
+        yield 'question', quest_location, quest if isinstance(quest, dict) else {}
+        answers = quest.get('answers', []) if isinstance(quest, dict) else []
+        for answer_no, answer in enumerate(answers, 1):
+            yield 'answer', f"{quest_location}, answer {answer_no}", answer if isinstance(answer, dict) else {}
+
+
+def _csv_events(stream):
+    game = question = None
+    reader = csv.DictReader(stream)
+    missing = set(CSV_COLUMNS) - set(reader.fieldnames or ())
+    if missing:
+        raise KeyError(f"missing CSV columns {sorted(missing)}")
+
+    for row in reader:
+        location = f"line {reader.line_num}"
+        if row['game'] != game:
+            game, question = row['game'], None
+            yield 'game', location, {'name': row['game']}
+        if row['question'] != question:
+            question = row['question']
+            yield 'question', location, {'question': row['question'], 'points': csv_int(row['points'])}
+        yield 'answer', location, {'variant': row['variant'], 'status': csv_bool(row['status'])}
+
+
+def csv_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def csv_bool(value):
+    lowered = str(value).strip().lower()
+    if lowered in ('true', '1', 'yes'):
+        return True
+    if lowered in ('false', '0', 'no'):
+        return False
+    return value
+
+
+class GameImporter:
+    """Validate and insert games, questions and answers.
+
+    The input is read twice. The first pass only validates, so an invalid
+    row anywhere leaves the database untouched, and a dry run stops there.
+    The second pass buffers the rows and writes them with `bulk_create`,
+    committing every `chunk_size` rows, so the import never holds SQLite's
+    write lock for longer than one chunk. Other requests may see imported
+    games before the import is done. If a write fails, the games already
+    committed are deleted again.
+    """
+
+    def __init__(self, dry_run=False, chunk_size=IMPORT_CHUNK_SIZE):
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.counts = {'games': 0, 'questions': 0, 'answers': 0}
+        self.errors = []
+        self.error_count = 0
+        self._writing = False
+        self._pending = {Game: [], Question: [], Answer: []}
+        self._game_ids = []
+
+    def run(self, read_events):
+        """Import the events returned by `read_events()`, which is called once per pass"""
+
+        started = time.perf_counter()
+
+        self._consume(read_events())
+        if not self.error_count and not self.dry_run:
+            self._write(read_events())
+
+        if not self.error_count and not self.dry_run and self._game_ids:
+            versions.bump_game_list()
+            versions.bump_games(self._game_ids)
+
+        elapsed = time.perf_counter() - started
+        rows = sum(self.counts.values())
+        return {
+            'dry_run': self.dry_run,
+            'imported': not self.error_count and not self.dry_run,
+            **self.counts,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(rows / elapsed) if elapsed else rows
+        }
+
+    def _write(self, events):
+        self._writing = True
+        try:
+            self._consume(events)
+            self._flush()
+        except DatabaseError as exc:
+            self._error('database', str(exc))
+            Game.objects.filter(gameid__in=self._game_ids).delete()
+            self._game_ids = []
+
+    def _consume(self, events):
+        game = question = None
+        try:
+            for kind, location, payload in events:
+                if kind == 'game':
+                    game = question = self._build(location, schemas.game_create, payload, Game)
+                elif kind == 'question':
+                    question = self._build(location, schemas.question_create, payload, Question, game=game)
+                else:
+                    self._build(location, schemas.answer_create, payload, Answer, quest=question)
+
+        except (ValueError, KeyError) as exc:
+            # Malformed JSON or missing CSV columns, nothing after this point can be read
+            self._error('input', f"unreadable: {exc.args[0] if exc.args else exc}")
+
+    def _build(self, location, schema, payload, model, **parent):
+        validated, errors = schema.check(payload)
+        if not self._writing:
+            if errors:
+                self._error(location, '; '.join(errors))
+            else:
+                self.counts[model._meta.verbose_name_plural] += 1
+            return None
+
+        obj = model(**validated, **parent)
+        self._pending[model].append(obj)
+        if sum(len(objs) for objs in self._pending.values()) >= self.chunk_size:
+            self._flush()
+        return obj
+
+    def _flush(self):
+        with transaction.atomic():
+            for model in (Game, Question, Answer):
+                if self._pending[model]:
+                    model.objects.bulk_create(self._pending[model])
+        self._game_ids.extend(game.gameid for game in self._pending[Game])
+        self._pending = {Game: [], Question: [], Answer: []}
+
+    def _error(self, location, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"{location}: {message}")
+
+
+def import_games(stream, import_format, dry_run=False, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import a seekable text stream, see GameImporter"""
+
+    def read_events_from_start():
+        stream.seek(0)
+        return read_events(stream, import_format)
+
+    return GameImporter(dry_run, chunk_size).run(read_events_from_start)
+
+
+def guess_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower()
+    return extension if extension in IMPORT_FORMATS else None
+
+
+def text_stream(binary):
+    return io.TextIOWrapper(binary, encoding='utf-8', newline='')
@@ -0,0 +1,100 @@
+from bisect import bisect_right
+from itertools import accumulate
+from .models import UserScore, UserGameScore, ScoreBucket
+
+TOP_LIMIT_DEFAULT = 10
+TOP_LIMIT_MAX = 100
+AROUND_DEFAULT = 2
+AROUND_MAX = 25
+
+FIELDS = ('user_id', 'user__username', 'points')
+
+
+def get_leaderboard(user_id, game_id=None, limit=TOP_LIMIT_DEFAULT, around=AROUND_DEFAULT):
+    """Top `limit` users by points plus the caller's rank and `around` neighbours each side.
+
+    Ties share a rank (1, 2, 2, 4). Every query walks the `-points, user`
+    indexes of the aggregate tables or the `ScoreBucket` histogram, never `Rank`.
+    """
+    scores = _scores(game_id)
+
+    top = list(scores.order_by('-points', 'user_id').values(*FIELDS)[:limit])
+    me = scores.filter(user_id=user_id).values(*FIELDS).first()
+
+    above, below = [], []
+    if me and around:
+        above = _above(scores, me, around)
+        below = _below(scores, me, around)
+
+    rows = top + above + below + ([me] if me else [])
+    rank = _ranker(game_id, min((row['points'] for row in rows), default=0))
+
+    return {
+        'game_id': game_id,
+        'top': [_entry(row, rank) for row in top],
+        'me': _entry(me, rank) if me else None,
+        'above': [_entry(row, rank) for row in above],
+        'below': [_entry(row, rank) for row in below]
+    }
+
+
+def _scores(game_id):
+    if game_id is None:
+        return UserScore.objects.all()
+    return UserGameScore.objects.filter(game_id=game_id)
+
+
+def _above(scores, me, around):
+    """Neighbours ranked right before the caller, best first"""
+
+    ties = list(
+        scores.filter(points=me['points'], user_id__lt=me['user_id'])
+        .order_by('-user_id').values(*FIELDS)[:around]
+    )
+    rest = list(
+        scores.filter(points__gt=me['points'])
+        .order_by('points', '-user_id').values(*FIELDS)[:around - len(ties)]
+    ) if len(ties) < around else []
+
+    return (ties + rest)[::-1]
+
+
+def _below(scores, me, around):
+    """Neighbours ranked right after the caller, best first"""
+
+    ties = list(
+        scores.filter(points=me['points'], user_id__gt=me['user_id'])
+        .order_by('user_id').values(*FIELDS)[:around]
+    )
+    rest = list(
+        scores.filter(points__lt=me['points'])
+        .order_by('-points', 'user_id').values(*FIELDS)[:around - len(ties)]
+    ) if len(ties) < around else []
+
+    return ties + rest
+
+
+def _ranker(game_id, lowest):
+    """Build a points -> rank function valid for any score >= `lowest`"""
+
+    buckets = list(
+        ScoreBucket.objects.filter(game_id=game_id, points__gt=lowest)
+        .order_by('points').values_list('points', 'users')
+    )
+    points = [bucket[0] for bucket in buckets]
+    # ahead[i] is the number of users holding points[i] or more
+    ahead = list(accumulate(bucket[1] for bucket in reversed(buckets)))[::-1] + [0]
+
+    def rank(score):
+        return ahead[bisect_right(points, score)] + 1
+
+    return rank
+
+
+def _entry(row, rank):
+    return {
+        'rank': rank(row['points']),
+        'user_id': row['user_id'],
+        'username': row['user__username'],
+        'points': row['points']
+    }
@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.hashers import make_password
+from django.db import connection, close_old_connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from .models import Game, Question, Answer, User
+from . import directory, versions
+
+LOADTEST_PREFIX = 'loadtest'
+LOADTEST_PASSWORD = 'loadtest-password'
+
+
+def percentile(latencies, fraction):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def seed_world(users, games, questions, answers, prefix=LOADTEST_PREFIX, password=LOADTEST_PASSWORD):
+    """Make sure `users` players and `games` games named after `prefix` exist.
+
+    Existing rows from an earlier run are reused, so runs against the same
+    database compare like with like. Every player shares one password,
+    hashed once. Returns (usernames, game ids).
+    """
+    existing_users = User.objects.filter(username__startswith=f'{prefix}_').count()
+    if existing_users < users:
+        encoded = make_password(password)
+        directory.index_users(User.objects.bulk_create(
+            User(username=f'{prefix}_{n:06}', email=f'{prefix}_{n:06}@example.com', password=encoded)
+            for n in range(existing_users, users)
+        ))
+
+    game_names = Game.objects.filter(name__startswith=f'{prefix} game ')
+    existing_games = game_names.count()
+    if existing_games < games:
+        new_games = Game.objects.bulk_create(
+            Game(name=f'{prefix} game {n}') for n in range(existing_games, games)
+        )
+        new_questions = Question.objects.bulk_create(
+            Question(game=game, question=f'{game.name} question {n}', points=(5, 10, 15)[n % 3])
+            for game in new_games for n in range(questions)
+        )
+        Answer.objects.bulk_create(
+            Answer(quest=quest, variant=f'variant {n}', status=n == 0)
+            for quest in new_questions for n in range(answers)
+        )
+        versions.bump_game_list()
+        versions.bump_games([game.gameid for game in new_games])
+
+    usernames = list(
+        User.objects.filter(username__startswith=f'{prefix}_')
+        .order_by('username').values_list('username', flat=True)[:users]
+    )
+    game_ids = list(game_names.order_by('gameid').values_list('gameid', flat=True)[:games])
+    return usernames, game_ids
+
+
+class LoadRun:
+    """Drive concurrent player sessions through the URL routes in process.
+
+    A session fetches a token, lists the games, opens one game's questions
+    and for up to `plays` of them fetches the answers, plays one and polls
+    the points, then reads the rank. Every request is timed and its SQL
+    queries counted per endpoint.
+    """
+
+    def __init__(self, usernames, game_ids, password=LOADTEST_PASSWORD, plays=5, host='localhost', seed=0):
+        self.usernames = usernames
+        self.game_ids = game_ids
+        self.password = password
+        self.plays = plays
+        self.host = host
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(list)
+        self._queries = defaultdict(list)
+        self._errors = defaultdict(int)
+
+    def run(self, sessions, clients):
+        started = time.perf_counter()
+        if clients == 1:
+            self._client(0, sessions)
+        else:
+            with ThreadPoolExecutor(max_workers=clients) as pool:
+                jobs = [
+                    pool.submit(self._client, n, sessions // clients + (n < sessions % clients))
+                    for n in range(clients)
+                ]
+                for job in jobs:
+                    job.result()
+        return self.report(time.perf_counter() - started)
+
+    def report(self, seconds):
+        requests = sum(len(latencies) for latencies in self._latencies.values())
+        return {
+            'seconds': round(seconds, 3),
+            'requests': requests,
+            'errors': sum(self._errors.values()),
+            'requests_per_second': round(requests / seconds, 1) if seconds else requests,
+            'endpoints': {
+                endpoint: self._summary(endpoint, seconds) for endpoint in sorted(self._latencies)
+            }
+        }
+
+    def _summary(self, endpoint, seconds):
+        latencies = self._latencies[endpoint]
+        queries = self._queries[endpoint]
+        return {
+            'requests': len(latencies),
+            'errors': self._errors[endpoint],
+            'requests_per_second': round(len(latencies) / seconds, 1) if seconds else len(latencies),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'max_ms': round(max(latencies) * 1000, 2),
+            'queries_per_request': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries)
+        }
+
+    def _client(self, number, sessions):
+        rng = random.Random(self.seed * 1000003 + number)
+        client = Client(raise_request_exception=False, HTTP_HOST=self.host)
+        try:
+            for _ in range(sessions):
+                self._session(client, rng)
+        finally:
+            close_old_connections()
+
+    def _session(self, client, rng):
+        response = self._call(client, 'token', 'post', '/api/token/', {
+            'username': rng.choice(self.usernames), 'password': self.password
+        })
+        if response.status_code != 200:
+            return
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {response.json()['access']}"}
+
+        self._call(client, 'games', 'get', '/games/', **auth)
+        game_id = rng.choice(self.game_ids)
+        response = self._call(client, 'quests', 'get', f'/quests/?gameid={game_id}', **auth)
+        quests = response.json() if response.status_code == 200 else []
+
+        for quest in rng.sample(quests, min(self.plays, len(quests))):
+            response = self._call(client, 'answers', 'get', f"/answers/?questid={quest['questid']}", **auth)
+            answers = response.json() if response.status_code == 200 else []
+            if answers:
+                choiceid = rng.choice(answers)['choiceid']
+                self._call(client, 'play', 'post', f'/play/?choiceid={choiceid}', **auth)
+            self._call(client, 'points', 'get', '/points/', **auth)
+
+        self._call(client, 'rank', 'get', f'/rank/?game_id={game_id}', **auth)
+
+    def _call(self, client, endpoint, method, path, data=None, **extra):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, method)(path, data, **extra)
+            elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._latencies[endpoint].append(elapsed)
+            self._queries[endpoint].append(len(captured.captured_queries))
+            if response.status_code >= 400:
+                self._errors[endpoint] += 1
+        return response
@@ -0,0 +1,160 @@
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from restapp.auth import ClaimsTokenObtainPairSerializer
+from restapp.loadtest import percentile
+from restapp.models import Game, Answer, User
+
+ASYNC_PREFIX = '/async'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync views behind a pool of WSGI worker threads with the async views "
+        "on one ASGI event loop, both in process with simulated slow clients. "
+        "--include-play records answers, run it against a disposable database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, help="Defaults to the first superuser")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=100, help="Simultaneous clients")
+        parser.add_argument('--threads', type=int, default=8, help="WSGI worker threads")
+        parser.add_argument(
+            '--latency-ms', type=float, default=50,
+            help="Time each response spends reaching its client, holding a WSGI thread meanwhile"
+        )
+        parser.add_argument('--include-play', action='store_true')
+
+    def handle(self, *args, **options):
+        user = self._user(options['user_id'])
+        token = str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+        schedule = list(islice(cycle(self._requests(options['include_play'])), options['requests']))
+        concurrency = min(options['concurrency'], len(schedule))
+        latency = options['latency_ms'] / 1000
+
+        wsgi = self._run_wsgi(schedule, token, concurrency, options['threads'], latency)
+        asgi = asyncio.run(self._run_asgi(schedule, token, concurrency, latency))
+
+        self.stdout.write(
+            f"{len(schedule)} requests, {concurrency} clients, {options['latency_ms']:g} ms to client"
+        )
+        self._report(f"WSGI, {options['threads']} threads", *wsgi)
+        self._report("ASGI, 1 event loop", *asgi)
+
+    def _user(self, user_id):
+        users = User.objects.all()
+        user = users.filter(id=user_id).first() if user_id else users.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("User not found")
+        return user
+
+    def _requests(self, include_play):
+        requests = [('GET', '/points/'), ('GET', '/rank/'), ('GET', '/games/')]
+        game = Game.objects.order_by('gameid').first()
+        if game is not None:
+            requests.append(('GET', f'/quests/?gameid={game.gameid}'))
+            requests.append(('GET', f'/games/bundle/?gameid={game.gameid}'))
+
+        if include_play:
+            choiceid = Answer.objects.order_by('choiceid').values_list('choiceid', flat=True).first()
+            if choiceid is None:
+                raise CommandError("--include-play needs at least one answer")
+            requests.append(('POST', f'/play/?choiceid={choiceid}'))
+        return requests
+
+    def _run_wsgi(self, schedule, token, concurrency, threads, latency):
+        app = get_wsgi_application()
+        workers = threading.BoundedSemaphore(threads)
+        latencies, errors = [], []
+
+        def call(method, path):
+            path, _, query = path.partition('?')
+            statuses = []
+            body = app({
+                'REQUEST_METHOD': method,
+                'PATH_INFO': path,
+                'QUERY_STRING': query,
+                'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80',
+                'HTTP_AUTHORIZATION': f'Bearer {token}',
+                'wsgi.input': io.BytesIO(),
+                'wsgi.url_scheme': 'http'
+            }, lambda status, headers, exc_info=None: statuses.append(status))
+            try:
+                b''.join(body)
+                time.sleep(latency)
+            finally:
+                body.close()
+            return int(statuses[0][:3])
+
+        def client(requests):
+            for method, path in requests:
+                started = time.perf_counter()
+                with workers:
+                    code = call(method, path)
+                latencies.append(time.perf_counter() - started)
+                if code >= 400:
+                    errors.append(code)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(client, [schedule[n::concurrency] for n in range(concurrency)]))
+        return time.perf_counter() - started, latencies, errors
+
+    async def _run_asgi(self, schedule, token, concurrency, latency):
+        app = get_asgi_application()
+        latencies, errors = [], []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def call(method, path):
+            path, _, query = path.partition('?')
+            statuses = []
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+                elif not message.get('more_body'):
+                    await asyncio.sleep(latency)
+
+            await app({
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': method,
+                'scheme': 'http',
+                'path': ASYNC_PREFIX + path,
+                'query_string': query.encode(),
+                'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+                'server': ('localhost', 80),
+                'client': ('127.0.0.1', 0)
+            }, receive, send)
+            return statuses[0]
+
+        async def client(requests):
+            for method, path in requests:
+                started = time.perf_counter()
+                code = await call(method, path)
+                latencies.append(time.perf_counter() - started)
+                if code >= 400:
+                    errors.append(code)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(schedule[n::concurrency]) for n in range(concurrency)))
+        return time.perf_counter() - started, latencies, errors
+
+    def _report(self, name, seconds, latencies, errors):
+        self.stdout.write(
+            f"{name:<20} {len(latencies) / seconds:8.1f} req/s"
+            f"  p50 {percentile(latencies, 0.5) * 1000:7.1f} ms"
+            f"  p99 {percentile(latencies, 0.99) * 1000:7.1f} ms"
+            f"  errors {len(errors)}"
+        )
@@ -0,0 +1,117 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from statistics import median
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from restapp.auth import ClaimsTokenObtainPairSerializer
+from restapp.models import User
+from restapp.warmup import hot_games
+
+# Runs in a fresh interpreter: boots the WSGI application the way a server
+# worker does, then sends every path twice
+WORKER = '''
+import io, json, os, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+imported = time.perf_counter()
+module, _, name = os.environ['BENCH_WSGI_APPLICATION'].rpartition('.')
+app = getattr(__import__(module, fromlist=[name]), name)
+booted = time.perf_counter()
+
+def call(path):
+    path, _, query = path.partition('?')
+    statuses = []
+    started = time.perf_counter()
+    body = app({
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+        'HTTP_AUTHORIZATION': 'Bearer ' + os.environ['BENCH_TOKEN'],
+        'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http'
+    }, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        b''.join(body)
+    finally:
+        body.close()
+    return time.perf_counter() - started, int(statuses[0][:3])
+
+paths = json.loads(sys.argv[1])
+first = [call(path) for path in paths]
+first_response = time.time()
+second = [call(path) for path in paths]
+print(json.dumps({
+    'import': imported - started, 'boot': booted - imported, 'first_response': first_response,
+    'first': first, 'second': second
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot fresh WSGI workers with and without warm-up and report import time, boot time, "
+        "time from process start to the first response, and the first and second latency of each path"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, help="Defaults to the first superuser")
+        parser.add_argument('--runs', type=int, default=5, help="Fresh workers per mode, medians are reported")
+
+    def handle(self, *args, **options):
+        user = self._user(options['user_id'])
+        paths = self._paths()
+        env = dict(
+            os.environ,
+            BENCH_TOKEN=str(ClaimsTokenObtainPairSerializer.get_token(user).access_token),
+            BENCH_WSGI_APPLICATION=settings.WSGI_APPLICATION,
+            PYTHONPATH=os.pathsep.join(filter(None, [str(settings.BASE_DIR), os.environ.get('PYTHONPATH')]))
+        )
+
+        for mode, warmup in (('cold', '0'), ('warmed up', '1')):
+            runs = [self._run(paths, dict(env, QUIZ_WARMUP=warmup)) for _ in range(options['runs'])]
+            self._report(mode, paths, runs)
+
+    def _user(self, user_id):
+        users = User.objects.all()
+        user = users.filter(id=user_id).first() if user_id else users.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("User not found")
+        return user
+
+    def _paths(self):
+        paths = ['/games/']
+        for gameid in hot_games(1):
+            paths += [f'/quests/?gameid={gameid}', f'/games/bundle/?gameid={gameid}']
+        return paths + ['/points/', '/openapi']
+
+    def _run(self, paths, env):
+        spawned = time.time()
+        worker = subprocess.run(
+            [sys.executable, '-c', WORKER, json.dumps(paths)], env=env, capture_output=True, text=True
+        )
+        if worker.returncode:
+            raise CommandError(f"Worker failed:\n{worker.stderr}")
+
+        run = json.loads(worker.stdout.strip().splitlines()[-1])
+        run['first_response'] -= spawned
+        errors = [status for _, status in run['first'] + run['second'] if status >= 400]
+        if errors:
+            raise CommandError(f"Worker got error responses {errors}")
+        return run
+
+    def _report(self, mode, paths, runs):
+        def ms(values):
+            return f"{median(values) * 1000:7.1f} ms"
+
+        self.stdout.write(
+            f"{mode}: import {ms([run['import'] for run in runs])}"
+            f"  boot {ms([run['boot'] for run in runs])}"
+            f"  start to first response {ms([run['first_response'] for run in runs])}"
+        )
+        for n, path in enumerate(paths):
+            self.stdout.write(
+                f"  {path:<32} first {ms([run['first'][n][0] for run in runs])}"
+                f"  second {ms([run['second'][n][0] for run in runs])}"
+            )
@@ -0,0 +1,74 @@
+import timeit
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from restapp.models import Game, Question, Answer
+from restapp.projections import projection_of
+from restapp.renderers import FastJSONRenderer, orjson
+from restapp.serializers import QuestionSerializer, AnswerSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Per-row cost of a listing through ModelSerializer and JSONRenderer against the "
+        "values_list() projection and FastJSONRenderer. The rows are inserted in a "
+        "transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._bench(options['rows'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _bench(self, count, repeat):
+        game = Game.objects.create(name='bench listings')
+        Question.objects.bulk_create(
+            Question(game=game, question=f'Benchmark question {n} about Chișinău', points=(5, 10, 15)[n % 3])
+            for n in range(count)
+        )
+        quest = Question.objects.filter(game=game).first()
+        Answer.objects.bulk_create(
+            Answer(quest=quest, variant=f'Variant {n}', status=n == 0) for n in range(count)
+        )
+
+        if orjson is None:
+            self.stdout.write("orjson is not installed, FastJSONRenderer falls back to JSONRenderer")
+
+        for name, queryset, serializer_class in (
+            ('questions', Question.objects.filter(game=game).order_by('pk'), QuestionSerializer),
+            ('answers', Answer.objects.filter(quest=quest).order_by('pk'), AnswerSerializer)
+        ):
+            projection = projection_of(serializer_class)
+            cases = {
+                'serializer + JSONRenderer': lambda: JSONRenderer().render(
+                    serializer_class(queryset.all(), many=True).data
+                ),
+                'serializer + FastJSONRenderer': lambda: FastJSONRenderer().render(
+                    serializer_class(queryset.all(), many=True).data
+                ),
+                'values_list + JSONRenderer': lambda: JSONRenderer().render(projection.rows(queryset.all())),
+                'values_list + FastJSONRenderer': lambda: FastJSONRenderer().render(
+                    projection.rows(queryset.all())
+                )
+            }
+
+            outputs = {case() for case in cases.values()}
+            self.stdout.write(f"{count} {name}, identical output: {len(outputs) == 1}")
+
+            baseline = None
+            for case_name, case in cases.items():
+                best = min(timeit.repeat(case, number=1, repeat=repeat))
+                per_row = best / count * 1e6
+                baseline = baseline or per_row
+                self.stdout.write(f"  {case_name:<32} {per_row:8.2f} us/row  {baseline / per_row:5.2f}x")
@@ -0,0 +1,79 @@
+import io
+import time
+import timeit
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import resolve
+from restapp.auth import ClaimsTokenObtainPairSerializer
+from restapp.metrics import metrics_middleware
+from restapp.models import User
+
+METRICS_MIDDLEWARE = 'restapp.metrics.metrics_middleware'
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request overhead of the metrics middleware on read endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--path', action='append', help="Defaults to /points/ and /games/")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("The benchmark needs a superuser")
+        token = str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+
+        without = [name for name in settings.MIDDLEWARE if name != METRICS_MIDDLEWARE]
+        with override_settings(MIDDLEWARE=without):
+            plain = WSGIHandler()
+        with override_settings(MIDDLEWARE=[METRICS_MIDDLEWARE] + without):
+            measured = WSGIHandler()
+
+        for path in options['path'] or ['/points/', '/games/']:
+            # Alternate the handlers so drift in the machine affects both alike
+            best = {plain: float('inf'), measured: float('inf')}
+            for _ in range(options['repeat']):
+                for handler in best:
+                    best[handler] = min(best[handler], self._time(handler, path, token, options['requests']))
+
+            base, overhead = best[plain], best[measured] - best[plain]
+            self.stdout.write(
+                f"{path:<20} {base * 1e6:8.1f} us/request without, "
+                f"{overhead * 1e6:+6.1f} us ({overhead / base * 100:+.1f}%) with metrics"
+            )
+
+        self._middleware_alone(options['requests'], options['repeat'])
+
+    def _middleware_alone(self, requests, repeat):
+        request = RequestFactory().get('/points/')
+        request.resolver_match = resolve('/points/')
+        response = HttpResponse(b'{"points_total":0}')
+        view = lambda request: response
+        middleware = metrics_middleware(view)
+
+        base = min(timeit.repeat(lambda: view(request), number=requests, repeat=repeat)) / requests
+        wrapped = min(timeit.repeat(lambda: middleware(request), number=requests, repeat=repeat)) / requests
+        self.stdout.write(f"{'middleware alone':<20} {(wrapped - base) * 1e6:8.1f} us/request")
+
+    def _time(self, handler, path, token, requests):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'HTTP_AUTHORIZATION': f'Bearer {token}',
+            'wsgi.url_scheme': 'http'
+        }
+
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = handler(dict(environ, **{'wsgi.input': io.BytesIO()}), lambda *args: None)
+            response.close()
+        return (time.perf_counter() - started) / requests
@@ -0,0 +1,60 @@
+import timeit
+from django.core.management.base import BaseCommand
+from restapp.validators import Validator, Schema
+
+FIELDS = [
+    ('username', str, True, 8, 15),
+    ('email', 'email', True),
+    ('first_name', str, False, 2, 30),
+    ('question', str, True, 1, 250),
+    ('points', int, True, None, None, [5, 10, 15]),
+    ('is_staff', bool, False)
+]
+
+PAYLOAD = {
+    'username': 'player0001',
+    'email': 'player.one@example.com',
+    'first_name': 'Player',
+    'question': 'What is the name of the capital of Republic of Moldova?',
+    'points': 10,
+    'is_staff': False
+}
+
+
+def build_validator():
+    validator = Validator()
+    for field in FIELDS:
+        validator.map_field(*field)
+    return validator
+
+
+class Command(BaseCommand):
+    help = "Compare Validator.validate with the compiled Schema per payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payloads', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        count = options['payloads']
+        payloads = [dict(PAYLOAD) for _ in range(count)]
+        validator = build_validator()
+        schema = Schema()
+        for field in FIELDS:
+            schema.map_field(*field)
+
+        cases = {
+            'Validator built per payload': lambda: [build_validator().validate(p) for p in payloads],
+            'Validator.validate': lambda: [validator.validate(p) for p in payloads],
+            'Schema.validate': lambda: [schema.validate(p) for p in payloads],
+            'Schema.validate_many': lambda: schema.validate_many(payloads)
+        }
+
+        baseline = None
+        for name, case in cases.items():
+            best = min(timeit.repeat(case, number=1, repeat=options['repeat']))
+            per_payload = best / count * 1e6
+            baseline = baseline or per_payload
+            self.stdout.write(
+                f"{name:<30} {per_payload:8.2f} us/payload  {baseline / per_payload:5.2f}x"
+            )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from restapp import rollups
+
+
+class Command(BaseCommand):
+    help = "Fold old hourly score rollups into days and old daily rollups into weeks, run it periodically"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-hours', type=int, default=rollups.ROLLUP_KEEP_HOURS)
+        parser.add_argument('--keep-days', type=int, default=rollups.ROLLUP_KEEP_DAYS)
+
+    def handle(self, *args, **options):
+        hours, days = rollups.compact(keep_hours=options['keep_hours'], keep_days=options['keep_days'])
+        self.stdout.write(self.style.SUCCESS(f"Folded {hours} hourly and {days} daily rollups"))
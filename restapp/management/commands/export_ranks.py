@@ -0,0 +1,35 @@
+import sys
+from django.core.management.base import BaseCommand
+from restapp import exports
+
+
+class Command(BaseCommand):
+    help = "Stream Rank answer history as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-format', choices=exports.EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--file', help="Write to this file instead of stdout")
+        parser.add_argument('--user-id', type=int)
+        parser.add_argument('--game-id', type=int)
+        parser.add_argument('--min-id', type=int)
+        parser.add_argument('--max-id', type=int)
+        parser.add_argument('--after-id', type=int, help="Resume after the last exported id")
+        parser.add_argument('--chunk-size', type=int, default=exports.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        rows = exports.rank_rows(
+            user_id=options['user_id'],
+            game_id=options['game_id'],
+            min_id=options['min_id'],
+            max_id=options['max_id'],
+            after_id=options['after_id'],
+            chunk_size=options['chunk_size']
+        )
+        lines = exports.render(rows, options['output_format'])
+
+        if not options['file']:
+            sys.stdout.writelines(lines)
+            return
+
+        with open(options['file'], 'w', newline='') as output:
+            output.writelines(lines)
@@ -0,0 +1,27 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from restapp import imports
+
+
+class Command(BaseCommand):
+    help = "Import games, questions and answers from a JSON, NDJSON or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--input-format', choices=imports.IMPORT_FORMATS)
+        parser.add_argument('--dry-run', action='store_true', help="Only validate the file")
+        parser.add_argument('--chunk-size', type=int, default=imports.IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        import_format = options['input_format'] or imports.guess_format(options['path'])
+        if import_format is None:
+            raise CommandError("Cannot guess the file format, pass --input-format")
+
+        with open(options['path'], encoding='utf-8', newline='') as stream:
+            report = imports.import_games(
+                stream, import_format, options['dry_run'], options['chunk_size']
+            )
+
+        self.stdout.write(json.dumps(report, indent=2))
+        if report['error_count']:
+            raise CommandError(f"{report['error_count']} invalid rows, nothing imported")
@@ -0,0 +1,53 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from restapp import loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic world of players and games, drive concurrent player sessions through "
+        "the API and report per-endpoint latency, throughput and SQL query counts as JSON. "
+        "It writes users, games and answers, run it against a disposable database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--games', type=int, default=5)
+        parser.add_argument('--questions', type=int, default=10, help="Questions per game")
+        parser.add_argument('--answers', type=int, default=4, help="Answers per question")
+        parser.add_argument('--sessions', type=int, default=50, help="Player sessions in total")
+        parser.add_argument('--clients', type=int, default=8, help="Concurrent clients")
+        parser.add_argument('--plays', type=int, default=5, help="Questions played per session")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default=loadtest.LOADTEST_PREFIX)
+        parser.add_argument('--host', default='localhost', help="Host header, must be in ALLOWED_HOSTS")
+        parser.add_argument('--output', help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['games'], options['questions'], options['answers']) < 1:
+            raise CommandError("--users, --games, --questions and --answers must be positive")
+        if options['sessions'] < 1 or options['clients'] < 1:
+            raise CommandError("--sessions and --clients must be positive")
+
+        usernames, game_ids = loadtest.seed_world(
+            options['users'], options['games'], options['questions'], options['answers'],
+            options['prefix']
+        )
+        run = loadtest.LoadRun(
+            usernames, game_ids, plays=options['plays'], host=options['host'], seed=options['seed']
+        )
+        report = {
+            'config': {
+                option: options[option] for option in (
+                    'users', 'games', 'questions', 'answers', 'sessions', 'clients', 'plays', 'seed'
+                )
+            },
+            **run.run(options['sessions'], min(options['clients'], options['sessions']))
+        }
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(output + '\n')
+        else:
+            self.stdout.write(output)
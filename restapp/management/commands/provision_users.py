@@ -0,0 +1,33 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from restapp import imports, provisioning
+
+
+class Command(BaseCommand):
+    help = "Create users in bulk from a JSON or CSV file, hashing passwords in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--input-format', choices=provisioning.PROVISION_FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=provisioning.PROVISION_CHUNK_SIZE)
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help="Hashing threads, at most PROVISION_HASH_WORKERS (the available cores by default)"
+        )
+
+    def handle(self, *args, **options):
+        input_format = options['input_format'] or imports.guess_format(options['path'])
+        if input_format not in provisioning.PROVISION_FORMATS:
+            raise CommandError("Cannot guess the file format, pass --input-format")
+
+        with open(options['path'], encoding='utf-8', newline='') as stream:
+            try:
+                report = provisioning.provision_users(
+                    provisioning.read_users(stream, input_format),
+                    options['chunk_size'],
+                    options['workers']
+                )
+            except (ValueError, KeyError) as exc:
+                raise CommandError(f"Unreadable file: {exc}")
+
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from restapp import rollups, scores
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-user and per-game score aggregates and the time rollups from Rank"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=scores.REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        users, user_games = scores.rebuild(options['batch_size'])
+        hours = rollups.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {users} user and {user_games} user/game aggregates and {hours} hourly rollups"
+            )
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from restapp.routers import READ_REPLICAS
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database over the replica files, standing in for replication locally"
+
+    def handle(self, *args, **options):
+        if not READ_REPLICAS:
+            raise CommandError("No read replica configured, set QUIZ_REPLICA_DB")
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in READ_REPLICAS:
+            replica = connections[alias]
+            if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+                raise CommandError("Only SQLite files can be synced, other databases replicate themselves")
+
+            primary.ensure_connection()
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+            self.stdout.write(f"{alias}: copied from {DEFAULT_DB_ALIAS}")
@@ -0,0 +1,281 @@
+import ipaddress
+import threading
+import time
+from asyncio import iscoroutinefunction
+from bisect import bisect_left
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+
+METRICS_MAX_SERIES = getattr(settings, 'METRICS_MAX_SERIES', 200)
+METRICS_TOKEN = getattr(settings, 'METRICS_TOKEN', None)
+METRICS_ALLOWED_NETWORKS = tuple(
+    ipaddress.ip_network(network)
+    for network in getattr(settings, 'METRICS_ALLOWED_NETWORKS', ('127.0.0.0/8', '::1'))
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+UNMATCHED_ROUTE = '<unmatched>'
+OVERFLOW_ROUTE = '<other>'
+
+# Slots of a series after its per-bucket latency counts, the last bucket is +Inf
+BUCKET_SLOTS = len(LATENCY_BUCKETS) + 1
+LATENCY_SUM, SQL_QUERIES, SQL_SECONDS, RESPONSE_BYTES = range(BUCKET_SLOTS, BUCKET_SLOTS + 4)
+SLOTS = BUCKET_SLOTS + 4
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Registry:
+    """Per-process request aggregates keyed by (route, method).
+
+    Every thread writes to its own store, so recording takes no lock. A
+    scrape merges the stores, folding those of finished threads into one
+    retired store. Each store holds at most METRICS_MAX_SERIES series,
+    later routes are counted under OVERFLOW_ROUTE.
+    """
+
+    def __init__(self, max_series=METRICS_MAX_SERIES):
+        self.max_series = max_series
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stores = []
+        self._retired = {}
+
+    def observe(self, route, method, seconds, queries, sql_seconds, size):
+        series = self.series(route, method)
+        series[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        series[LATENCY_SUM] += seconds
+        series[SQL_QUERIES] += queries
+        series[SQL_SECONDS] += sql_seconds
+        series[RESPONSE_BYTES] += size
+
+    def series(self, route, method):
+        try:
+            store = self._local.store
+        except AttributeError:
+            store = self._register()
+
+        key = (route, method if method in METHODS else 'OTHER')
+        series = store.get(key)
+        if series is None:
+            if len(store) >= self.max_series:
+                key = (OVERFLOW_ROUTE, key[1])
+            series = store.setdefault(key, [0] * SLOTS)
+        return series
+
+    def snapshot(self):
+        """{(route, method): slots} summed over all threads"""
+
+        with self._lock:
+            self._retire_finished()
+            merged = {key: list(series) for key, series in self._retired.items()}
+            for _, store in self._stores:
+                _merge(merged, store)
+        return merged
+
+    def _register(self):
+        store = self._local.store = {}
+        with self._lock:
+            self._retire_finished()
+            self._stores.append((threading.current_thread(), store))
+        return store
+
+    def _retire_finished(self):
+        alive = []
+        for thread, store in self._stores:
+            if thread.is_alive():
+                alive.append((thread, store))
+            else:
+                _merge(self._retired, store)
+        self._stores = alive
+
+
+def _merge(target, store):
+    for key, series in list(store.items()):
+        total = target.setdefault(key, [0] * SLOTS)
+        for slot, value in enumerate(series):
+            total[slot] += value
+
+
+registry = Registry()
+
+
+_timer = ContextVar('restapp_sql_timer', default=None)
+
+
+class _SQLTimer:
+    """Queries and SQL seconds of one request"""
+
+    __slots__ = ('queries', 'seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+def _time_query(execute, sql, params, many, context):
+    """`execute_wrapper` hook installed once on every connection, counting for the current request"""
+
+    timer = _timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.queries += 1
+        timer.seconds += time.perf_counter() - started
+
+
+def _install(connection):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+@receiver(connection_created)
+def _connection_created(sender, connection, **kwargs):
+    _install(connection)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Record latency, SQL queries and time, and response size per route and method.
+
+    Put it first in MIDDLEWARE so the latency covers the whole stack. The
+    request's timer is a context variable, which asgiref and `run_db` carry
+    to the threads running sync views and database work under ASGI, so SQL
+    is counted wherever the request runs it and concurrent requests never
+    share a timer. SQL a streamed body runs while it is sent is added to
+    the route when the stream closes, its latency is not.
+    """
+    # Connections opened before this module was imported missed the signal
+    for alias in connections:
+        _install(connections[alias])
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            timer = _SQLTimer()
+            token = _timer.set(timer)
+            started = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                _timer.reset(token)
+            _record(request, response, time.perf_counter() - started, timer)
+            return response
+
+    else:
+        def middleware(request):
+            timer = _SQLTimer()
+            token = _timer.set(timer)
+            started = time.perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                _timer.reset(token)
+            _record(request, response, time.perf_counter() - started, timer)
+            return response
+
+    return middleware
+
+
+def _record(request, response, seconds, timer):
+    match = request.resolver_match
+    route = match.route if match is not None else UNMATCHED_ROUTE
+
+    if response.streaming:
+        size = 0
+        response.streaming_content = _counted(response.streaming_content, route, request.method)
+    else:
+        size = len(response.content)
+
+    registry.observe(route, request.method, seconds, timer.queries, timer.seconds, size)
+
+
+def _counted(chunks, route, method):
+    """Pass a streamed body through, counting its bytes and the SQL run to produce each chunk"""
+
+    chunks = iter(chunks)
+    timer = _SQLTimer()
+    size = 0
+    try:
+        while True:
+            # Only around next(), the server may iterate in another context between chunks
+            token = _timer.set(timer)
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                _timer.reset(token)
+            size += len(chunk)
+            yield chunk
+    finally:
+        series = registry.series(route, method)
+        series[RESPONSE_BYTES] += size
+        series[SQL_QUERIES] += timer.queries
+        series[SQL_SECONDS] += timer.seconds
+
+
+def render(snapshot):
+    """Prometheus text exposition of a registry snapshot"""
+
+    lines = [
+        '# HELP restapp_request_duration_seconds Request latency by route and method, '
+        'up to the first byte of streamed bodies',
+        '# TYPE restapp_request_duration_seconds histogram'
+    ]
+    for key, series in sorted(snapshot.items()):
+        labels = _labels(*key)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), series):
+            cumulative += count
+            lines.append(f'restapp_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'restapp_request_duration_seconds_sum{{{labels}}} {series[LATENCY_SUM]}')
+        lines.append(f'restapp_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+    for name, slot, help_text in (
+        ('restapp_sql_queries_total', SQL_QUERIES, 'SQL queries run by requests, streamed bodies included'),
+        ('restapp_sql_duration_seconds_total', SQL_SECONDS, 'Time requests spent in SQL, streamed bodies included'),
+        ('restapp_response_bytes_total', RESPONSE_BYTES, 'Response body bytes sent')
+    ):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for key, series in sorted(snapshot.items()):
+            lines.append(f'{name}{{{_labels(*key)}}} {series[slot]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _labels(route, method):
+    escaped = route.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'route="{escaped}",method="{method}"'
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint.
+
+    Served to `Authorization: Bearer <METRICS_TOKEN>` when that is set, and
+    to clients in METRICS_ALLOWED_NETWORKS, by default only the loopback.
+    """
+    if not _may_scrape(request):
+        return HttpResponse(status=401)
+    return HttpResponse(render(registry.snapshot()), content_type=CONTENT_TYPE)
+
+
+def _may_scrape(request):
+    if METRICS_TOKEN and request.headers.get('Authorization') == f'Bearer {METRICS_TOKEN}':
+        return True
+
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in network for network in METRICS_ALLOWED_NETWORKS)
@@ -0,0 +1,60 @@
+# Generated by Django 4.0 on 2026-10-18 02:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_scores(apps, schema_editor):
+    Rank = apps.get_model('restapp', 'Rank')
+    UserScore = apps.get_model('restapp', 'UserScore')
+    UserGameScore = apps.get_model('restapp', 'UserGameScore')
+    totals = {
+        'sum_points': models.Sum('points'),
+        'total_answers': models.Count('id'),
+        'correct_answers': models.Count('id', filter=~models.Q(points=0))
+    }
+
+    UserScore.objects.bulk_create(
+        UserScore(points=row.pop('sum_points'), **row)
+        for row in Rank.objects.order_by().values('user_id').annotate(**totals)
+    )
+    UserGameScore.objects.bulk_create(
+        UserGameScore(points=row.pop('sum_points'), **row)
+        for row in Rank.objects.order_by().values('user_id', 'game_id').annotate(**totals)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('restapp', '0010_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserScore',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='auth.user')),
+                ('points', models.IntegerField(default=0)),
+                ('total_answers', models.IntegerField(default=0)),
+                ('correct_answers', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserGameScore',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('points', models.IntegerField(default=0)),
+                ('total_answers', models.IntegerField(default=0)),
+                ('correct_answers', models.IntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='restapp.game')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.user')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='usergamescore',
+            constraint=models.UniqueConstraint(fields=('user', 'game'), name='usergamescore_user_game_uniq'),
+        ),
+        migrations.RunPython(populate_scores, migrations.RunPython.noop),
+    ]
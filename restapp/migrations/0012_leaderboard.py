@@ -0,0 +1,59 @@
+# Generated by Django 4.0 on 2026-10-18 02:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_buckets(apps, schema_editor):
+    UserScore = apps.get_model('restapp', 'UserScore')
+    UserGameScore = apps.get_model('restapp', 'UserGameScore')
+    ScoreBucket = apps.get_model('restapp', 'ScoreBucket')
+
+    ScoreBucket.objects.bulk_create(
+        ScoreBucket(**row)
+        for row in UserScore.objects.order_by().values('points').annotate(users=models.Count('user_id'))
+    )
+    ScoreBucket.objects.bulk_create(
+        ScoreBucket(**row)
+        for row in UserGameScore.objects.order_by().values('game_id', 'points').annotate(users=models.Count('id'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapp', '0011_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreBucket',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('points', models.IntegerField()),
+                ('users', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='usergamescore',
+            index=models.Index(fields=['game', '-points', 'user'], name='usergamescore_points_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userscore',
+            index=models.Index(fields=['-points', 'user'], name='userscore_points_idx'),
+        ),
+        migrations.AddField(
+            model_name='scorebucket',
+            name='game',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='restapp.game'),
+        ),
+        migrations.AddConstraint(
+            model_name='scorebucket',
+            constraint=models.UniqueConstraint(condition=models.Q(('game__isnull', True)), fields=('points',), name='scorebucket_global_points_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='scorebucket',
+            constraint=models.UniqueConstraint(condition=models.Q(('game__isnull', False)), fields=('game', 'points'), name='scorebucket_game_points_uniq'),
+        ),
+        migrations.RunPython(populate_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.0 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapp', '0012_leaderboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.IntegerField(default=0)),
+                ('modified', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.0 on 2026-10-18 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapp', '0013_content_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rank',
+            index=models.Index(fields=['user', 'game'], name='rank_user_game_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scorebucket',
+            index=models.Index(fields=['game', 'points'], name='scorebucket_game_points_idx'),
+        ),
+    ]
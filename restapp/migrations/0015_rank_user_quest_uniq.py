@@ -0,0 +1,56 @@
+# Generated by Django 4.0 on 2026-10-18 03:05
+
+from django.db import migrations, models
+
+
+def dedupe_ranks(apps, schema_editor):
+    Rank = apps.get_model('restapp', 'Rank')
+    UserScore = apps.get_model('restapp', 'UserScore')
+    UserGameScore = apps.get_model('restapp', 'UserGameScore')
+    ScoreBucket = apps.get_model('restapp', 'ScoreBucket')
+
+    # Keep the first answer per user and question, in a single DELETE
+    first = Rank.objects.order_by().values('user_id', 'quest_id').annotate(first_id=models.Min('id'))
+    deleted, _ = Rank.objects.exclude(id__in=first.values('first_id')).delete()
+    if not deleted:
+        return
+
+    totals = {
+        'sum_points': models.Sum('points'),
+        'total_answers': models.Count('id'),
+        'correct_answers': models.Count('id', filter=~models.Q(points=0))
+    }
+    ScoreBucket.objects.all().delete()
+    UserGameScore.objects.all().delete()
+    UserScore.objects.all().delete()
+    UserScore.objects.bulk_create(
+        UserScore(points=row.pop('sum_points'), **row)
+        for row in Rank.objects.order_by().values('user_id').annotate(**totals)
+    )
+    UserGameScore.objects.bulk_create(
+        UserGameScore(points=row.pop('sum_points'), **row)
+        for row in Rank.objects.order_by().values('user_id', 'game_id').annotate(**totals)
+    )
+    ScoreBucket.objects.bulk_create(
+        ScoreBucket(**row)
+        for row in UserScore.objects.order_by().values('points').annotate(users=models.Count('user_id'))
+    )
+    ScoreBucket.objects.bulk_create(
+        ScoreBucket(**row)
+        for row in UserGameScore.objects.order_by().values('game_id', 'points').annotate(users=models.Count('id'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapp', '0014_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_ranks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='rank',
+            constraint=models.UniqueConstraint(fields=('user', 'quest'), name='rank_user_quest_uniq'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.0 on 2026-10-18 03:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('restapp', '0015_rank_user_quest_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameSession',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('order', models.BinaryField()),
+                ('position', models.IntegerField(default=0)),
+                ('created', models.DateTimeField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='restapp.game')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.user')),
+            ],
+        ),
+    ]
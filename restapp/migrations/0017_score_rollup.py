@@ -0,0 +1,45 @@
+# Generated by Django 4.0 on 2026-10-18 03:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('restapp', '0016_game_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rank',
+            name='answered',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.CreateModel(
+            name='ScoreRollup',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('start', models.DateTimeField()),
+                ('points', models.IntegerField(default=0)),
+                ('total_answers', models.IntegerField(default=0)),
+                ('correct_answers', models.IntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='restapp.game')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.user')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='scorerollup',
+            index=models.Index(fields=['period', 'start'], name='scorerollup_period_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scorerollup',
+            index=models.Index(fields=['period', 'game', 'start'], name='scorerollup_game_start_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='scorerollup',
+            constraint=models.UniqueConstraint(fields=('period', 'user', 'game', 'start'), name='scorerollup_bucket_uniq'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.0 on 2026-10-18 03:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def index_existing_users(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    UserSearchKey = apps.get_model('restapp', 'UserSearchKey')
+
+    # Lowercased in Python like `directory.search_key`, SQLite's LOWER() only folds ASCII
+    UserSearchKey.objects.bulk_create(
+        (
+            UserSearchKey(user_id=user_id, username=username.lower(), email=email.lower())
+            for user_id, username, email in User.objects.values_list('id', 'username', 'email').iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('restapp', '0017_score_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchKey',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_key', serialize=False, to='auth.user')),
+                ('username', models.TextField()),
+                ('email', models.TextField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='usersearchkey',
+            index=models.Index(fields=['username'], name='usersearchkey_username_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersearchkey',
+            index=models.Index(fields=['email'], name='usersearchkey_email_idx'),
+        ),
+        migrations.RunPython(index_existing_users, migrations.RunPython.noop),
+    ]
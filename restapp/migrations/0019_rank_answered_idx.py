@@ -0,0 +1,17 @@
+# Generated by Django 4.0 on 2026-10-18 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapp', '0018_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rank',
+            index=models.Index(fields=['answered'], name='rank_answered_idx'),
+        ),
+    ]
@@ -40,3 +40,156 @@ class Rank(models.Model):
     game = models.ForeignKey(Game, on_delete=models.DO_NOTHING)
     quest = models.ForeignKey(Question, on_delete=models.DO_NOTHING)
     points = models.IntegerField(default=0)
+    # Null for answers recorded before answers were timestamped
+    answered = models.DateTimeField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'quest'], name='rank_user_quest_uniq')
+        ]
+        indexes = [
+            models.Index(fields=['user', 'game'], name='rank_user_game_idx'),
+            # Windowed leaderboards read the answers at their edges
+            models.Index(fields=['answered'], name='rank_answered_idx')
+        ]
+
+
+class UserScore(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    points = models.IntegerField(default=0)
+    total_answers = models.IntegerField(default=0)
+    correct_answers = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-points', 'user'], name='userscore_points_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.points}"
+
+
+class UserGameScore(models.Model):
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    points = models.IntegerField(default=0)
+    total_answers = models.IntegerField(default=0)
+    correct_answers = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'game'], name='usergamescore_user_game_uniq')
+        ]
+        indexes = [
+            models.Index(fields=['game', '-points', 'user'], name='usergamescore_points_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}/{self.game_id}: {self.points}"
+
+
+class ScoreBucket(models.Model):
+    """Number of users holding a given score, globally (game is null) or per game"""
+
+    id = models.AutoField(primary_key=True)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, null=True)
+    points = models.IntegerField()
+    users = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['points'], condition=models.Q(game__isnull=True),
+                name='scorebucket_global_points_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=['game', 'points'], condition=models.Q(game__isnull=False),
+                name='scorebucket_game_points_uniq'
+            )
+        ]
+        indexes = [
+            # Serves the range scans of both the global (game is null) and per game histograms
+            models.Index(fields=['game', 'points'], name='scorebucket_game_points_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.game_id or 'global'}: {self.points} x {self.users}"
+
+
+class ScoreRollup(models.Model):
+    """A user's points and answers in one game during one hour, day or week starting at `start` (UTC)"""
+
+    PERIODS = [('hour', 'Hour'), ('day', 'Day'), ('week', 'Week')]
+
+    id = models.AutoField(primary_key=True)
+    period = models.CharField(max_length=4, choices=PERIODS)
+    start = models.DateTimeField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    points = models.IntegerField(default=0)
+    total_answers = models.IntegerField(default=0)
+    correct_answers = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'user', 'game', 'start'], name='scorerollup_bucket_uniq')
+        ]
+        indexes = [
+            models.Index(fields=['period', 'start'], name='scorerollup_period_start_idx'),
+            models.Index(fields=['period', 'game', 'start'], name='scorerollup_game_start_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}/{self.game_id} {self.period} {self.start:%Y-%m-%d %H:%M}: {self.points}"
+
+
+class UserSearchKey(models.Model):
+    """A user's username and email lowercased in Python, for the directory's case-insensitive prefix search.
+
+    auth_user belongs to django.contrib.auth, so the indexed copies live in
+    this table. `restapp.signals` keeps it in step with saved users, code
+    inserting users with `bulk_create` calls `directory.index_users`.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='search_key')
+    username = models.TextField()
+    email = models.TextField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['username'], name='usersearchkey_username_idx'),
+            models.Index(fields=['email'], name='usersearchkey_email_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.username} {self.email}"
+
+
+class ContentVersion(models.Model):
+    """Counter bumped on every write to a piece of catalogue content, e.g. `game:4`"""
+
+    key = models.CharField(max_length=50, primary_key=True)
+    version = models.IntegerField(default=0)
+    modified = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+
+class GameSession(models.Model):
+    """A user's pass through a game's questions in an order fixed when the session starts.
+
+    `order` packs the question ids as unsigned 32-bit integers, so the
+    question at `position` is read without decoding the rest.
+    """
+
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    order = models.BinaryField()
+    position = models.IntegerField(default=0)
+    created = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user_id}/{self.game_id} at {self.position}"
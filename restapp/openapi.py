@@ -0,0 +1,64 @@
+import threading
+from rest_framework.renderers import OpenAPIRenderer, JSONOpenAPIRenderer
+from rest_framework.schemas.openapi import SchemaGenerator
+
+
+class SchemaDocument(dict):
+    """OpenAPI document holding its renderings by renderer class"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rendered = {}
+
+
+class CachedSchemaGenerator(SchemaGenerator):
+    """OpenAPI generator that builds its document once per process.
+
+    A non-public document leaves out the views the requesting user may not
+    call. The views only use IsAuthenticated and AllowAny, so the document
+    depends only on whether the user is signed in, and one is kept per case.
+    URLs are fixed for the life of a process, so nothing invalidates them.
+    Documents are `SchemaDocument`s, the renderers below render each once.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def get_schema(self, request=None, public=False):
+        signed_in = public or request is None or request.user.is_authenticated
+        document = self._documents.get(signed_in)
+        if document is None:
+            with self._lock:
+                document = self._documents.get(signed_in)
+                if document is None:
+                    document = super().get_schema(request, public)
+                    if document is not None:
+                        document = self._documents[signed_in] = SchemaDocument(document)
+        return document
+
+
+class _RenderOnce:
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, SchemaDocument):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        content = data.rendered.get(type(self))
+        if content is None:
+            # YAML would tag the dict subclass as a Python object
+            content = data.rendered[type(self)] = super().render(dict(data), accepted_media_type, renderer_context)
+        return content
+
+
+class CachedOpenAPIRenderer(_RenderOnce, OpenAPIRenderer):
+    pass
+
+
+class CachedJSONOpenAPIRenderer(_RenderOnce, JSONOpenAPIRenderer):
+    pass
+
+
+# Renderers of the schema view, the browsable API renderer comes after them
+SCHEMA_RENDERERS = (CachedOpenAPIRenderer, CachedJSONOpenAPIRenderer)
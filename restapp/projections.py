@@ -0,0 +1,89 @@
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FAST_READS = getattr(settings, 'FAST_READS', True)
+
+# Serializer fields whose representation of a model field value is the value itself
+PLAIN_FIELDS = (serializers.IntegerField, serializers.CharField, serializers.BooleanField)
+
+
+class Projection:
+    """`values_list()` sources for the keys a serializer outputs, in its field order"""
+
+    def __init__(self, keys, sources):
+        self.keys = keys
+        self.sources = sources
+
+    def rows(self, queryset):
+        keys = self.keys
+        return [dict(zip(keys, row)) for row in queryset.values_list(*self.sources)]
+
+    def chunks(self, queryset, chunk_size):
+        keys = self.keys
+        rows = queryset.values_list(*self.sources).iterator(chunk_size=chunk_size)
+        chunk = []
+        for row in rows:
+            chunk.append(dict(zip(keys, row)))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+@lru_cache(maxsize=None)
+def projection_of(serializer_class):
+    """Projection of a ModelSerializer made of plain and primary key fields, None for any other"""
+
+    meta = getattr(serializer_class, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    if model is None:
+        return None
+
+    keys, sources = [], []
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if model_field.is_relation:
+            # Rendered as the related primary key, which is the column itself
+            if not isinstance(field, serializers.PrimaryKeyRelatedField) or not model_field.concrete:
+                return None
+            if model_field.many_to_many or model_field.one_to_many:
+                return None
+        elif type(field) not in PLAIN_FIELDS:
+            return None
+        keys.append(name)
+        sources.append(model_field.attname)
+
+    return Projection(tuple(keys), tuple(sources))
+
+
+def serialize(queryset, serializer_class):
+    """The serializer's `many=True` data for the queryset, from plain rows when it can be projected"""
+
+    projection = projection_of(serializer_class) if FAST_READS else None
+    if projection is None:
+        return serializer_class(queryset, many=True).data
+    return projection.rows(queryset)
+
+
+def serialize_chunks(queryset, serializer_class, chunk_size):
+    """`serialize` for the queryset in lists of at most `chunk_size` rows, reading it with `iterator()`"""
+
+    projection = projection_of(serializer_class) if FAST_READS else None
+    if projection is not None:
+        yield from projection.chunks(queryset, chunk_size)
+        return
+
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = [row for _, row in zip(range(chunk_size), rows)]
+        if not chunk:
+            return
+        yield serializer_class(chunk, many=True).data
@@ -0,0 +1,171 @@
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import UserManager
+from django.db import transaction
+from django.db.utils import IntegrityError
+from .imports import csv_bool, json_items
+from .models import User
+from . import directory, schemas
+
+PROVISION_CHUNK_SIZE = getattr(settings, 'PROVISION_CHUNK_SIZE', 500)
+PROVISION_FORMATS = ('json', 'csv')
+
+# ManageUsers.post rules, the passwords are hashed afterwards in the hashing pool
+user_schema = schemas.user_create.copy(hash_passwords=False)
+
+
+def read_users(stream, input_format):
+    """Yield user payloads from a JSON list (or {"users": [...]}) or a CSV with a header, one at a time"""
+
+    if input_format == 'csv':
+        for row in csv.DictReader(stream):
+            if 'is_staff' in row:
+                row['is_staff'] = csv_bool(row['is_staff'])
+            yield {field: value for field, value in row.items() if value != ''}
+        return
+
+    yield from json_items(stream, 'users')
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Threads hashing passwords, shared by every request and command of the process
+PROVISION_HASH_WORKERS = getattr(settings, 'PROVISION_HASH_WORKERS', None) or available_cores()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def hashing_pool():
+    """The process's thread pool of PROVISION_HASH_WORKERS threads, started on first use.
+
+    The PBKDF2 hasher spends its time in `hashlib.pbkdf2_hmac`, which
+    releases the GIL, so threads hash on every core without the start-up
+    cost of worker processes. Concurrent provisioning calls queue on the
+    same threads instead of each starting its own pool.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=PROVISION_HASH_WORKERS, thread_name_prefix='hash-passwords')
+    return _pool
+
+
+def hash_passwords(passwords, workers=None):
+    """`make_password` for each password, spread over at most `workers` threads of the hashing pool"""
+
+    workers = min(workers or PROVISION_HASH_WORKERS, PROVISION_HASH_WORKERS, len(passwords))
+    if workers <= 1:
+        return [make_password(password) for password in passwords]
+
+    size = -(-len(passwords) // workers)
+    chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+    return [hashed for chunk in hashing_pool().map(_hash_chunk, chunks) for hashed in chunk]
+
+
+def _hash_chunk(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def provision_users(rows, chunk_size=PROVISION_CHUNK_SIZE, workers=None):
+    """Create users in bulk, reporting per-row failures instead of aborting.
+
+    Rows are validated, their usernames normalized the way `create_user`
+    does and checked for duplicates in the batch and against existing
+    users, then hashed in the hashing pool and inserted with `bulk_create`
+    in chunks. A chunk that hits a concurrent duplicate is retried row by
+    row so only the offending rows fail.
+    """
+    started = time.perf_counter()
+    failures = []
+    valid = []
+    seen = set()
+
+    for index, row in enumerate(rows):
+        validated, errors = user_schema.check(row)
+        if not errors:
+            validated['username'] = User.normalize_username(validated['username'])
+        if not errors and validated['username'] in seen:
+            errors = ["username is duplicated in the batch"]
+        if errors:
+            failures.append(_failure(index, row, errors))
+            continue
+        seen.add(validated['username'])
+        valid.append((index, validated))
+
+    pending = []
+    for chunk in _chunks(valid, chunk_size):
+        existing = set(User.objects.filter(
+            username__in=[validated['username'] for _, validated in chunk]
+        ).values_list('username', flat=True))
+        for index, validated in chunk:
+            if validated['username'] in existing:
+                failures.append(_failure(index, validated, ["username already exists"]))
+            else:
+                pending.append((index, validated))
+
+    hashed = hash_passwords([validated['password'] for _, validated in pending], workers)
+
+    created = 0
+    for chunk in _chunks(list(zip(pending, hashed)), chunk_size):
+        users = [(index, _build_user(validated, password)) for (index, validated), password in chunk]
+        created += _insert(users, failures)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'created': created,
+        'failed': len(failures),
+        'failures': sorted(failures, key=lambda failure: failure['row']),
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round((created + len(failures)) / elapsed) if elapsed else created
+    }
+
+
+def _build_user(validated, password):
+    return User(**dict(
+        validated,
+        password=password,
+        email=UserManager.normalize_email(validated['email'])
+    ))
+
+
+def _insert(users, failures):
+    try:
+        with transaction.atomic():
+            directory.index_users(User.objects.bulk_create([user for _, user in users]))
+        return len(users)
+    except IntegrityError:
+        pass
+
+    created = 0
+    for index, user in users:
+        try:
+            with transaction.atomic():
+                user.save()
+            created += 1
+        except IntegrityError as exc:
+            failures.append(_failure(index, {'username': user.username}, [str(exc)]))
+    return created
+
+
+def _chunks(items, size):
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def _failure(index, row, errors):
+    username = row.get('username') if isinstance(row, dict) else None
+    return {'row': index, 'username': username, 'errors': errors}
@@ -0,0 +1,53 @@
+from hashlib import md5
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from .renderers import FastJSONRenderer
+
+RESPONSE_CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'responses')
+# Larger bodies are rendered per request rather than crowding out the rest of the cache
+RESPONSE_CACHE_MAX_BYTES = getattr(settings, 'RESPONSE_CACHE_MAX_BYTES', 1024 * 1024)
+
+CONTENT_TYPE = 'application/json'
+
+
+def cache_key(etag):
+    """Key of the body a GET renders at `etag`, which tells content versions and representations apart.
+
+    A write bumping the version makes the next request miss, and the stale
+    entry ages out by TTL or eviction.
+    """
+    digest = md5(etag.encode(), usedforsecurity=False).hexdigest()
+    return f'restapp:response:{digest}'
+
+
+def get(request, etag):
+    """HttpResponse with the cached body, None on a miss or for requests that are not cached"""
+
+    if not _cacheable(request):
+        return None
+    content = caches[RESPONSE_CACHE_ALIAS].get(cache_key(etag))
+    if content is None:
+        return None
+    return HttpResponse(content, content_type=CONTENT_TYPE)
+
+
+def store(request, etag, response):
+    """Render a 200 DRF Response and cache its body, returns the response to send"""
+
+    if not _cacheable(request) or response.status_code != 200 or getattr(response, 'streaming', False):
+        return response
+    if not hasattr(response, 'data'):
+        return response
+
+    content = FastJSONRenderer().render(response.data)
+    if len(content) <= RESPONSE_CACHE_MAX_BYTES:
+        caches[RESPONSE_CACHE_ALIAS].set(cache_key(etag), content)
+    return HttpResponse(content, content_type=CONTENT_TYPE)
+
+
+def _cacheable(request):
+    # The browsable API and other renderers get their own rendering, the
+    # async views take plain Django requests and only render JSON
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is None or renderer.format == 'json'
@@ -0,0 +1,254 @@
+from datetime import timedelta, timezone as dt_timezone
+from functools import reduce
+from itertools import islice
+from operator import or_
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from .models import Rank, ScoreRollup
+
+PERIODS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1)
+}
+# Hour rows older than this are folded into days, day rows older than ROLLUP_KEEP_DAYS into weeks
+ROLLUP_KEEP_HOURS = getattr(settings, 'ROLLUP_KEEP_HOURS', 48)
+ROLLUP_KEEP_DAYS = getattr(settings, 'ROLLUP_KEEP_DAYS', 35)
+ROLLUP_BATCH_SIZE = 1000
+
+WINDOW_LIMIT_DEFAULT = 10
+WINDOW_LIMIT_MAX = 100
+
+
+def bucket_start(moment, period):
+    """Start of the UTC hour, day or week (from Monday) holding `moment`"""
+
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if period == 'hour':
+        return moment
+    moment = moment.replace(hour=0)
+    if period == 'day':
+        return moment
+    return moment - timedelta(days=moment.weekday())
+
+
+def window_leaderboard(period='week', start=None, game_id=None, limit=WINDOW_LIMIT_DEFAULT, now=None,
+        end=None):
+    """Top `limit` users by points in [start, end).
+
+    Without `end` the window is the hour, day or week holding `start`, the
+    current one by default. Sums the rollup rows lying inside the window,
+    at most one per user, game and week, day or hour it spans. Parts of
+    the window only covered by rows reaching past its ends, such as the
+    minutes around an end not on the hour, or hours `compact` has folded
+    into days and weeks, are summed from the timestamped `Rank` rows.
+    """
+    if end is None:
+        window_start = bucket_start(start or now or timezone.now(), period)
+        window_end = window_start + PERIODS[period]
+    else:
+        period, window_start, window_end = None, start, end
+
+    straddled = _straddled(window_start, window_end)
+    if not straddled:
+        # Whole weeks, no row crosses the window's ends
+        top = _top(window_start, window_end, window_start, window_end, game_id, limit)
+    else:
+        with transaction.atomic():
+            # One snapshot, so `compact` can not fold rows between the queries
+            inner_start, inner_end = _rollup_span(window_start, window_end, straddled, game_id)
+            top = _top(window_start, window_end, inner_start, inner_end, game_id, limit)
+
+    return {
+        'period': period,
+        'start': window_start,
+        'end': window_end,
+        'game_id': game_id,
+        'top': top
+    }
+
+
+def _straddled(window_start, window_end):
+    """{(period, bucket start): window ends inside} of the buckets whose rows would cross an end of the window"""
+
+    straddled = {}
+    for moment in (window_start, window_end):
+        for period in PERIODS:
+            bucket = bucket_start(moment, period)
+            if bucket < moment:
+                straddled.setdefault((period, bucket), []).append(moment)
+    return straddled
+
+
+def _rollup_span(window_start, window_end, straddled, game_id):
+    """[start, end) of the window that rollup rows can be summed over, the rest is read from `Rank`.
+
+    A row holding an end of the window pushes that end of the span to its
+    own edge. Buckets nest, so no other row crosses the span's ends.
+    """
+    rows = ScoreRollup.objects.filter(
+        reduce(or_, (Q(period=period, start=bucket) for period, bucket in straddled))
+    )
+    if game_id is not None:
+        rows = rows.filter(game_id=game_id)
+
+    inner_start, inner_end = window_start, window_end
+    for period, bucket in rows.order_by().values_list('period', 'start').distinct():
+        for moment in straddled[(period, bucket)]:
+            if moment == window_start:
+                inner_start = max(inner_start, bucket + PERIODS[period])
+            else:
+                inner_end = min(inner_end, bucket)
+    return inner_start, inner_end
+
+
+def _top(window_start, window_end, inner_start, inner_end, game_id, limit):
+    """Top rows summing the rollups inside [inner_start, inner_end) and the answers in the rest of the window"""
+
+    if inner_start >= inner_end:
+        inner_start = inner_end = window_end
+    edges = (
+        Q(answered__gte=window_start, answered__lt=inner_start)
+        | Q(answered__gte=inner_end, answered__lt=window_end)
+    )
+
+    totals, names = {}, {}
+    if inner_start > window_start or inner_end < window_end:
+        answers = Rank.objects.filter(edges)
+        if game_id is not None:
+            answers = answers.filter(game_id=game_id)
+        for row in answers.order_by().values('user_id', 'user__username').annotate(total=Sum('points')):
+            totals[row['user_id']] = row['total']
+            names[row['user_id']] = row['user__username']
+
+    if inner_start < inner_end:
+        rollups = ScoreRollup.objects.filter(_inside(inner_start, inner_end))
+        if game_id is not None:
+            rollups = rollups.filter(game_id=game_id)
+        by_user = (
+            rollups.order_by().values('user_id', 'user__username')
+            .annotate(total=Sum('points')).order_by('-total', 'user_id')
+        )
+        # Users without edge answers rank by their rollups alone, so the first
+        # `limit` of them and the users with edge answers hold the top
+        rows = list(by_user[:limit + len(totals)])
+        if totals:
+            rows += by_user.filter(user_id__in=list(totals))
+        edge_totals = dict(totals)
+        for row in rows:
+            totals[row['user_id']] = row['total'] + edge_totals.get(row['user_id'], 0)
+            names[row['user_id']] = row['user__username']
+
+    top = sorted(totals, key=lambda user_id: (-totals[user_id], user_id))[:limit]
+    return [{'user_id': user_id, 'username': names[user_id], 'points': totals[user_id]} for user_id in top]
+
+
+def _inside(window_start, window_end):
+    """Rows of any period starting and ending within [window_start, window_end)"""
+
+    inside = Q(pk__in=[])
+    for period, length in PERIODS.items():
+        if length <= window_end - window_start:
+            inside |= Q(period=period, start__gte=window_start, start__lte=window_end - length)
+    return inside
+
+
+def compact(now=None, keep_hours=ROLLUP_KEEP_HOURS, keep_days=ROLLUP_KEEP_DAYS):
+    """Fold hour rows into day rows and day rows into week rows once they are old enough.
+
+    Only whole days and weeks are folded, so every row keeps lying inside
+    its coarser bucket. Returns the number of (hour, day) rows folded.
+    """
+    now = now or timezone.now()
+    hours = _fold('hour', 'day', bucket_start(now - timedelta(hours=keep_hours), 'day'))
+    days = _fold('day', 'week', bucket_start(now - timedelta(days=keep_days), 'week'))
+    return hours, days
+
+
+def _fold(fine, coarse, before):
+    rows = ScoreRollup.objects.filter(period=fine, start__lt=before)
+
+    with transaction.atomic():
+        # Read in full before writing, SQLite does not isolate a fetch from writes to its table
+        merged = list(
+            rows.order_by()
+            .annotate(bucket=Trunc('start', coarse, tzinfo=dt_timezone.utc))
+            .values('user_id', 'game_id', 'bucket')
+            .annotate(
+                sum_points=Sum('points'), sum_answers=Sum('total_answers'), sum_correct=Sum('correct_answers')
+            )
+        )
+        for start in range(0, len(merged), ROLLUP_BATCH_SIZE):
+            _add(coarse, merged[start:start + ROLLUP_BATCH_SIZE])
+        folded, _ = rows.delete()
+
+    return folded
+
+
+def _add(period, totals):
+    """Add summed totals to the `period` rows of their user, game and bucket, creating missing ones"""
+
+    existing = {
+        (rollup.user_id, rollup.game_id, rollup.start): rollup
+        for rollup in ScoreRollup.objects.filter(
+            period=period,
+            start__in={row['bucket'] for row in totals},
+            user_id__in={row['user_id'] for row in totals}
+        )
+    }
+
+    updated, created = [], []
+    for row in totals:
+        rollup = existing.get((row['user_id'], row['game_id'], row['bucket']))
+        if rollup is None:
+            rollup = ScoreRollup(
+                period=period, start=row['bucket'], user_id=row['user_id'], game_id=row['game_id']
+            )
+            created.append(rollup)
+        else:
+            updated.append(rollup)
+        rollup.points += row['sum_points']
+        rollup.total_answers += row['sum_answers']
+        rollup.correct_answers += row['sum_correct']
+
+    ScoreRollup.objects.bulk_update(updated, ['points', 'total_answers', 'correct_answers'])
+    ScoreRollup.objects.bulk_create(created)
+
+
+def rebuild(now=None):
+    """Recompute the rollups from timestamped `Rank` rows, then compact them.
+
+    Returns the number of hour rows written before compaction.
+    """
+    hours = (
+        Rank.objects.filter(answered__isnull=False).order_by()
+        .annotate(bucket=Trunc('answered', 'hour', tzinfo=dt_timezone.utc))
+        .values('user_id', 'game_id', 'bucket')
+        .annotate(
+            sum_points=Sum('points'), sum_answers=Count('id'), sum_correct=Count('id', filter=~Q(points=0))
+        )
+        .iterator()
+    )
+
+    written = 0
+    with transaction.atomic():
+        ScoreRollup.objects.all().delete()
+        while True:
+            chunk = list(islice(hours, ROLLUP_BATCH_SIZE))
+            if not chunk:
+                break
+            ScoreRollup.objects.bulk_create(
+                ScoreRollup(
+                    period='hour', start=row['bucket'], user_id=row['user_id'], game_id=row['game_id'],
+                    points=row['sum_points'], total_answers=row['sum_answers'],
+                    correct_answers=row['sum_correct']
+                )
+                for row in chunk
+            )
+            written += len(chunk)
+        compact(now)
+
+    return written
@@ -0,0 +1,169 @@
+import random
+import time
+from asyncio import iscoroutinefunction
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+READ_REPLICAS = list(getattr(settings, 'READ_REPLICAS', []))
+REPLICA_STICKY_SECONDS = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_jwt = JWTAuthentication()
+
+_routing = ContextVar('restapp_routing', default=None)
+
+
+class Routing:
+    """Database the current request reads from, None for the primary"""
+
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+class ReplicaRouter:
+    """Send the reads of safe requests to a read replica, everything else to `default`.
+
+    `replica_middleware` picks the replica per request. Outside a request,
+    inside a transaction and after the request wrote anything, reads stay
+    on the primary. Replicas get their schema by replication, never by
+    `migrate`.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or routing.replica is None:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+            routing.replica = None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in READ_REPLICAS
+
+
+@sync_and_async_middleware
+def replica_middleware(get_response):
+    """Route the request's reads and pin a user to the primary for a while after they write.
+
+    A request that wrote stores the time in the `default` cache under the
+    token's user, and that user's requests read from the primary for
+    REPLICA_STICKY_SECONDS, so they see their own writes on any client
+    while the replicas catch up. Workers see each other's pins only when
+    `default` is a shared cache (QUIZ_CACHE). Anonymous requests only get
+    read-your-writes within the request. A streamed body keeps the
+    request's routing until the stream closes.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            user_id = _user_id(request)
+            routing = Routing(_replica_for(request, user_id))
+            token = _routing.set(routing)
+            try:
+                response = await get_response(request)
+            finally:
+                _routing.reset(token)
+            return _finish(response, routing, user_id)
+
+    else:
+        def middleware(request):
+            user_id = _user_id(request)
+            routing = Routing(_replica_for(request, user_id))
+            token = _routing.set(routing)
+            try:
+                response = get_response(request)
+            finally:
+                _routing.reset(token)
+            return _finish(response, routing, user_id)
+
+    return middleware
+
+
+def _user_id(request):
+    """User id of the request's valid access token, None without one or without replicas"""
+
+    if not READ_REPLICAS:
+        return None
+
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return None
+
+    try:
+        return _jwt.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except InvalidToken:
+        return None
+
+
+def _replica_for(request, user_id):
+    if not READ_REPLICAS or request.method not in SAFE_METHODS:
+        return None
+    if _pinned(user_id):
+        return None
+    return random.choice(READ_REPLICAS)
+
+
+def _pin_key(user_id):
+    return f'restapp:primary:{user_id}'
+
+
+def _pinned(user_id):
+    if user_id is None:
+        return False
+
+    wrote = cache.get(_pin_key(user_id))
+    return wrote is not None and time.time() - wrote < REPLICA_STICKY_SECONDS
+
+
+def _finish(response, routing, user_id):
+    if response.streaming:
+        response.streaming_content = _routed(response.streaming_content, routing, user_id)
+    else:
+        _pin_writer(routing, user_id)
+    return response
+
+
+def _routed(chunks, routing, user_id):
+    """Produce each chunk of a streamed body under the request's routing"""
+
+    chunks = iter(chunks)
+    try:
+        while True:
+            # Only around next(), the server may iterate in another context between chunks
+            token = _routing.set(routing)
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                _routing.reset(token)
+            yield chunk
+    finally:
+        _pin_writer(routing, user_id)
+
+
+def _pin_writer(routing, user_id):
+    if not routing.wrote or user_id is None:
+        return
+
+    cache.set(_pin_key(user_id), time.time(), REPLICA_STICKY_SECONDS)
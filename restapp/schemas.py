@@ -0,0 +1,53 @@
+from .validators import Schema
+
+# Payload rules shared by the CRUD views, the bulk import and user provisioning
+
+game_create = Schema().map_field('name', str, True, 2, 50)
+
+game_update = Schema().map_field('name', str, False, 2, 50)
+
+question_create = (
+    Schema()
+    .map_field('question', str, True, 1, 250)
+    .map_field('points', int, True, allowed=[5, 10, 15])
+)
+
+question_update = (
+    Schema()
+    .map_field('question', str, False, 1, 250)
+    .map_field('points', int, False, allowed=[5, 10, 15])
+    .map_field('game_id', int, False)
+)
+
+answer_create = (
+    Schema()
+    .map_field('variant', str, True, 1, 80)
+    .map_field('status', bool, True)
+)
+
+answer_update = (
+    Schema()
+    .map_field('quest', int, False)
+    .map_field('variant', str, False, 1, 80)
+    .map_field('status', bool, False)
+)
+
+user_create = (
+    Schema()
+    .map_field('username', str, True, 8, 15)
+    .map_field('password', str, True, 8, 20)
+    .map_field('email', 'email', True)
+    .map_field('first_name', str, False, 2, 30)
+    .map_field('last_name', str, False)
+    .map_field('is_staff', bool, False)
+)
+
+user_update = (
+    Schema()
+    .map_field('username', str, False, 8, 15)
+    .map_field('password', str, False, 8, 20)
+    .map_field('email', 'email', False)
+    .map_field('first_name', str, False, 2, 30)
+    .map_field('last_name', str, False)
+    .map_field('is_staff', bool, False)
+)
@@ -0,0 +1,293 @@
+from itertools import islice
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.utils import IntegrityError
+from django.utils import timezone
+from .models import Rank, UserScore, UserGameScore, ScoreBucket, ScoreRollup
+from .rollups import bucket_start
+from .answer_keys import answer_keys
+from .writebehind import WriteBehindBuffer, DURABILITY_BUFFERED
+
+REBUILD_BATCH_SIZE = 1000
+# Rows per INSERT, 5 parameters each stays under SQLite's 999 variables
+RANK_INSERT_BATCH = 150
+
+TOTALS = {
+    'sum_points': Sum('points'),
+    'total_answers': Count('id'),
+    'correct_answers': Count('id', filter=~Q(points=0))
+}
+
+
+def play_choice(user_id, choiceid):
+    """Record the user's choice and return the Play response body, None if no such choice"""
+
+    answer_key = answer_keys.get(choiceid)
+    if answer_key is None:
+        return None
+
+    return play(user_id, answer_key)
+
+
+def play(user_id, answer_key):
+    """Record the choice behind `answer_key` and return the Play response body"""
+
+    points = choice_points(answer_key)
+    recorded = submit_answers(user_id, [(answer_key.game_id, answer_key.questid, points)])
+
+    return play_result(answer_key, recorded.get(answer_key.questid, points))
+
+
+def play_result(answer_key, points):
+    """Play response body for a choice, `points` being what the user's answer to the question scored.
+
+    When the question was answered before, the first answer stands and
+    its result is returned again.
+    """
+    return {
+        "answer_status": answer_key.status if points == choice_points(answer_key) else bool(points),
+        "points": points,
+        "correct_answer_id": answer_key.correct_choiceid,
+        "correct_answer": answer_key.correct_variant
+    }
+
+
+def choice_points(answer_key):
+    return answer_key.points if answer_key.status else 0
+
+
+def user_points(user_id):
+    points, pending = _read_with_pending(
+        ('user', user_id),
+        lambda: UserScore.objects.filter(user_id=user_id).values_list('points', flat=True).first()
+    )
+    return (points or 0) + pending[0]
+
+
+def user_counters(user_id, game_id=None):
+    """{'total_answers', 'correct_answers'} for the user, overall or for one game"""
+
+    if game_id:
+        key = ('game', user_id, int(game_id))
+        scores = UserGameScore.objects.filter(game_id=game_id, user_id=user_id)
+    else:
+        key = ('user', user_id)
+        scores = UserScore.objects.filter(user_id=user_id)
+
+    counters, pending = _read_with_pending(
+        key, lambda: scores.values('total_answers', 'correct_answers').first()
+    )
+    counters = counters or {'total_answers': 0, 'correct_answers': 0}
+    return {
+        'total_answers': counters['total_answers'] + pending[1],
+        'correct_answers': counters['correct_answers'] + pending[2]
+    }
+
+
+def submit_answers(user_id, answers):
+    """Record (game_id, quest_id, points) answers, through the write-behind buffer when enabled.
+
+    Returns {quest_id: points} of the questions the user had answered
+    before, as `record_answers`. The buffer drops repeated answers when it
+    flushes, so with it this is always empty.
+    """
+    if write_behind is not None:
+        write_behind.submit(user_id, answers)
+        return {}
+    return record_answers(user_id, answers)
+
+
+def record_answers(user_id, answers):
+    """Insert `Rank` rows for (game_id, quest_id, points) answers and update aggregates.
+
+    A user answers a question once, answers to questions already answered
+    are skipped. Returns {quest_id: points first recorded} for those, read
+    with one query and only when there are any.
+    """
+    inserted = {quest_id for _, _, quest_id, _ in record_many([(user_id, answers)])}
+    repeated = {quest_id for _, quest_id, _ in answers} - inserted
+    if not repeated:
+        return {}
+    return dict(
+        Rank.objects.filter(user_id=user_id, quest_id__in=repeated).values_list('quest_id', 'points')
+    )
+
+
+def record_many(submissions):
+    """`record_answers` for many (user_id, answers) submissions in one transaction.
+
+    Only the answers actually inserted count, the first answer to a
+    question wins. Their increments are merged per user and per user and
+    game, so each aggregate row, the current hour's rollup included, is
+    updated once however many answers it receives. Returns the inserted
+    (user_id, game_id, quest_id, points) rows.
+    """
+    rows = [
+        (user_id, game_id, quest_id, points)
+        for user_id, answers in submissions for game_id, quest_id, points in answers
+    ]
+    if not rows:
+        return []
+
+    answered = timezone.now()
+    hour = bucket_start(answered, 'hour')
+
+    with transaction.atomic():
+        inserted = _insert_ranks(rows, answered)
+
+        per_user = {}
+        per_game = {}
+        for user_id, game_id, quest_id, points in inserted:
+            for totals in (
+                per_user.setdefault(user_id, [0, 0, 0]),
+                per_game.setdefault((user_id, game_id), [0, 0, 0])
+            ):
+                totals[0] += points
+                totals[1] += 1
+                totals[2] += 1 if points else 0
+
+        for user_id, totals in per_user.items():
+            _bump(UserScore, {'user_id': user_id}, None, *totals)
+        for (user_id, game_id), totals in per_game.items():
+            _bump(UserGameScore, {'user_id': user_id, 'game_id': game_id}, game_id, *totals)
+            _upsert(
+                ScoreRollup, {'period': 'hour', 'start': hour, 'user_id': user_id, 'game_id': game_id},
+                points=totals[0], total_answers=totals[1], correct_answers=totals[2]
+            )
+
+    return inserted
+
+
+def _insert_ranks(rows, answered):
+    """Insert (user_id, game_id, quest_id, points) rows at time `answered`, skipping repeated answers.
+
+    An INSERT ... ON CONFLICT DO NOTHING RETURNING per RANK_INSERT_BATCH
+    rows, so the unique (user, quest) constraint decides and nothing is
+    read first. The ORM's ignore_conflicts cannot say which rows went in.
+    """
+    table = connection.ops.quote_name(Rank._meta.db_table)
+    answered = connection.ops.adapt_datetimefield_value(answered)
+    inserted = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), RANK_INSERT_BATCH):
+            batch = rows[start:start + RANK_INSERT_BATCH]
+            cursor.execute(
+                f'INSERT INTO {table} (user_id, game_id, quest_id, points, answered) VALUES '
+                + ', '.join(['(%s, %s, %s, %s, %s)'] * len(batch))
+                + ' ON CONFLICT (user_id, quest_id) DO NOTHING'
+                ' RETURNING user_id, game_id, quest_id, points',
+                [value for row in batch for value in (*row, answered)]
+            )
+            inserted.extend(cursor.fetchall())
+    return inserted
+
+
+def _read_with_pending(key, read):
+    if write_behind is None:
+        return read(), (0, 0, 0)
+    return write_behind.read_with_pending(key, read)
+
+
+def _bump(model, lookup, bucket_game_id, points, answers, correct):
+    created = _upsert(model, lookup, points=points, total_answers=answers, correct_answers=correct)
+    if created:
+        _upsert(ScoreBucket, {'game_id': bucket_game_id, 'points': points}, users=1)
+        return
+
+    if not points:
+        return
+
+    # The row is locked by the update above, so this reads our own increment
+    new_points = model.objects.filter(**lookup).values_list('points', flat=True).get()
+    ScoreBucket.objects.filter(
+        game_id=bucket_game_id, points=new_points - points
+    ).update(users=F('users') - 1)
+    _upsert(ScoreBucket, {'game_id': bucket_game_id, 'points': new_points}, users=1)
+
+
+def _upsert(model, lookup, **deltas):
+    """Increment `deltas` on the row matching `lookup`, creating it if missing.
+
+    Returns True when the row was created.
+    """
+    increments = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**increments):
+        return False
+
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another request created the row between our update and insert
+        model.objects.filter(**lookup).update(**increments)
+        return False
+
+    return True
+
+
+def drop_user_scores(user_id):
+    """Take a user about to be deleted out of the leaderboard histograms.
+
+    Their aggregate rows cascade away with them, the `ScoreBucket` counts
+    they were in would not.
+    """
+    held = [(None, points) for points in UserScore.objects.filter(user_id=user_id).values_list('points', flat=True)]
+    held += UserGameScore.objects.filter(user_id=user_id).values_list('game_id', 'points')
+
+    for game_id, points in held:
+        ScoreBucket.objects.filter(game_id=game_id, points=points).update(users=F('users') - 1)
+
+
+def rebuild(batch_size=REBUILD_BATCH_SIZE):
+    """Recompute every aggregate row from `Rank`, returns (users, user_games) counts"""
+
+    per_user = Rank.objects.order_by().values('user_id').annotate(**TOTALS)
+    per_game = Rank.objects.order_by().values('user_id', 'game_id').annotate(**TOTALS)
+
+    with transaction.atomic():
+        ScoreBucket.objects.all().delete()
+        UserGameScore.objects.all().delete()
+        UserScore.objects.all().delete()
+        users = _bulk_insert(UserScore, per_user.iterator(), batch_size)
+        user_games = _bulk_insert(UserGameScore, per_game.iterator(), batch_size)
+        rebuild_buckets(batch_size)
+
+    return users, user_games
+
+
+def rebuild_buckets(batch_size=REBUILD_BATCH_SIZE):
+    """Recompute the leaderboard score histograms from the user aggregates"""
+
+    global_buckets = UserScore.objects.order_by().values('points').annotate(users=Count('user_id'))
+    game_buckets = UserGameScore.objects.order_by().values('game_id', 'points').annotate(users=Count('id'))
+
+    with transaction.atomic():
+        ScoreBucket.objects.all().delete()
+        ScoreBucket.objects.bulk_create(
+            (ScoreBucket(**row) for row in global_buckets.iterator()), batch_size
+        )
+        ScoreBucket.objects.bulk_create(
+            (ScoreBucket(**row) for row in game_buckets.iterator()), batch_size
+        )
+
+
+def _bulk_insert(model, rows, batch_size):
+    inserted = 0
+    while True:
+        chunk = [
+            model(points=row.pop('sum_points'), **row) for row in islice(rows, batch_size)
+        ]
+        if not chunk:
+            return inserted
+        model.objects.bulk_create(chunk)
+        inserted += len(chunk)
+
+
+write_behind = WriteBehindBuffer(
+    record_many,
+    interval=getattr(settings, 'WRITE_BEHIND_FLUSH_MS', 5) / 1000,
+    batch_rows=getattr(settings, 'WRITE_BEHIND_BATCH_ROWS', 500),
+    max_queue=getattr(settings, 'WRITE_BEHIND_MAX_QUEUE', 10000),
+    durability=getattr(settings, 'WRITE_BEHIND_DURABILITY', DURABILITY_BUFFERED)
+) if getattr(settings, 'PLAY_WRITE_BEHIND', False) else None
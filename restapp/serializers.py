@@ -21,6 +21,8 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = '__all__'
+        # Never send password hashes back
+        extra_kwargs = {'password': {'write_only': True}}
 
 
 class AnswerSerializer(serializers.ModelSerializer):
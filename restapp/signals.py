@@ -0,0 +1,45 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import Game, Question, Answer, User
+from .answer_keys import answer_keys
+from .auth import forget_user
+from . import directory, scores, versions
+
+
+@receiver([post_save, post_delete], sender=Answer)
+def answer_changed(sender, instance, **kwargs):
+    answer_keys.invalidate_questions([instance.quest_id])
+    versions.bump_question_answers([instance.quest_id])
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    answer_keys.invalidate_questions([instance.questid])
+    versions.bump_games([instance.game_id])
+
+
+@receiver(post_delete, sender=Game)
+def game_deleted(sender, instance, **kwargs):
+    answer_keys.invalidate_games([instance.gameid])
+
+
+@receiver([post_save, post_delete], sender=Game)
+def game_changed(sender, instance, **kwargs):
+    versions.bump_games([instance.gameid])
+    versions.bump_game_list()
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'username', 'email'} & set(update_fields):
+        directory.update_search_key(instance)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    scores.drop_user_scores(instance.id)
@@ -1,3 +1,1811 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.hashers import check_password
+from django.contrib.auth.models import Group
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.db.utils import IntegrityError
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings, RequestFactory, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer, JSONOpenAPIRenderer
+from rest_framework.schemas.openapi import SchemaGenerator
+from rest_framework.test import APIClient
+from .answer_keys import answer_keys
+from .async_views import run_db
+from .auth import ClaimsTokenObtainPairSerializer, get_cached_user
+from .bundles import get_bundle
+from .exports import EXPORT_FIELDS
+from .loadtest import LoadRun, seed_world
+from .metrics import registry, SQL_QUERIES, SQL_SECONDS, RESPONSE_BYTES
+from .models import Game, Question, Answer, Rank, User, UserScore, UserGameScore, ScoreBucket, ScoreRollup
+from .pagination import MAX_PAGE_SIZE, encode_cursor, stream_json
+from .projections import projection_of
+from .renderers import FastJSONRenderer
+from .routers import ReplicaRouter, replica_middleware
+from .serializers import GameSerializer, QuestionSerializer, AnswerSerializer, UserSerializer
+from .validators import Schema, Validator
+from .views import AnswerCRUD, ManageUsers, QuestionCRUD, PROVISION_USERS_MAX
+from .writebehind import WriteBehindBuffer, DURABILITY_COMMIT
+from . import exports, scores, rollups, warmup, leaderboard, imports, provisioning, versions, response_cache
 
-# Create your tests here.
+
+USERS = 300
+GAMES = 9
+QUESTIONS_PER_GAME = 20
+ANSWERS_PER_QUESTION = 4
+ANSWERED_PER_USER = 40
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+# "SCAN restapp_rank" is a full table scan, "SCAN ... USING [COVERING] INDEX" walks an index
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+def create_admin():
+    return User.objects.create(
+        username='administrator', email='admin@example.com', password='!', is_superuser=True, is_staff=True
+    )
+
+
+def create_player(username='player0001'):
+    return User.objects.create(username=username, email=f'{username}@example.com', password='!')
+
+
+def client_for(user):
+    """APIClient sending a fresh access token of `user`"""
+
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {ClaimsTokenObtainPairSerializer.get_token(user).access_token}'
+    )
+    return client
+
+
+class PlayBatchTests(TestCase):
+
+    def setUp(self):
+        answer_keys.clear()
+        self.player = create_player()
+        self.game = Game.objects.create(name='Capitals')
+        self.quests = [
+            Question.objects.create(game=self.game, question=f'Question {n}', points=points)
+            for n, points in enumerate((5, 10))
+        ]
+        self.right = [Answer.objects.create(quest=quest, variant='Right', status=True) for quest in self.quests]
+        self.wrong = [Answer.objects.create(quest=quest, variant='Wrong', status=False) for quest in self.quests]
+        self.client = client_for(self.player)
+
+    def play(self, choiceids):
+        return self.client.post('/play/batch/', {'choiceids': choiceids}, format='json')
+
+    def test_results_follow_the_input_order(self):
+        response = self.play([self.wrong[1].choiceid, self.right[0].choiceid])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'points': 5,
+            'results': [
+                {
+                    'choiceid': self.wrong[1].choiceid, 'answer_status': False, 'points': 0,
+                    'correct_answer_id': self.right[1].choiceid, 'correct_answer': 'Right'
+                },
+                {
+                    'choiceid': self.right[0].choiceid, 'answer_status': True, 'points': 5,
+                    'correct_answer_id': self.right[0].choiceid, 'correct_answer': 'Right'
+                }
+            ]
+        })
+        self.assertEqual(
+            UserScore.objects.values_list('points', 'total_answers', 'correct_answers').get(user=self.player),
+            (5, 2, 1)
+        )
+        self.assertEqual(UserGameScore.objects.get(user=self.player, game=self.game).points, 5)
+
+    def test_unknown_choices_fail_alone(self):
+        response = self.play([0, self.right[1].choiceid])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['points'], 10)
+        self.assertEqual(response.json()['results'][0], {'choiceid': 0, 'details': 'Answer not found'})
+        self.assertEqual(list(Rank.objects.values_list('quest_id', 'points')), [(self.quests[1].questid, 10)])
+
+    def test_first_choice_per_question_is_played(self):
+        response = self.play([self.wrong[0].choiceid, self.right[0].choiceid, self.wrong[0].choiceid])
+
+        self.assertEqual(response.json()['points'], 0)
+        self.assertEqual([result['points'] for result in response.json()['results']], [0, 0, 0])
+        self.assertEqual(list(Rank.objects.values_list('quest_id', 'points')), [(self.quests[0].questid, 0)])
+
+        response = self.play([self.right[0].choiceid, self.right[1].choiceid])
+        self.assertEqual(response.json()['points'], 10)
+        self.assertEqual(UserScore.objects.get(user=self.player).points, 10)
+
+    def test_rejects_invalid_batches(self):
+        for choiceids in ([], ['1'], [1] * 201, 'x'):
+            with self.subTest(choiceids=str(choiceids)[:20]):
+                self.assertEqual(self.play(choiceids).status_code, 400)
+        self.assertFalse(Rank.objects.exists())
+
+
+class AnswerKeyCacheTests(TestCase):
+
+    def setUp(self):
+        answer_keys.clear()
+        self.admin = create_admin()
+        self.game = Game.objects.create(name='Capitals')
+        self.quest = Question.objects.create(game=self.game, question='Capital of France?', points=10)
+        self.right = Answer.objects.create(quest=self.quest, variant='Paris', status=True)
+        self.wrong = Answer.objects.create(quest=self.quest, variant='Lyon', status=False)
+        self.client = client_for(self.admin)
+
+    def key(self, answer):
+        return answer_keys.get(answer.choiceid)
+
+    def test_answer_edit_reaches_cached_keys(self):
+        self.assertEqual(self.key(self.wrong).correct_variant, 'Paris')
+
+        response = self.client.put(
+            f'/answers/?choiceid={self.right.choiceid}', {'variant': 'Paris, France'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.key(self.wrong).correct_variant, 'Paris, France')
+
+        self.client.put(f'/answers/?choiceid={self.wrong.choiceid}', {'status': True}, format='json')
+        self.assertEqual((self.key(self.wrong).status, self.key(self.right).status), (True, True))
+
+        result = self.client.post(f'/play/?choiceid={self.wrong.choiceid}').json()
+        self.assertEqual((result['answer_status'], result['points']), (True, 10))
+
+    def test_moving_an_answer_invalidates_both_questions(self):
+        other = Question.objects.create(game=self.game, question='Capital of Spain?', points=5)
+        self.key(self.wrong)
+        self.key(Answer.objects.create(quest=other, variant='Sevilla', status=False))
+
+        self.client.put(f'/answers/?choiceid={self.right.choiceid}', {'quest': other.questid}, format='json')
+        self.assertEqual((self.key(self.right).questid, self.key(self.right).points), (other.questid, 5))
+        self.assertIsNone(self.key(self.wrong).correct_choiceid)
+        self.assertEqual(self.key(self.right).correct_variant, 'Paris')
+
+    def test_answer_delete_reaches_cached_keys(self):
+        self.assertEqual(self.key(self.wrong).correct_choiceid, self.right.choiceid)
+
+        self.assertEqual(self.client.delete(f'/answers/?choiceid={self.right.choiceid}').status_code, 200)
+        self.assertIsNone(self.key(self.right))
+        self.assertEqual(self.key(self.wrong)[-2:], (None, None))
+        self.assertEqual(self.client.post(f'/play/?choiceid={self.right.choiceid}').status_code, 400)
+
+    def test_question_and_game_writes_reach_cached_keys(self):
+        self.key(self.wrong)
+        self.client.put(f'/quests/?questid={self.quest.questid}', {'points': 15}, format='json')
+        self.assertEqual(self.key(self.wrong).points, 15)
+
+        self.client.delete(f'/games/?gameid={self.game.gameid}')
+        self.assertIsNone(self.key(self.wrong))
+        self.assertEqual(answer_keys.stats()['size'], 0)
+
+    def test_keys_loaded_during_an_invalidation_are_not_stored(self):
+        load = answer_keys._load
+
+        def load_then_edit(choiceids):
+            loaded = load(choiceids)
+            Answer.objects.filter(choiceid=self.right.choiceid).update(variant='Paris, France')
+            answer_keys.invalidate_questions([self.quest.questid])
+            return loaded
+
+        with mock.patch.object(answer_keys, '_load', side_effect=load_then_edit):
+            self.assertEqual(self.key(self.wrong).correct_variant, 'Paris')
+        self.assertEqual(answer_keys.stats()['size'], 0)
+        self.assertEqual(self.key(self.wrong).correct_variant, 'Paris, France')
+
+    def after_ttl(self):
+        return mock.patch('restapp.answer_keys.time.monotonic', return_value=time.monotonic() + answer_keys.ttl)
+
+    def test_writes_of_other_workers_are_seen_after_the_ttl(self):
+        self.assertEqual(self.key(self.wrong).correct_variant, 'Paris')
+        # Another worker edits the answer, only the content version tells this one
+        Answer.objects.filter(choiceid=self.right.choiceid).update(variant='Paris, France')
+        versions.bump_games([self.game.gameid])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.key(self.wrong).correct_variant, 'Paris')
+        with self.after_ttl(), self.assertNumQueries(2):
+            self.assertEqual(self.key(self.wrong).correct_variant, 'Paris, France')
+
+    def test_unchanged_games_are_revalidated_in_one_query(self):
+        self.key(self.wrong)
+        with self.after_ttl():
+            with self.assertNumQueries(1):
+                self.assertEqual(self.key(self.wrong).correct_variant, 'Paris')
+            with self.assertNumQueries(0):
+                self.assertEqual(self.key(self.right).correct_variant, 'Paris')
+
+
+class ClaimsAuthTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = create_admin()
+        self.refresh = ClaimsTokenObtainPairSerializer.get_token(self.admin)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def test_signed_claims_authenticate_from_the_user_cache(self):
+        self.assertEqual(self.client.get('/points/').status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/points/').status_code, 200)
+
+    def test_demoted_admin_tokens_are_refused(self):
+        self.assertEqual(self.client.post('/games/', {'name': 'Quiz night'}, format='json').status_code, 200)
+
+        self.admin.is_superuser = False
+        self.admin.save()
+        response = self.client.post('/games/', {'name': 'Another night'}, format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_revoked')
+        self.assertFalse(Game.objects.filter(name='Another night').exists())
+
+        refreshed = APIClient().post('/api/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(refreshed.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refreshed.json()['access']}")
+        self.assertEqual(self.client.get('/points/').status_code, 200)
+        self.assertEqual(self.client.post('/games/', {'name': 'Another night'}, format='json').status_code, 401)
+
+    def test_inactive_and_deleted_users_are_refused(self):
+        self.admin.is_active = False
+        self.admin.save()
+        self.assertEqual(self.client.get('/points/').status_code, 401)
+
+        self.admin.delete()
+        self.assertEqual(self.client.get('/points/').status_code, 401)
+        self.assertEqual(self.client.post('/play/?choiceid=1').status_code, 401)
+        refreshed = APIClient().post('/api/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(refreshed.status_code, 401)
+
+
+class GameBundleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = create_admin()
+        self.game = Game.objects.create(name='Capitals')
+        self.quest = Question.objects.create(game=self.game, question='Capital of France?', points=10)
+        self.right = Answer.objects.create(quest=self.quest, variant='Paris', status=True)
+        self.wrong = Answer.objects.create(quest=self.quest, variant='Lyon', status=False)
+        self.client = client_for(self.admin)
+        self.client.get('/points/')
+
+    def bundle(self):
+        response = self.client.get(f'/games/bundle/?gameid={self.game.gameid}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_bundle_holds_the_game_without_answer_status(self):
+        self.assertEqual(self.bundle(), {
+            'gameid': self.game.gameid,
+            'name': 'Capitals',
+            'questions': [{
+                'questid': self.quest.questid,
+                'question': 'Capital of France?',
+                'points': 10,
+                'answers': [
+                    {'choiceid': self.right.choiceid, 'variant': 'Paris'},
+                    {'choiceid': self.wrong.choiceid, 'variant': 'Lyon'}
+                ]
+            }]
+        })
+        # The content version, then the cached bytes
+        with self.assertNumQueries(1):
+            self.bundle()
+
+    def test_edits_reach_the_cached_bundle(self):
+        self.bundle()
+        self.client.put(f'/quests/?questid={self.quest.questid}', {'points': 15}, format='json')
+        self.assertEqual(self.bundle()['questions'][0]['points'], 15)
+
+        self.client.put(f'/answers/?choiceid={self.wrong.choiceid}', {'variant': 'Marseille'}, format='json')
+        self.assertEqual(self.bundle()['questions'][0]['answers'][1]['variant'], 'Marseille')
+
+        self.wrong.delete()
+        self.assertEqual(len(self.bundle()['questions'][0]['answers']), 1)
+
+        Question.objects.create(game=self.game, question='Capital of Spain?', points=5)
+        self.assertEqual(len(self.bundle()['questions']), 2)
+
+    def test_unknown_and_invalid_games(self):
+        self.assertEqual(self.client.get('/games/bundle/?gameid=0').status_code, 404)
+        self.assertEqual(self.client.get('/games/bundle/').status_code, 400)
+        self.assertEqual(self.client.get('/games/bundle/?gameid=x').status_code, 400)
+
+
+class PaginationTests(TestCase):
+
+    def setUp(self):
+        self.games = [Game.objects.create(name=f'Game {n:02d}') for n in range(7)]
+        player = create_player()
+        self.client = client_for(player)
+        self.client.get('/points/')
+
+    def walk(self, page_size):
+        ids, cursor = [], ''
+        while True:
+            # The content version and one keyset page
+            with self.assertNumQueries(2):
+                page = self.client.get(f'/games/?page_size={page_size}&cursor={cursor}').json()
+            self.assertLessEqual(len(page['results']), page_size)
+            ids += [game['gameid'] for game in page['results']]
+            if page['next'] is None:
+                return ids
+            cursor = page['next']
+
+    def test_cursor_pages_cover_the_listing_once(self):
+        everything = [game['gameid'] for game in self.client.get('/games/').json()]
+        for page_size in (1, 3, 7, 100):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(page_size), everything)
+
+    def test_rows_written_behind_the_cursor_do_not_shift_pages(self):
+        first = self.client.get('/games/?page_size=3').json()
+        Game.objects.filter(gameid=self.games[0].gameid).delete()
+        Game.objects.create(name='Newest')
+        rest = self.client.get(f"/games/?page_size=100&cursor={first['next']}").json()
+        self.assertEqual(
+            [game['name'] for game in rest['results']], [f'Game {n:02d}' for n in range(3, 7)] + ['Newest']
+        )
+
+    def test_invalid_page_parameters(self):
+        for query, error in (
+            ('page_size=x', "page_size must be integer value"),
+            ('page_size=0', f"page_size must be in [1, {MAX_PAGE_SIZE}]"),
+            (f'page_size={MAX_PAGE_SIZE + 1}', f"page_size must be in [1, {MAX_PAGE_SIZE}]"),
+            ('cursor=bad', "Invalid cursor"),
+            (f"cursor={encode_cursor('x')}", "Invalid cursor")
+        ):
+            with self.subTest(query=query):
+                response = self.client.get(f'/games/?{query}')
+                self.assertEqual((response.status_code, response.json()), (400, [error]))
+
+    def test_stream_writes_the_array_in_chunks(self):
+        expected = self.client.get('/games/').content
+        for chunk_size in (1, 3, 7, 100):
+            with self.subTest(chunk_size=chunk_size):
+                chunks = list(stream_json(Game.objects.order_by('pk'), GameSerializer, chunk_size))
+                self.assertEqual(b''.join(chunks), expected)
+                self.assertEqual(len(chunks), 2 + -(-len(self.games) // chunk_size))
+
+        response = self.client.get('/games/?stream=1')
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), expected)
+        self.assertEqual(b''.join(stream_json(Game.objects.none(), GameSerializer)), b'[]')
+
+
+class RankExportTests(TestCase):
+
+    def setUp(self):
+        self.admin = create_admin()
+        self.players = [
+            User.objects.create(username=f'player{n:04d}', email=f'p{n}@example.com') for n in range(2)
+        ]
+        game = Game.objects.create(name='Capitals')
+        quests = [Question.objects.create(game=game, question=f'Question {n}', points=10) for n in range(4)]
+        answered = datetime(2026, 10, 14, 15, 30, tzinfo=dt_timezone.utc)
+        Rank.objects.bulk_create(
+            Rank(user=player, game=game, quest=quest, points=10 * (n % 2), answered=answered)
+            for player in self.players for n, quest in enumerate(quests)
+        )
+        self.client = client_for(self.admin)
+
+    def export(self, query=''):
+        response = self.client.get(f'/export/ranks/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def rows(self, ranks=None):
+        ranks = Rank.objects.all() if ranks is None else ranks
+        return [[str(value) for value in row] for row in ranks.order_by('id').values_list(*EXPORT_FIELDS)]
+
+    def test_ndjson(self):
+        records = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(
+            [[str(record[field]) for field in EXPORT_FIELDS[:-1]] for record in records],
+            [row[:-1] for row in self.rows()]
+        )
+        self.assertEqual(list(records[0]), list(EXPORT_FIELDS))
+        self.assertEqual(records[0]['answered'], '2026-10-14T15:30:00Z')
+
+    def test_csv_has_a_header_and_escapes_values(self):
+        self.assertEqual(list(csv.reader(io.StringIO(self.export('output=csv')))), [list(EXPORT_FIELDS)] + self.rows())
+
+        rendered = ''.join(exports.render([(1, 'comma, "quoted"', 'line\nbreak')], 'csv'))
+        self.assertEqual(list(csv.reader(io.StringIO(rendered)))[1], ['1', 'comma, "quoted"', 'line\nbreak'])
+
+    def test_filters_and_resume_across_chunks(self):
+        ids = list(Rank.objects.order_by('id').values_list('id', flat=True))
+        for chunk_size in (1, 3, 100):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual([row[0] for row in exports.rank_rows(chunk_size=chunk_size)], ids)
+                self.assertEqual(
+                    [row[0] for row in exports.rank_rows(after_id=ids[2], chunk_size=chunk_size)], ids[3:]
+                )
+
+        player = self.players[1]
+        lines = self.export(f'user_id={player.id}&after_id={ids[4]}').splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], ids[5:])
+        self.assertEqual(
+            [row[0] for row in exports.rank_rows(min_id=ids[1], max_id=ids[3], chunk_size=2)], ids[1:4]
+        )
+
+    def test_empty_export(self):
+        Rank.objects.all().delete()
+        self.assertEqual(self.export(), '')
+        self.assertEqual(self.export('output=csv'), ','.join(EXPORT_FIELDS) + '\r\n')
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.client.get('/export/ranks/?output=xml').status_code, 400)
+        self.assertEqual(self.client.get('/export/ranks/?after_id=x').status_code, 400)
+        self.assertEqual(client_for(self.players[0]).get('/export/ranks/').status_code, 401)
+
+
+class ImportTests(TestCase):
+    GAMES = [
+        {'name': 'Capitals', 'questions': [
+            {'question': 'Capital of France?', 'points': 10, 'answers': [
+                {'variant': 'Paris', 'status': True}, {'variant': 'Lyon', 'status': False}
+            ]},
+            {'question': 'Capital of Spain?', 'points': 5, 'answers': [{'variant': 'Madrid', 'status': True}]}
+        ]},
+        {'name': 'Rivers', 'questions': [
+            {'question': 'Longest river?', 'points': 15, 'answers': [{'variant': 'Nile', 'status': True}]}
+        ]}
+    ]
+
+    def run_import(self, content, suffix, *args):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, encoding='utf-8', delete=False) as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, stream.name)
+        out = io.StringIO()
+        try:
+            call_command('import_games', stream.name, *args, stdout=out)
+        finally:
+            self.report = json.loads(out.getvalue()) if out.getvalue() else None
+
+    def imported(self):
+        return sorted(
+            Answer.objects.values_list('quest__game__name', 'quest__question', 'quest__points', 'variant', 'status')
+        )
+
+    def expected(self):
+        return sorted(
+            (game['name'], quest['question'], quest['points'], answer['variant'], answer['status'])
+            for game in self.GAMES for quest in game['questions'] for answer in quest['answers']
+        )
+
+    def test_json_list_is_read_in_chunks(self):
+        stream = io.StringIO(json.dumps(self.GAMES, indent=1))
+        # Chunks of 7 characters split names, numbers and booleans between reads
+        with mock.patch.object(imports, 'JSON_READ_SIZE', 7), \
+                mock.patch.object(stream, 'read', wraps=stream.read) as read:
+            events = list(imports.read_events(stream, 'json'))
+        self.assertGreater(read.call_count, 10)
+        self.assertEqual({call.args for call in read.call_args_list}, {(7,)})
+        self.assertEqual(
+            [kind for kind, _, _ in events],
+            ['game', 'question', 'answer', 'answer', 'question', 'answer', 'game', 'question', 'answer']
+        )
+        self.assertEqual(events[6], ('game', 'game 2', self.GAMES[1]))
+
+        self.run_import(json.dumps(self.GAMES), '.json')
+        self.assertEqual(self.imported(), self.expected())
+        self.assertEqual((self.report['games'], self.report['questions'], self.report['answers']), (2, 3, 4))
+
+    def test_json_games_object_is_read_in_chunks(self):
+        document = {'version': 1, 'games': self.GAMES, 'notes': {'source': 'a "quoted" [list]\\'}}
+        with mock.patch.object(imports, 'JSON_READ_SIZE', 5):
+            events = list(imports.read_events(io.StringIO(json.dumps(document)), 'json'))
+        self.assertEqual([payload for kind, _, payload in events if kind == 'game'], self.GAMES)
+        self.assertEqual(len(events), 9)
+
+    def test_json_games_object_and_ndjson(self):
+        self.run_import(json.dumps({'games': self.GAMES[:1]}), '.json')
+        self.run_import('\n'.join(json.dumps(game) for game in self.GAMES[1:]) + '\n', '.ndjson')
+        self.assertEqual(self.imported(), self.expected())
+
+    def test_csv(self):
+        rows = ['game,question,points,variant,status'] + [
+            f"{game['name']},{quest['question']},{quest['points']},{answer['variant']},{answer['status']}"
+            for game in self.GAMES for quest in game['questions'] for answer in quest['answers']
+        ]
+        self.run_import('\n'.join(rows) + '\n', '.csv')
+        self.assertEqual(self.imported(), self.expected())
+        self.assertEqual(Game.objects.count(), 2)
+
+    def test_a_bad_row_imports_nothing(self):
+        games = json.loads(json.dumps(self.GAMES))
+        games[1]['questions'][0]['points'] = 7
+        # Every row is validated before the first chunk is written
+        with self.assertRaisesMessage(CommandError, '1 invalid rows, nothing imported'):
+            self.run_import(json.dumps(games), '.json', '--chunk-size', '2')
+
+        self.assertFalse(self.report['imported'])
+        self.assertEqual(len(self.report['errors']), 1)
+        self.assertTrue(self.report['errors'][0].startswith('game 2, question 1: '))
+        self.assertFalse(Game.objects.exists())
+        self.assertFalse(Answer.objects.exists())
+
+    def test_a_failed_write_removes_the_committed_chunks(self):
+        bulk_create = Answer.objects.bulk_create
+        calls = []
+
+        def fail_second_chunk(objs):
+            calls.append(len(objs))
+            if len(calls) == 2:
+                raise IntegrityError("disk full")
+            return bulk_create(objs)
+
+        with mock.patch.object(Answer.objects, 'bulk_create', side_effect=fail_second_chunk), \
+                self.assertRaises(CommandError):
+            self.run_import(json.dumps(self.GAMES), '.json', '--chunk-size', '3')
+
+        self.assertEqual(self.report['errors'], ['database: disk full'])
+        self.assertFalse(Game.objects.exists())
+        self.assertFalse(Answer.objects.exists())
+
+    def test_upload(self):
+        admin = create_admin()
+        upload = io.BytesIO(json.dumps(self.GAMES).encode())
+        upload.name = 'games.json'
+
+        response = client_for(admin).post('/import/games/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.imported(), self.expected())
+
+    def test_dry_run_only_validates(self):
+        self.run_import(json.dumps(self.GAMES), '.json', '--dry-run')
+        self.assertEqual((self.report['dry_run'], self.report['imported'], self.report['answers']), (True, False, 4))
+        self.assertFalse(Game.objects.exists())
+
+    def test_malformed_json_is_reported(self):
+        for content in ('[{"name": "Capitals"} {"name": "Rivers"}]', '[{"name": "Capi', '[{"name": "Capitals"}] x'):
+            with self.subTest(content=content), self.assertRaises(CommandError):
+                self.run_import(content, '.json')
+            self.assertTrue(self.report['errors'][0].startswith('input: unreadable: '))
+        self.assertFalse(Game.objects.exists())
+
+
+class SchemaTests(SimpleTestCase):
+
+    def test_all_errors_are_reported_together(self):
+        validated, errors = ManageUsers.create_schema.check(
+            {'username': 'short', 'password': 12345678, 'email': 'not-an-email', 'is_staff': 'yes'}
+        )
+        self.assertEqual(validated, {})
+        self.assertEqual(errors, [
+            "username has constraint length greater than 8, less than 15",
+            "password must be of type <class 'str'>",
+            "Email is not valid",
+            "is_staff must be of type <class 'bool'>"
+        ])
+
+        self.assertEqual(QuestionCRUD.create_schema.check({'points': 7})[1], [
+            "question is required", "points has allowed values constraint: [5, 10, 15]"
+        ])
+        self.assertEqual(QuestionCRUD.create_schema.check(['question'])[1], ["payload must be an object"])
+        with self.assertRaises(ValidationError) as raised:
+            QuestionCRUD.create_schema.validate({'points': 7})
+        self.assertEqual(len(raised.exception.detail), 2)
+
+    def test_matches_the_validator_it_compiles(self):
+        validator = Validator()
+        for field, spec in QuestionCRUD.create_schema.mapping.items():
+            validator.map_field(field, **spec)
+
+        for payload in (
+            {'question': 'Capital?', 'points': 10}, {'points': 10}, {'question': '', 'points': 10},
+            {'question': 'Capital?', 'points': '10'}, {'question': 'Capital?', 'points': 7}
+        ):
+            with self.subTest(payload=payload):
+                try:
+                    expected, expected_error = validator.validate(payload), None
+                except ValidationError as exc:
+                    expected, expected_error = None, exc.detail[0]
+                validated, errors = QuestionCRUD.create_schema.check(payload)
+                self.assertEqual(errors[:1], [expected_error] if expected_error else [])
+                if not errors:
+                    self.assertEqual(validated, expected)
+
+    def test_passwords_are_hashed_unless_disabled(self):
+        payload = {'username': 'player0001', 'password': 'secret-word', 'email': 'p@example.com'}
+        self.assertTrue(check_password('secret-word', ManageUsers.create_schema.validate(payload)['password']))
+        self.assertEqual(Schema(hash_passwords=False).map_field('password', str).validate(payload), {
+            'password': 'secret-word'
+        })
+
+    def test_validate_many_indexes_errors(self):
+        validated, errors = AnswerCRUD.create_schema.validate_many([
+            {'variant': 'Paris', 'status': True}, {'variant': 'Lyon'}, 'Nice', {'variant': 'Nice', 'status': False}
+        ])
+        self.assertEqual(validated, [
+            {'variant': 'Paris', 'status': True}, {'variant': 'Lyon'}, {}, {'variant': 'Nice', 'status': False}
+        ])
+        self.assertEqual(errors, {1: ["status is required"], 2: ["payload must be an object"]})
+
+    def test_fields_added_after_use_are_checked(self):
+        schema = Schema().map_field('name', str, True, 2, 50)
+        self.assertEqual(schema.check({'name': 'Capitals'}), ({'name': 'Capitals'}, []))
+        schema.map_field('points', int, True)
+        self.assertEqual(schema.check({'name': 'Capitals'})[1], ["points is required"])
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class HotQueryPlanTests(TestCase):
+    """Query counts and SQLite query plans of the player endpoints on a seeded dataset.
+
+    A failing count or a full table scan here means a change brought back
+    per-row queries or dropped an index the endpoint relies on.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(username=f'player{n:05}', email=f'player{n:05}@example.com', password='!')
+            for n in range(USERS)
+        )
+        Game.objects.bulk_create(Game(name=f'Game {n}') for n in range(GAMES))
+        Question.objects.bulk_create(
+            Question(game=game, question=f'Question {n} of {game.name}', points=10)
+            for game in Game.objects.all() for n in range(QUESTIONS_PER_GAME)
+        )
+        Answer.objects.bulk_create(
+            Answer(quest=quest, variant=f'Variant {n}', status=n == 0)
+            for quest in Question.objects.all() for n in range(ANSWERS_PER_QUESTION)
+        )
+
+        questions = list(Question.objects.order_by('questid'))
+        users = list(User.objects.order_by('id'))
+        Rank.objects.bulk_create(
+            Rank(
+                user=user, game_id=quest.game_id, quest=quest,
+                points=quest.points if (index + n) % 3 else 0
+            )
+            for index, user in enumerate(users)
+            for n, quest in enumerate(questions[index % len(questions):][:ANSWERED_PER_USER])
+        )
+        scores.rebuild()
+
+        cls.player = users[0]
+        cls.admin = create_admin()
+        cls.game = Game.objects.order_by('gameid').first()
+        cls.quest = Question.objects.filter(game=cls.game).order_by('questid').first()
+        cls.correct = Answer.objects.get(quest=cls.quest, status=True)
+        # The player has answered the first questions only
+        cls.fresh_game = Game.objects.order_by('gameid').last()
+        cls.fresh_correct = Answer.objects.get(
+            quest=Question.objects.filter(game=cls.fresh_game).order_by('questid').first(), status=True
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['responses'].clear()
+        answer_keys.clear()
+        self.login(self.player)
+
+    def login(self, user):
+        self.client = client_for(user)
+        # Counts are those of a worker that has seen the user before
+        get_cached_user(user.id)
+
+    def assertHotPath(self, method, url, queries, allow_scan=(), indexes=(), **kwargs):
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(url, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+        self.assertLess(response.status_code, 400, url)
+        self.assertEqual(
+            len(captured.captured_queries), queries,
+            '\n'.join([url] + [query['sql'] for query in captured.captured_queries])
+        )
+
+        plans = []
+        for query in captured.captured_queries:
+            if not query['sql'].startswith(EXPLAINED):
+                continue
+            for detail in explain(query['sql']):
+                plans.append(detail)
+                scan = FULL_SCAN.match(detail)
+                if scan and scan.group(1) not in allow_scan:
+                    self.fail(f"{url} scans {scan.group(1)}: {query['sql']}")
+
+        for index in indexes:
+            self.assertTrue(
+                any(re.search(rf'\bINDEX {index}\b', detail) for detail in plans), f"{url} does not use {index}"
+            )
+
+        return response
+
+    def test_points(self):
+        self.assertHotPath('get', '/points/', 1)
+
+    def test_rank(self):
+        self.assertHotPath('get', '/rank/', 1)
+        self.assertHotPath('get', f'/rank/?game_id={self.game.gameid}', 1)
+
+    def test_play(self):
+        # Answer key lookup, rank insert, both score rows and their buckets, a new game row and hour rollup included
+        played = self.assertHotPath('post', f'/play/?choiceid={self.fresh_correct.choiceid}', 17)
+        # A retry finds the cached answer key, the insert is skipped and the first result read back
+        retried = self.assertHotPath('post', f'/play/?choiceid={self.fresh_correct.choiceid}', 4)
+        self.assertEqual(retried.json(), played.json())
+        self.assertEqual(Rank.objects.filter(user=self.player, quest=self.fresh_correct.quest).count(), 1)
+
+    def test_play_batch(self):
+        choiceids = list(
+            Answer.objects.filter(quest__game=self.fresh_game).order_by('choiceid')
+            .values_list('choiceid', flat=True)[:50]
+        )
+        self.assertHotPath('post', '/play/batch/', 20, data={'choiceids': choiceids}, format='json')
+
+    def test_game_session(self):
+        response = self.assertHotPath('post', f'/sessions/?gameid={self.fresh_game.gameid}', 2)
+        session_id = response.json()['session_id']
+
+        # Delivering a question costs the same at every step, answering is the Play path
+        for _ in range(QUESTIONS_PER_GAME):
+            question = self.assertHotPath('get', f'/sessions/next/?session_id={session_id}', 3).json()['question']
+            response = self.client.post(
+                f"/sessions/answer/?session_id={session_id}&choiceid={question['answers'][0]['choiceid']}"
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.assertHotPath('get', f'/sessions/next/?session_id={session_id}', 1).json()['finished'])
+
+    def test_game_list(self):
+        response = self.assertHotPath('get', '/games/', 2, allow_scan=('restapp_game',))
+        self.assertHotPath('get', '/games/', 1, HTTP_IF_NONE_MATCH=response['ETag'])
+        # The rendered list is cached under its version
+        self.assertEqual(self.assertHotPath('get', '/games/', 1).content, response.content)
+
+    def test_questions(self):
+        self.assertHotPath('get', f'/quests/?gameid={self.game.gameid}', 2)
+        self.assertHotPath('get', f'/quests/?gameid={self.game.gameid}', 1)
+
+    def test_answers(self):
+        self.assertHotPath('get', f'/answers/?questid={self.quest.questid}', 2)
+        self.assertHotPath('get', f'/answers/?questid={self.quest.questid}', 1)
+
+    def test_bundle(self):
+        self.assertHotPath('get', f'/games/bundle/?gameid={self.game.gameid}', 4)
+        self.assertHotPath('get', f'/games/bundle/?gameid={self.game.gameid}', 1)
+
+    def test_leaderboard(self):
+        self.assertHotPath(
+            'get', '/leaderboard/', 6, indexes=('userscore_points_idx', 'scorebucket_game_points_idx')
+        )
+        self.assertHotPath(
+            'get', f'/leaderboard/?game_id={self.game.gameid}', 6,
+            indexes=('usergamescore_points_idx', 'scorebucket_game_points_uniq')
+        )
+
+    def test_window_leaderboard(self):
+        self.assertHotPath('get', '/leaderboard/window/?period=week', 1, indexes=('scorerollup_period_start_idx',))
+        # A day may lie in a folded week row, that check and the sum share a savepoint
+        self.assertHotPath(
+            'get', f'/leaderboard/window/?period=day&game_id={self.game.gameid}', 4,
+            indexes=('scorerollup_game_start_idx',)
+        )
+        # The hour row holding the start sends its minutes to the answers
+        ScoreRollup.objects.create(
+            period='hour', start=datetime(2026, 10, 14, 15, tzinfo=dt_timezone.utc), user=self.player, game=self.game
+        )
+        self.assertHotPath(
+            'get', '/leaderboard/window/?start=2026-10-14T15:30:00Z&end=2026-10-14T18:00:00Z', 5,
+            indexes=('rank_answered_idx', 'scorerollup_period_start_idx')
+        )
+
+    def test_rank_export(self):
+        self.login(self.admin)
+        self.assertHotPath('get', f'/export/ranks/?user_id={self.player.id}', 1)
+        self.assertHotPath(
+            'get', f'/export/ranks/?user_id={self.player.id}&game_id={self.game.gameid}', 1,
+            indexes=('rank_user_game_idx',)
+        )
+
+
+class MultiDigitIdTests(TestCase):
+    """Game and question ids longer than one digit reach the query whole"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = create_admin()
+        self.client = client_for(self.admin)
+        self.games = {gameid: Game.objects.create(gameid=gameid, name=f'Game {gameid}') for gameid in (1, 12)}
+        self.quests = {
+            questid: Question.objects.create(
+                questid=questid, game=self.games[questid], question=f'Question {questid}', points=10
+            )
+            for questid in (1, 12)
+        }
+        for quest in self.quests.values():
+            Answer.objects.create(quest=quest, variant=f'Answer {quest.questid}', status=True)
+
+    def test_listings_read_the_whole_id(self):
+        response = self.client.get('/quests/?gameid=12')
+        self.assertEqual([quest['questid'] for quest in response.json()], [12])
+
+        response = self.client.get('/answers/?questid=12')
+        self.assertEqual([answer['variant'] for answer in response.json()], ['Answer 12'])
+
+    def test_deletes_read_the_whole_id(self):
+        self.assertEqual(self.client.delete('/quests/?questid=12').status_code, 200)
+        self.assertEqual(list(Question.objects.values_list('questid', flat=True)), [1])
+
+        self.assertEqual(self.client.delete('/games/?gameid=12').status_code, 200)
+        self.assertEqual(list(Game.objects.values_list('gameid', flat=True)), [1])
+
+    def test_rejects_non_integer_ids(self):
+        for method, url in (
+            ('get', '/quests/?gameid=1x'), ('get', '/answers/?questid=1x'),
+            ('delete', '/quests/?questid=1x'), ('delete', '/games/?gameid=1x')
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(getattr(self.client, method)(url).status_code, 400)
+        self.assertEqual(Game.objects.count(), 2)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoadTestTests(TestCase):
+
+    def setUp(self):
+        caches['responses'].clear()
+
+    def test_seed_world_reuses_rows(self):
+        usernames, game_ids = seed_world(5, 2, 3, 4)
+        self.assertEqual(seed_world(5, 2, 3, 4), (usernames, game_ids))
+        self.assertEqual(len(usernames), 5)
+        self.assertEqual(Answer.objects.filter(quest__game_id__in=game_ids).count(), 2 * 3 * 4)
+
+    def test_sessions_hit_every_endpoint(self):
+        usernames, game_ids = seed_world(3, 2, 3, 4)
+        report = LoadRun(usernames, game_ids, plays=2, host='testserver').run(sessions=2, clients=1)
+
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(
+            set(report['endpoints']), {'token', 'games', 'quests', 'answers', 'play', 'points', 'rank'}
+        )
+        self.assertEqual(report['endpoints']['play']['requests'], 4)
+        # Sessions may replay a question, only its first answer is kept
+        self.assertTrue(0 < Rank.objects.count() <= 4)
+
+
+class GameSessionTests(TestCase):
+
+    def setUp(self):
+        answer_keys.clear()
+        self.player = create_player()
+        self.game = Game.objects.create(name='Game')
+        for n in range(5):
+            quest = Question.objects.create(game=self.game, question=f'Question {n}', points=10)
+            Answer.objects.create(quest=quest, variant='Right', status=True)
+            Answer.objects.create(quest=quest, variant='Wrong', status=False)
+        self.client = client_for(self.player)
+
+    def test_session_walks_every_question_once(self):
+        session_id = self.client.post(f'/sessions/?gameid={self.game.gameid}').json()['session_id']
+
+        seen = []
+        while True:
+            step = self.client.get(f'/sessions/next/?session_id={session_id}').json()
+            if step['finished']:
+                break
+            seen.append(step['question']['questid'])
+            right = step['question']['answers'][0]['choiceid']
+            self.assertEqual(
+                self.client.post(f'/sessions/answer/?session_id={session_id}&choiceid={right}').json()['position'],
+                len(seen)
+            )
+
+        self.assertEqual(sorted(seen), sorted(Question.objects.values_list('questid', flat=True)))
+        self.assertEqual(scores.user_points(self.player.id), 50)
+
+    def test_answers_are_checked_against_the_session(self):
+        session_id = self.client.post(f'/sessions/?gameid={self.game.gameid}').json()['session_id']
+        current = self.client.get(f'/sessions/next/?session_id={session_id}').json()['question']
+        wrong, right = (
+            Answer.objects.filter(quest_id=current['questid']).order_by('status').values_list('choiceid', flat=True)
+        )
+        other = Answer.objects.exclude(quest_id=current['questid']).values_list('choiceid', flat=True).first()
+
+        response = self.client.post(f'/sessions/answer/?session_id={session_id}&choiceid={other}')
+        self.assertEqual(response.status_code, 409)
+
+        first = self.client.post(f'/sessions/answer/?session_id={session_id}&choiceid={wrong}').json()
+        # A retry for the question just answered returns the first result and keeps the cursor
+        retry = self.client.post(f'/sessions/answer/?session_id={session_id}&choiceid={right}').json()
+        self.assertEqual(retry, first)
+        self.assertEqual(first['position'], 1)
+
+        self.client = client_for(create_player('player0002'))
+        self.assertEqual(self.client.get(f'/sessions/next/?session_id={session_id}').status_code, 404)
+
+    def test_ids_must_be_integers(self):
+        session_id = self.client.post(f'/sessions/?gameid={self.game.gameid}').json()['session_id']
+        for method, url, details in (
+            ('post', '/sessions/', "Query parameter `gameid` is required"),
+            ('post', '/sessions/?gameid=x', "Query parameter `gameid` must be integer"),
+            ('get', '/sessions/?session_id=x', "Query parameter `session_id` must be integer"),
+            ('get', '/sessions/next/', "Query parameter `session_id` is required"),
+            ('post', f'/sessions/answer/?session_id={session_id}&choiceid=x', "choiceid must be integer value")
+        ):
+            response = getattr(self.client, method)(url)
+            self.assertEqual((response.status_code, response.json()), (400, {'details': details}))
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        player = create_player()
+        self.client = client_for(player)
+        self.token = ClaimsTokenObtainPairSerializer.get_token(player).access_token
+        get_cached_user(player.id)
+
+    def queries(self, before):
+        after = registry.snapshot()[('points/', 'GET')]
+        return after[SQL_QUERIES] - (before[SQL_QUERIES] if before else 0)
+
+    def test_requests_are_recorded_per_route(self):
+        before = registry.snapshot().get(('points/', 'GET'))
+
+        response = self.client.get('/points/')
+
+        self.assertEqual(self.queries(before), 1)
+        after = registry.snapshot()[('points/', 'GET')]
+        self.assertEqual(
+            after[RESPONSE_BYTES] - (before[RESPONSE_BYTES] if before else 0), len(response.content)
+        )
+
+        exposition = self.client.get('/metrics').content.decode()
+        self.assertIn('# TYPE restapp_request_duration_seconds histogram', exposition)
+        self.assertIn('restapp_request_duration_seconds_bucket{route="points/",method="GET",le="+Inf"}', exposition)
+        self.assertIn('restapp_sql_queries_total{route="points/",method="GET"}', exposition)
+
+    def test_sql_of_streamed_bodies_is_counted_when_they_close(self):
+        admin = create_admin()
+        get_cached_user(admin.id)
+        before = registry.snapshot().get(('export/ranks/', 'GET'))
+
+        response = client_for(admin).get('/export/ranks/')
+        sent = registry.snapshot()[('export/ranks/', 'GET')][SQL_QUERIES]
+        b''.join(response.streaming_content)
+        response.close()
+
+        after = registry.snapshot()[('export/ranks/', 'GET')]
+        self.assertEqual(sent - (before[SQL_QUERIES] if before else 0), 0)
+        self.assertEqual(after[SQL_QUERIES] - sent, 1)
+        self.assertGreater(after[SQL_SECONDS], 0)
+
+    def test_scrapes_need_an_allowed_network_or_the_token(self):
+        scraper = APIClient()
+        self.assertEqual(scraper.get('/metrics').status_code, 200)
+        self.assertEqual(scraper.get('/metrics', REMOTE_ADDR='203.0.113.5').status_code, 401)
+
+        with mock.patch('restapp.metrics.METRICS_TOKEN', 'scrape-token'):
+            self.assertEqual(scraper.get(
+                '/metrics', REMOTE_ADDR='203.0.113.5', HTTP_AUTHORIZATION='Bearer wrong'
+            ).status_code, 401)
+            self.assertEqual(scraper.get(
+                '/metrics', REMOTE_ADDR='203.0.113.5', HTTP_AUTHORIZATION='Bearer scrape-token'
+            ).status_code, 200)
+
+    async def test_concurrent_asgi_requests_count_their_own_queries(self):
+        # Sync views run their SQL on another thread than the event loop
+        before = registry.snapshot().get(('points/', 'GET'))
+        responses = await asyncio.gather(*(
+            self.async_client.get('/points/', AUTHORIZATION=f'Bearer {self.token}') for _ in range(3)
+        ))
+        self.assertEqual([response.status_code for response in responses], [200] * 3)
+        self.assertEqual(self.queries(before), 3)
+
+
+@mock.patch('restapp.routers.READ_REPLICAS', ['replica'])
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def request(self, method, user=None, write=False, stream=False):
+        """Databases the reads of a request go to, before and after an optional write"""
+
+        reads = []
+
+        def read_and_write():
+            reads.append(self.router.db_for_read(User))
+            if write:
+                self.router.db_for_write(User)
+                reads.append(self.router.db_for_read(User))
+
+        def view(request):
+            if not stream:
+                read_and_write()
+                return HttpResponse()
+
+            def body():
+                read_and_write()
+                yield b'{}'
+            return StreamingHttpResponse(body())
+
+        headers = {}
+        if user is not None:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(user).access_token}'
+        response = replica_middleware(view)(getattr(self.factory, method)('/points/', **headers))
+        if stream:
+            b''.join(response.streaming_content)
+            response.close()
+        return reads
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.request('get'), ['replica'])
+        self.assertEqual(self.request('post'), ['default'])
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_reads_after_a_write_stay_on_primary(self):
+        self.assertEqual(self.request('get', write=True), ['replica', 'default'])
+
+    def test_writer_is_pinned_by_user_id(self):
+        writer, other = User(id=7, username='player0007'), User(id=8, username='player0008')
+        self.request('post', writer, write=True)
+
+        # Any token of the user, from any client, reads its writes
+        self.assertEqual(self.request('get', writer), ['default'])
+        self.assertEqual(self.request('get', other), ['replica'])
+        self.assertEqual(self.request('get'), ['replica'])
+
+        with mock.patch('restapp.routers.time.time', return_value=time.time() + 6):
+            self.assertEqual(self.request('get', writer), ['replica'])
+
+    def test_streamed_bodies_keep_the_routing_of_their_request(self):
+        writer = User(id=7, username='player0007')
+        self.assertEqual(self.request('get', writer, write=True, stream=True), ['replica', 'default'])
+        self.assertEqual(self.request('get', writer), ['default'])
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'restapp'))
+        self.assertTrue(self.router.allow_migrate('default', 'restapp'))
+
+
+class WriteBehindBufferTests(SimpleTestCase):
+
+    def setUp(self):
+        self.flushed = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def flush(self, submissions):
+        self.release.wait()
+        if any(user_id is None for user_id, _ in submissions):
+            raise IntegrityError('FOREIGN KEY constraint failed')
+        self.flushed.append(submissions)
+
+    def buffer(self, **options):
+        buffer = WriteBehindBuffer(
+            self.flush, **dict({'interval': 0.05, 'batch_rows': 100, 'max_queue': 100}, **options)
+        )
+        self.addCleanup(buffer.close)
+        return buffer
+
+    def test_submissions_are_batched(self):
+        buffer = self.buffer()
+        buffer.submit(1, [(4, 6, 10)])
+        buffer.submit(2, [(4, 6, 0), (4, 7, 5)])
+        buffer.close()
+
+        self.assertEqual(self.flushed, [[(1, [(4, 6, 10)]), (2, [(4, 6, 0), (4, 7, 5)])]])
+
+    def test_reads_see_pending_answers(self):
+        self.release.clear()
+        buffer = self.buffer(interval=0)
+        buffer.submit(1, [(4, 6, 10), (5, 8, 0)])
+
+        self.assertEqual(buffer.read_with_pending(('user', 1), lambda: 'db'), ('db', [10, 2, 1]))
+        self.assertEqual(buffer.read_with_pending(('game', 1, 5), lambda: 'db'), ('db', [0, 1, 0]))
+        self.assertEqual(buffer.read_with_pending(('user', 2), lambda: 'db'), ('db', [0, 0, 0]))
+
+        self.release.set()
+        buffer.close()
+        self.assertEqual(buffer.read_with_pending(('user', 1), lambda: 'db'), ('db', [0, 0, 0]))
+
+    def test_full_queue_writes_synchronously(self):
+        self.release.clear()
+        buffer = self.buffer(interval=0, max_queue=1, put_timeout=0.01)
+        # The flusher blocks on the first, the second fills the queue
+        buffer.submit(1, [(4, 6, 10)])
+        buffer.submit(2, [(4, 6, 10)])
+        self.release.set()
+        buffer.submit(3, [(4, 6, 10)])
+        buffer.close()
+
+        self.assertEqual(sorted(user_id for batch in self.flushed for user_id, _ in batch), [1, 2, 3])
+
+    def test_commit_durability_waits_for_the_flush(self):
+        buffer = self.buffer(durability=DURABILITY_COMMIT)
+        buffer.submit(1, [(4, 6, 10)])
+
+        self.assertEqual(self.flushed, [[(1, [(4, 6, 10)])]])
+
+    def test_a_bad_submission_loses_only_its_own_answers(self):
+        self.release.clear()
+        buffer = self.buffer()
+        buffer.submit(1, [(4, 6, 10)])
+        with self.assertLogs('restapp.writebehind', 'ERROR'):
+            buffer.submit(None, [(4, 6, 10)])
+            buffer.submit(2, [(4, 7, 5)])
+            self.release.set()
+            buffer.close()
+
+        self.assertEqual(self.flushed, [[(1, [(4, 6, 10)])], [(2, [(4, 7, 5)])]])
+
+    def test_commit_durability_raises_the_submission_error(self):
+        buffer = self.buffer(durability=DURABILITY_COMMIT)
+        with self.assertLogs('restapp.writebehind', 'ERROR'), self.assertRaises(IntegrityError):
+            buffer.submit(None, [(4, 6, 10)])
+
+
+class RecordManyTests(TestCase):
+
+    def test_merged_increments_match_a_rebuild(self):
+        users = [User.objects.create(username=f'player{n:04}', email=f'p{n}@example.com') for n in range(3)]
+        games = [Game.objects.create(name=f'Game {n}') for n in range(2)]
+        quests = [Question.objects.create(game=game, question='Question', points=10) for game in games]
+
+        scores.record_many([
+            (users[0].id, [(games[0].gameid, quests[0].questid, 10), (games[1].gameid, quests[1].questid, 0)]),
+            (users[1].id, [(games[0].gameid, quests[0].questid, 10)]),
+            (users[0].id, [(games[0].gameid, quests[0].questid, 10)])
+        ])
+        scores.record_many([(users[2].id, [(games[1].gameid, quests[1].questid, 10)])])
+
+        def snapshot():
+            return (
+                sorted(UserScore.objects.values_list('user_id', 'points', 'total_answers', 'correct_answers')),
+                sorted(UserGameScore.objects.values_list(
+                    'user_id', 'game_id', 'points', 'total_answers', 'correct_answers'
+                )),
+                sorted(ScoreBucket.objects.filter(users__gt=0).values_list('game_id', 'points', 'users'),
+                    key=str)
+            )
+
+        recorded = snapshot()
+        scores.rebuild()
+        self.assertEqual(recorded, snapshot())
+        # The repeated answer to the same question is not counted
+        self.assertEqual(UserScore.objects.get(user=users[0]).points, 10)
+
+    def test_repeated_answers_keep_the_first(self):
+        user = create_player()
+        game = Game.objects.create(name='Game')
+        quests = [Question.objects.create(game=game, question='Question', points=10) for _ in range(2)]
+
+        self.assertEqual(scores.record_answers(user.id, [(game.gameid, quests[0].questid, 0)]), {})
+        self.assertEqual(
+            scores.record_answers(
+                user.id, [(game.gameid, quests[0].questid, 10), (game.gameid, quests[1].questid, 10)]
+            ),
+            {quests[0].questid: 0}
+        )
+
+        self.assertEqual(
+            sorted(Rank.objects.values_list('quest_id', 'points')), [(quests[0].questid, 0), (quests[1].questid, 10)]
+        )
+        self.assertEqual(
+            UserScore.objects.values_list('points', 'total_answers', 'correct_answers').get(user=user), (10, 2, 1)
+        )
+
+
+class RollupTests(TestCase):
+    # A Wednesday
+    NOW = datetime(2026, 10, 14, 15, 30, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.users = [User.objects.create(username=f'player{n:04}', email=f'p{n}@example.com') for n in range(2)]
+        self.game = Game.objects.create(name='Game')
+        self.quests = iter(Question.objects.create(game=self.game, question='Question', points=10) for _ in range(20))
+
+    def play(self, user, points, at):
+        with mock.patch('restapp.scores.timezone.now', return_value=at):
+            scores.record_answers(user.id, [(self.game.gameid, next(self.quests).questid, points)])
+
+    def top(self, period, start=None):
+        board = rollups.window_leaderboard(period, start, now=self.NOW)
+        return [(row['user_id'], row['points']) for row in board['top']]
+
+    def test_windows_survive_compaction(self):
+        first, second = self.users
+        self.play(first, 10, self.NOW)
+        self.play(first, 10, self.NOW - timedelta(minutes=45))
+        self.play(second, 10, self.NOW - timedelta(days=1))
+        self.play(second, 10, self.NOW - timedelta(days=2))
+        # The week before
+        self.play(first, 10, self.NOW - timedelta(days=7))
+
+        expected = {
+            'hour': self.top('hour'), 'day': self.top('day'), 'week': self.top('week'),
+            'last week': self.top('week', self.NOW - timedelta(days=7))
+        }
+        self.assertEqual(expected['hour'], [(first.id, 10)])
+        self.assertEqual(expected['day'], [(first.id, 20)])
+        # Ties go to the lower user id
+        self.assertEqual(expected['week'], [(first.id, 20), (second.id, 20)])
+        self.assertEqual(expected['last week'], [(first.id, 10)])
+
+        # Today's hours and this week's days are not whole yet, the rest folds
+        self.assertEqual(rollups.compact(self.NOW, keep_hours=0, keep_days=0), (3, 1))
+        self.assertEqual(
+            sorted(ScoreRollup.objects.values_list('period', 'start')),
+            [
+                ('day', datetime(2026, 10, 12, tzinfo=dt_timezone.utc)),
+                ('day', datetime(2026, 10, 13, tzinfo=dt_timezone.utc)),
+                ('hour', datetime(2026, 10, 14, 14, tzinfo=dt_timezone.utc)),
+                ('hour', datetime(2026, 10, 14, 15, tzinfo=dt_timezone.utc)),
+                ('week', datetime(2026, 10, 5, tzinfo=dt_timezone.utc))
+            ]
+        )
+        self.assertEqual(self.top('week'), expected['week'])
+        self.assertEqual(self.top('week', self.NOW - timedelta(days=7)), expected['last week'])
+        self.assertEqual(self.top('day'), expected['day'])
+
+    def test_ranges_add_the_answers_at_their_edges(self):
+        first, second = self.users
+        self.play(first, 10, self.NOW)
+        self.play(first, 10, self.NOW - timedelta(minutes=45))
+        self.play(second, 10, self.NOW - timedelta(days=1))
+        self.play(second, 10, self.NOW - timedelta(days=2))
+        self.play(first, 10, self.NOW - timedelta(days=7))
+
+        def top(start, end):
+            board = rollups.window_leaderboard(start=start, end=end)
+            self.assertEqual((board['period'], board['start'], board['end']), (None, start, end))
+            return [(row['user_id'], row['points']) for row in board['top']]
+
+        ranges = {
+            # Inside one hour
+            (self.NOW - timedelta(minutes=40), self.NOW + timedelta(minutes=1)): [(first.id, 10)],
+            # Minutes of two hours around whole hours and days
+            (self.NOW - timedelta(days=1, minutes=10), self.NOW - timedelta(minutes=30)): [
+                (first.id, 10), (second.id, 10)
+            ],
+            # Whole days of this week
+            (datetime(2026, 10, 12, tzinfo=dt_timezone.utc), datetime(2026, 10, 15, tzinfo=dt_timezone.utc)): [
+                (first.id, 20), (second.id, 20)
+            ],
+            # One day of last week, and the days up to the last answer of this one
+            (datetime(2026, 10, 7, tzinfo=dt_timezone.utc), datetime(2026, 10, 8, tzinfo=dt_timezone.utc)): [
+                (first.id, 10)
+            ],
+            (datetime(2026, 10, 7, 12, tzinfo=dt_timezone.utc), self.NOW): [(first.id, 20), (second.id, 20)],
+        }
+        for (start, end), expected in ranges.items():
+            self.assertEqual(top(start, end), expected, (start, end))
+
+        # Mon and Tue fold into days and last week into a week, which the ranges cross
+        rollups.compact(self.NOW, keep_hours=0, keep_days=0)
+        for (start, end), expected in ranges.items():
+            self.assertEqual(top(start, end), expected, (start, end))
+
+    def test_range_parameters(self):
+        self.play(self.users[0], 10, self.NOW)
+        client = client_for(self.users[0])
+        start = (self.NOW - timedelta(minutes=5)).isoformat()
+
+        response = client.get('/leaderboard/window/', {'start': start, 'end': self.NOW.isoformat()})
+        self.assertEqual(response.json()['top'], [])
+        response = client.get('/leaderboard/window/', {'start': start, 'end': '2026-10-15'})
+        self.assertEqual([row['points'] for row in response.json()['top']], [10])
+
+        for params in ({'end': '2026-10-15'}, {'start': '2026-10-15', 'end': '2026-10-15'}, {'end': 'tomorrow'}):
+            self.assertEqual(client.get('/leaderboard/window/', params).status_code, 400, params)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        for n, at in enumerate((self.NOW, self.NOW - timedelta(hours=5), self.NOW - timedelta(days=20))):
+            self.play(self.users[n % 2], 10 if n else 0, at)
+
+        def snapshot():
+            return sorted(ScoreRollup.objects.values_list(
+                'period', 'start', 'user_id', 'game_id', 'points', 'total_answers', 'correct_answers'
+            ))
+
+        rollups.compact(self.NOW)
+        incremental = snapshot()
+        rollups.rebuild(self.NOW)
+        self.assertEqual(snapshot(), incremental)
+
+
+class ResponseCacheTests(TestCase):
+
+    def setUp(self):
+        caches['responses'].clear()
+        answer_keys.clear()
+        self.admin = create_admin()
+        self.game = Game.objects.create(name='Game')
+        self.quest = Question.objects.create(game=self.game, question='Question', points=10)
+        self.client = client_for(self.admin)
+
+    def test_writes_invalidate_their_listing_only(self):
+        games = self.client.get('/games/').content
+        quests = self.client.get(f'/quests/?gameid={self.game.gameid}').content
+        paged = self.client.get(f'/quests/?gameid={self.game.gameid}&page_size=1').content
+        self.assertNotEqual(paged, quests)
+
+        self.client.post(f'/quests/?gameid={self.game.gameid}', {'question': 'Another', 'points': 5}, format='json')
+
+        self.assertEqual(self.client.get('/games/').content, games)
+        self.assertIn(b'Another', self.client.get(f'/quests/?gameid={self.game.gameid}').content)
+
+        Answer.objects.create(quest=self.quest, variant='Right', status=True)
+        self.assertIn(b'Right', self.client.get(f'/answers/?questid={self.quest.questid}').content)
+
+        self.client.put(f'/games/?gameid={self.game.gameid}', {'name': 'Renamed'}, format='json')
+        self.assertIn(b'Renamed', self.client.get('/games/').content)
+
+    def test_errors_and_streams_are_not_cached(self):
+        self.assertEqual(self.client.get('/quests/?gameid=x').status_code, 400)
+        response = self.client.get(f'/quests/?gameid={self.game.gameid}&stream=1')
+        self.assertTrue(response.streaming)
+        b''.join(response.streaming_content)
+        self.assertTrue(self.client.get(f'/quests/?gameid={self.game.gameid}&stream=1').streaming)
+
+
+class FastReadTests(TestCase):
+    TRICKY = ['plain', 'Chișinău', 'quote " and \\ slash /', 'line\nbreak\ttab\x01', 'js \u2028\u2029', '😀']
+
+    def setUp(self):
+        caches['responses'].clear()
+        self.game = Game.objects.create(name='Game')
+        for n, text in enumerate(self.TRICKY):
+            quest = Question.objects.create(game=self.game, question=text, points=(5, 10, 15)[n % 3])
+            Answer.objects.create(quest=quest, variant=text, status=n % 2 == 0)
+        player = create_player()
+        self.client = client_for(player)
+
+    def test_listings_match_the_serializers_byte_for_byte(self):
+        quest = Question.objects.first()
+        for url, queryset, serializer_class in (
+            ('/games/', Game.objects.all(), GameSerializer),
+            (f'/quests/?gameid={self.game.gameid}', Question.objects.filter(game=self.game), QuestionSerializer),
+            (f'/answers/?questid={quest.questid}', Answer.objects.filter(quest=quest), AnswerSerializer)
+        ):
+            expected = JSONRenderer().render(serializer_class(queryset.order_by('pk'), many=True).data)
+            self.assertEqual(self.client.get(url).content, expected, url)
+            streamed = self.client.get(f"{url}{'&' if '?' in url else '?'}stream=1")
+            self.assertEqual(b''.join(streamed.streaming_content), expected, url)
+
+        page = self.client.get(f'/quests/?gameid={self.game.gameid}&page_size=2').json()
+        self.assertEqual([row['question'] for row in page['results']], self.TRICKY[:2])
+        page = self.client.get(f"/quests/?gameid={self.game.gameid}&page_size=10&cursor={page['next']}").json()
+        self.assertEqual([row['question'] for row in page['results']], self.TRICKY[2:])
+        self.assertIsNone(page['next'])
+
+    def test_renderer_matches_json_renderer(self):
+        data = {
+            'text': self.TRICKY, 'numbers': [0, -1, 2 ** 40, 1.5], 'flags': [True, False, None],
+            'when': datetime(2026, 10, 14, 15, 30, 1, 250000, tzinfo=dt_timezone.utc),
+            'day': datetime(2026, 10, 14).date(), 'amount': Decimal('1.50'), 7: 'int key', 'nested': [{}, []]
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_non_finite_floats_render_as_null(self):
+        # The documented difference from strict JSONRenderer, which raises
+        with self.assertRaises(ValueError):
+            JSONRenderer().render([float('nan')])
+        self.assertEqual(FastJSONRenderer().render([float('nan'), float('inf')]), b'[null,null]')
+
+    def test_unprojectable_serializers_fall_back(self):
+        self.assertIsNone(projection_of(UserSerializer))
+        self.assertEqual(projection_of(AnswerSerializer).sources, ('choiceid', 'quest_id', 'variant'))
+
+
+class UserDirectoryTests(TestCase):
+
+    def setUp(self):
+        self.admin = create_admin()
+        self.players = [
+            User.objects.create(username=name, email=email, password='pbkdf2_sha256$secret')
+            for name, email in (
+                ('Alice', 'alice@example.com'), ('alfred', 'fred@example.com'),
+                ('bob', 'ALBERT@example.com'), ('carol', 'carol@example.com')
+            )
+        ]
+        group = Group.objects.create(name='editors')
+        for player in self.players:
+            player.groups.add(group)
+        self.group = group
+        self.client = client_for(self.admin)
+
+    def test_search_matches_username_or_email_prefix_ignoring_case(self):
+        page = self.client.get('/users/directory/?q=AL').json()
+        self.assertEqual([row['username'] for row in page['results']], ['Alice', 'alfred', 'bob'])
+        self.assertIsNone(page['next'])
+        self.assertEqual(page['results'][0]['groups'], [self.group.id])
+        self.assertNotIn('password', page['results'][0])
+
+        self.assertEqual(self.client.get('/users/directory/?q=al%25').json()['results'], [])
+
+    def test_search_folds_case_beyond_ascii(self):
+        emile = User.objects.create(username='Émile', email='emile@example.com')
+        zoe = User.objects.create(username='zoë', email='ZOË@example.com')
+        for query, expected in (('émi', [emile.id]), ('ÉM', [emile.id]), ('ZOË', [zoe.id]), ('zoë@', [zoe.id])):
+            page = self.client.get('/users/directory/', {'q': query}).json()
+            self.assertEqual([row['id'] for row in page['results']], expected, query)
+
+        # Renames move the search key, other saves leave it alone
+        emile.username = 'Ëmile'
+        emile.save()
+        with CaptureQueriesContext(connection) as saved:
+            emile.save(update_fields=['last_login'])
+        self.assertEqual(len(saved), 1)
+        self.assertEqual(self.client.get('/users/directory/', {'q': 'ëm'}).json()['results'][0]['id'], emile.id)
+        self.assertEqual(self.client.get('/users/directory/', {'q': 'ém'}).json()['results'], [])
+
+    def test_search_reads_the_key_indexes(self):
+        report = provisioning.provision_users(
+            [{'username': 'Ångström', 'email': 'ang@example.com', 'password': 'x' * 12}]
+        )
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(self.client.get('/users/directory/?q=åN').json()['results'][0]['username'], 'Ångström')
+
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get('/users/directory/?q=al')
+        plan = ' '.join(detail for query in captured for detail in explain(query['sql']))
+        self.assertIn('usersearchkey_username_idx', plan)
+        self.assertIn('usersearchkey_email_idx', plan)
+
+    def test_pages_take_the_same_queries_whatever_their_size(self):
+        with CaptureQueriesContext(connection) as small:
+            page = self.client.get('/users/directory/?page_size=2').json()
+        self.assertEqual([row['username'] for row in page['results']], ['administrator', 'Alice'])
+
+        page = self.client.get(f"/users/directory/?page_size=2&cursor={page['next']}").json()
+        self.assertEqual([row['username'] for row in page['results']], ['alfred', 'bob'])
+
+        with CaptureQueriesContext(connection) as large:
+            self.client.get('/users/directory/?page_size=100')
+        self.assertEqual(len(small), len(large))
+
+    def test_user_listing_hides_password_hashes(self):
+        rows = self.client.get('/users/').json()
+        self.assertEqual(len(rows), 5)
+        self.assertFalse(any('password' in row for row in rows))
+
+    def test_administrators_only(self):
+        response = client_for(self.players[0]).get('/users/directory/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.get('/users/directory/?page_size=x').status_code, 400)
+
+
+class WarmupTests(TestCase):
+
+    def setUp(self):
+        answer_keys.clear()
+        self.games = [Game.objects.create(name=f'Game {n}') for n in range(3)]
+        for game in self.games:
+            quest = Question.objects.create(game=game, question='Question', points=10)
+            Answer.objects.create(quest=quest, variant='Right', status=True)
+            Answer.objects.create(quest=quest, variant='Wrong', status=False)
+        player = create_player()
+        ScoreRollup.objects.create(
+            period='hour', start=rollups.bucket_start(datetime.now(dt_timezone.utc), 'hour'),
+            user=player, game=self.games[0], points=10, total_answers=5, correct_answers=1
+        )
+
+    def test_hot_games_come_first_then_the_newest(self):
+        self.assertEqual(warmup.hot_games(2), [self.games[0].gameid, self.games[2].gameid])
+
+    def test_warm_up_preloads_game_data_and_the_schema(self):
+        # Closing for real would end the test transaction
+        with mock.patch.object(connections, 'close_all') as close_all:
+            timings = warmup.warm_up(games=2)
+        close_all.assert_called_once_with()
+        self.assertEqual(list(timings), ['database', 'urls', 'serializers', 'schema', 'games'])
+        self.assertEqual(answer_keys.stats()['size'], 4)
+
+        choiceid = Answer.objects.filter(quest__game=self.games[0]).values_list('choiceid', flat=True).first()
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(answer_keys.get(choiceid))
+        # The content version only, the bundle itself is cached
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(get_bundle(self.games[0].gameid))
+
+    def test_boot_warm_up_is_opt_in(self):
+        self.assertFalse(warmup.WARMUP_ON_BOOT)
+        with mock.patch.object(warmup, 'warm_up') as warm_up:
+            warmup.on_boot()
+            warm_up.assert_not_called()
+            with mock.patch.object(warmup, 'WARMUP_ON_BOOT', True):
+                warmup.on_boot()
+            warm_up.assert_called_once_with()
+
+    def test_schema_is_generated_and_rendered_once(self):
+        admin = create_admin()
+        client = client_for(admin)
+
+        first = client.get('/openapi', HTTP_ACCEPT='application/vnd.oai.openapi+json')
+        self.assertIn('/users/directory/', first.json()['paths'])
+        with mock.patch.object(SchemaGenerator, 'get_schema') as generate, \
+                mock.patch.object(JSONOpenAPIRenderer, 'render') as render:
+            second = client.get('/openapi', HTTP_ACCEPT='application/vnd.oai.openapi+json')
+        generate.assert_not_called()
+        render.assert_not_called()
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(APIClient().get('/openapi').status_code, 401)
+
+
+class LeaderboardTests(TestCase):
+
+    def setUp(self):
+        self.game = Game.objects.create(name='Game')
+        quests = [Question.objects.create(game=self.game, question=f'Question {n}', points=10) for n in range(5)]
+        self.users = {}
+        for name, answered in (('first', 5), ('second', 3), ('tied', 3), ('last', 1)):
+            user = self.users[name] = User.objects.create(username=name, email=f'{name}@example.com', password='!')
+            scores.record_answers(user.id, [(self.game.gameid, quest.questid, 10) for quest in quests[:answered]])
+
+    def ranks(self, game_id=None):
+        board = leaderboard.get_leaderboard(self.users['last'].id, game_id, around=1)
+        return [(row['username'], row['rank']) for row in board['top']], board['me']['rank']
+
+    def test_ties_share_a_rank(self):
+        for game_id in (None, self.game.gameid):
+            self.assertEqual(
+                self.ranks(game_id), ([('first', 1), ('second', 2), ('tied', 2), ('last', 4)], 4)
+            )
+
+    def test_deleted_users_leave_the_histograms(self):
+        self.users['second'].delete()
+
+        for game_id in (None, self.game.gameid):
+            self.assertEqual(self.ranks(game_id), ([('first', 1), ('tied', 2), ('last', 3)], 3))
+            self.assertEqual(
+                dict(ScoreBucket.objects.filter(game_id=game_id).values_list('points', 'users')),
+                {50: 1, 30: 1, 10: 1}
+            )
+
+
+class ConditionalReadTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caches['responses'].clear()
+        self.admin = create_admin()
+        self.game = Game.objects.create(name='Game')
+        self.quest = Question.objects.create(game=self.game, question='Question', points=10)
+        self.answer = Answer.objects.create(quest=self.quest, variant='Right', status=True)
+        self.client = client_for(self.admin)
+
+    def test_each_representation_has_its_own_etag(self):
+        etags = {
+            self.client.get('/games/')['ETag'],
+            self.client.get('/games/?page_size=1')['ETag'],
+            self.client.get('/games/', HTTP_ACCEPT='text/html')['ETag']
+        }
+        self.assertEqual(len(etags), 3)
+        self.assertIn('Accept', self.client.get('/games/')['Vary'])
+
+    def test_writes_change_the_validators(self):
+        listing = self.client.get(f'/answers/?questid={self.quest.questid}')
+        etag = listing['ETag']
+        self.assertEqual(
+            self.client.get(f'/answers/?questid={self.quest.questid}', HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+        self.answer.variant = 'Still right'
+        self.answer.save()
+        changed = self.client.get(f'/answers/?questid={self.quest.questid}', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertIn(b'Still right', changed.content)
+        # Answers are part of their game's questions listing too
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_if_modified_since(self):
+        games = self.client.get('/games/')
+        self.assertEqual(self.client.get('/games/', HTTP_IF_MODIFIED_SINCE=games['Last-Modified']).status_code, 304)
+
+        later = datetime.now(dt_timezone.utc) + timedelta(seconds=5)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.client.post('/games/', {'name': 'Another'}, format='json')
+        response = self.client.get('/games/', HTTP_IF_MODIFIED_SINCE=games['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Another', response.content)
+
+
+class ProvisionUsersTests(TestCase):
+
+    def setUp(self):
+        self.admin = create_admin()
+        self.client = client_for(self.admin)
+
+    def player(self, n, **fields):
+        return {'username': f'player{n:04d}', 'password': f'secret-{n:04d}', 'email': f'p{n}@example.com', **fields}
+
+    def test_creates_users_and_reports_failed_rows(self):
+        User.objects.create(username='player0003', email='taken@example.com')
+        response = self.client.post('/users/bulk/', {'users': [
+            self.player(1, is_staff=True), self.player(2, username='short'), self.player(3), self.player(4),
+            self.player(4), 'player0005'
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            [(failure['row'], failure['errors']) for failure in response.data['failures']], [
+                (1, ["username has constraint length greater than 8, less than 15"]),
+                (2, ["username already exists"]),
+                (4, ["username is duplicated in the batch"]),
+                (5, ["payload must be an object"])
+            ]
+        )
+        first = User.objects.get(username='player0001')
+        self.assertTrue(first.is_staff)
+        self.assertTrue(first.check_password('secret-0001'))
+        self.assertTrue(User.objects.get(username='player0004').check_password('secret-0004'))
+
+    def test_csv_upload(self):
+        upload = io.BytesIO(
+            b'username,password,email,is_staff\nplayer0001,secret-0001,p1@example.com,yes\n'
+            b'player0002,secret-0002,p2@example.com,\n'
+        )
+        upload.name = 'users.csv'
+        response = self.client.post('/users/bulk/', {'file': upload}, format='multipart')
+
+        self.assertEqual((response.status_code, response.data['created']), (200, 2))
+        self.assertEqual(
+            sorted(User.objects.filter(username__startswith='player').values_list('username', 'is_staff')),
+            [('player0001', True), ('player0002', False)]
+        )
+
+    def test_json_upload_is_read_incrementally(self):
+        upload = io.BytesIO(json.dumps({'source': 'hr', 'users': [self.player(1), self.player(2)]}).encode())
+        upload.name = 'users.json'
+        with mock.patch.object(imports, 'JSON_READ_SIZE', 5):
+            response = self.client.post('/users/bulk/', {'file': upload}, format='multipart')
+        self.assertEqual((response.status_code, response.data['created']), (200, 2))
+
+        upload = io.BytesIO(b'[{"username": "player0001"}, x]')
+        upload.name = 'users.json'
+        response = self.client.post('/users/bulk/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+    def test_usernames_are_normalized_before_the_duplicate_checks(self):
+        User.objects.create(username='player0003', email='taken@example.com')
+        # NFKC turns the fullwidth letters into ASCII ones, as create_user does
+        response = self.client.post('/users/bulk/', {'users': [
+            self.player(1), self.player(1, username='\uff50layer0001'), self.player(3, username='\uff50layer0003')
+        ]}, format='json')
+
+        self.assertEqual(
+            [(failure['row'], failure['errors']) for failure in response.data['failures']],
+            [(1, ["username is duplicated in the batch"]), (2, ["username already exists"])]
+        )
+        self.assertEqual(User.objects.filter(username__endswith='layer0001').count(), 1)
+
+    def test_rejects_non_administrators_and_bad_batches(self):
+        for users in ([], 'player0001', [self.player(1)] * (PROVISION_USERS_MAX + 1)):
+            with self.subTest(users=str(users)[:20]):
+                self.assertEqual(self.client.post('/users/bulk/', {'users': users}, format='json').status_code, 400)
+
+        self.client = client_for(create_player('player0009'))
+        response = self.client.post('/users/bulk/', {'users': [self.player(1)]}, format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(User.objects.filter(username='player0001').exists())
+
+    def test_hashing_shares_one_bounded_pool(self):
+        passwords = [f'secret-{n:04d}' for n in range(6)]
+        with mock.patch.object(provisioning, 'PROVISION_HASH_WORKERS', 3), \
+                mock.patch.object(provisioning, '_pool', None), \
+                mock.patch.object(provisioning, 'make_password', side_effect=lambda password: f'hashed {password}'):
+            first = provisioning.hash_passwords(passwords)
+            pool = provisioning.hashing_pool()
+            self.assertEqual(provisioning.hash_passwords(passwords[:4], workers=8), first[:4])
+            self.assertIs(provisioning.hashing_pool(), pool)
+            self.assertEqual(pool._max_workers, 3)
+            pool.shutdown()
+
+        self.assertEqual(first, [f'hashed {password}' for password in passwords])
+
+
+class AsyncViewTests(TransactionTestCase):
+    # The async views reach the database from `db_executor` threads, outside a TestCase transaction
+
+    def setUp(self):
+        cache.clear()
+        caches['responses'].clear()
+        self.player = create_player()
+        self.games = [Game.objects.create(name=f'Game {n}') for n in range(3)]
+        self.quest = Question.objects.create(game=self.games[0], question='Question', points=10)
+        self.token = ClaimsTokenObtainPairSerializer.get_token(self.player).access_token
+        self.client = client_for(self.player)
+
+    def get(self, path, **headers):
+        return self.async_client.get(path, AUTHORIZATION=f'Bearer {self.token}', **headers)
+
+    def sync_content(self, path):
+        response = self.client.get(path)
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    async def test_requires_a_valid_token(self):
+        for headers in ({}, {'AUTHORIZATION': 'Bearer not-a-token'}):
+            with self.subTest(headers=headers):
+                response = await self.async_client.get('/async/points/', **headers)
+                self.assertEqual(response.status_code, 401)
+                self.assertIn('Bearer', response['WWW-Authenticate'])
+
+        self.player.is_active = False
+        await run_db(self.player.save)
+        self.assertEqual((await self.get('/async/points/')).status_code, 401)
+
+    async def test_bad_parameters_get_the_sync_views_errors(self):
+        for path in (
+            '/quests/', '/quests/?gameid=x', '/answers/?questid=x', '/games/bundle/', '/games/?page_size=x',
+            f'/quests/?gameid={self.games[0].gameid}&cursor=bad'
+        ):
+            with self.subTest(path=path):
+                expected = await run_db(self.client.get, path)
+                response = await self.get(f'/async{path}')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), expected.json())
+
+        response = await self.async_client.post('/async/play/?choiceid=x', AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.json(), {"details": "choiceid must be integer value"})
+
+    async def test_games_are_paged_like_the_sync_listing(self):
+        for path in ('/games/', '/games/?page_size=2', '/games/?stream=1'):
+            with self.subTest(path=path):
+                self.assertEqual((await self.get(f'/async{path}')).content, await run_db(self.sync_content, path))
+
+        page = (await self.get('/async/games/?page_size=2')).json()
+        rest = (await self.get(f"/async/games/?page_size=2&cursor={page['next']}")).json()
+        self.assertEqual(
+            [game['gameid'] for game in page['results'] + rest['results']], [game.gameid for game in self.games]
+        )
+        self.assertIsNone(rest['next'])
+
+    async def test_conditional_and_cached_reads(self):
+        games = await self.get('/async/games/')
+        self.assertEqual((await self.get('/async/games/', IF_NONE_MATCH=games['ETag'])).status_code, 304)
+        self.assertEqual(
+            (await self.get('/async/games/', IF_MODIFIED_SINCE=games['Last-Modified'])).status_code, 304
+        )
+
+        with mock.patch('restapp.async_views.list_response') as listing:
+            cached = await self.get('/async/games/')
+        listing.assert_not_called()
+        self.assertEqual((cached.content, cached['ETag']), (games.content, games['ETag']))
+
+        await run_db(lambda: Game.objects.create(name='Another'))
+        changed = await self.get('/async/games/', IF_NONE_MATCH=games['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertIn(b'Another', changed.content)
+
+    async def test_listings_too_large_for_the_cache_are_rendered_each_time(self):
+        with mock.patch('restapp.response_cache.RESPONSE_CACHE_MAX_BYTES', 10):
+            first = await self.get('/async/games/')
+            second = await self.get('/async/games/')
+        self.assertEqual((first.status_code, first['Content-Type']), (200, 'application/json'))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(first.json()), 3)
+        self.assertIsNone(caches['responses'].get(response_cache.cache_key(first['ETag'])))
@@ -1,12 +1,31 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path('games/', views.GameCRUD.as_view()),
+    path('games/bundle/', views.GameBundle.as_view()),
     path('users/', views.ManageUsers.as_view()),
+    path('users/bulk/', views.ProvisionUsers.as_view()),
+    path('users/directory/', views.UserDirectory.as_view()),
     path('quests/', views.QuestionCRUD.as_view()),
     path('answers/', views.AnswerCRUD.as_view()),
     path('play/', views.Play.as_view()),
+    path('play/batch/', views.PlayBatch.as_view()),
+    path('play/cache/', views.AnswerKeyCacheStats.as_view()),
+    path('sessions/', views.GameSessionView.as_view()),
+    path('sessions/next/', views.GameSessionNext.as_view()),
+    path('sessions/answer/', views.GameSessionAnswer.as_view()),
     path('points/', views.Points.as_view()),
-    path('rank/', views.RankView.as_view())
+    path('rank/', views.RankView.as_view()),
+    path('leaderboard/', views.Leaderboard.as_view()),
+    path('leaderboard/window/', views.LeaderboardWindow.as_view()),
+    path('export/ranks/', views.RankExport.as_view()),
+    path('import/games/', views.GameImport.as_view()),
+    path('async/games/', async_views.AsyncGames.as_view()),
+    path('async/games/bundle/', async_views.AsyncGameBundle.as_view()),
+    path('async/quests/', async_views.AsyncQuestions.as_view()),
+    path('async/answers/', async_views.AsyncAnswers.as_view()),
+    path('async/play/', async_views.AsyncPlay.as_view()),
+    path('async/points/', async_views.AsyncPoints.as_view()),
+    path('async/rank/', async_views.AsyncRankView.as_view())
 ]
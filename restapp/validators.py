@@ -58,3 +58,127 @@ class Validator:
             validated[field] = payload[field]
 
         return validated
+
+
+class Schema(Validator):
+    """Validator compiled once into a pipeline of one check closure per field.
+
+    Declare it at class or module level, `map_field` returns the schema so
+    fields can be chained. Unlike `Validator.validate`, every field is
+    checked and all errors are reported together. With `hash_passwords=False`
+    the password is returned as given, for callers hashing it in bulk.
+    """
+
+    def __init__(self, hash_passwords=True):
+        super().__init__()
+        self.hash_passwords = hash_passwords
+        self._pipeline = None
+
+    def map_field(self, fieldname, fieldtype,
+        required: bool = False, min_len=None, max_len=None, allowed: list = []):
+
+        super().map_field(fieldname, fieldtype, required, min_len, max_len, allowed)
+        self._pipeline = None
+        return self
+
+    def copy(self, **kwargs):
+        """Schema with the same fields, `kwargs` replace the constructor arguments"""
+
+        schema = Schema(**{'hash_passwords': self.hash_passwords, **kwargs})
+        schema.mapping = dict(self.mapping)
+        return schema
+
+    def compile(self):
+        self._pipeline = [
+            (field, spec['required'], _compile_check(field, spec), self._transform(field))
+            for field, spec in self.mapping.items()
+        ]
+        return self._pipeline
+
+    def _transform(self, field):
+        if field == 'password' and self.hash_passwords:
+            return make_password
+        return None
+
+    def check(self, payload):
+        """Return (validated, errors) without raising"""
+
+        if not isinstance(payload, dict):
+            return {}, ["payload must be an object"]
+
+        validated = {}
+        errors = []
+        for field, required, check, transform in self._pipeline or self.compile():
+            if field not in payload:
+                if required:
+                    errors.append(f"{field} is required")
+                continue
+
+            value = payload[field]
+            error = check(value)
+            if error:
+                errors.append(error)
+            else:
+                validated[field] = transform(value) if transform else value
+
+        return validated, errors
+
+    def validate(self, payload):
+        validated, errors = self.check(payload)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def validate_many(self, payloads):
+        """Return (validated list, {index: errors}) for a list of payloads"""
+
+        check = self.check
+        validated = []
+        errors = {}
+        for index, payload in enumerate(payloads):
+            item, item_errors = check(payload)
+            validated.append(item)
+            if item_errors:
+                errors[index] = item_errors
+        return validated, errors
+
+
+def _compile_check(field, spec):
+    """Build one closure running the field's checks, returning an error or None"""
+
+    fieldtype = spec['fieldtype']
+
+    if fieldtype == 'email':
+        match = EMAIL_ALG.fullmatch
+
+        def check_email(value):
+            return None if match(str(value)) else "Email is not valid"
+        return check_email
+
+    type_error = f"{field} must be of type {fieldtype}"
+    min_len, max_len = spec['min_len'] or 0, spec['max_len']
+    length_error = f"{field} has constraint length greater than {spec['min_len']}, less than {max_len}"
+    allowed = tuple(spec['allowed']) if field != 'password' else ()
+    allowed_error = f"{field} has allowed values constraint: {spec['allowed']}"
+
+    if max_len:
+        def check_sized(value):
+            if not isinstance(value, fieldtype):
+                return type_error
+            if not min_len <= len(value) <= max_len:
+                return length_error
+            if allowed and value not in allowed:
+                return allowed_error
+            return None
+        return check_sized
+
+    if allowed:
+        def check_allowed(value):
+            if not isinstance(value, fieldtype):
+                return type_error
+            return None if value in allowed else allowed_error
+        return check_allowed
+
+    def check_type(value):
+        return None if isinstance(value, fieldtype) else type_error
+    return check_type
@@ -0,0 +1,125 @@
+from calendar import timegm
+from functools import wraps
+from hashlib import md5
+from django.db import transaction
+from django.db.models import F
+from django.db.utils import IntegrityError
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from .models import ContentVersion, Question
+from . import response_cache
+
+GAME_LIST_KEY = 'games'
+
+
+def game_key(gameid):
+    return f'game:{gameid}'
+
+
+def question_key(questid):
+    return f'quest:{questid}'
+
+
+def get_version(key):
+    """(version, modified) of a content key, (0, None) if it was never written"""
+
+    row = ContentVersion.objects.filter(key=key).values_list('version', 'modified').first()
+    return row or (0, None)
+
+
+def bump(*keys):
+    now = timezone.now()
+    for key in keys:
+        if ContentVersion.objects.filter(key=key).update(version=F('version') + 1, modified=now):
+            continue
+
+        try:
+            with transaction.atomic():
+                ContentVersion.objects.create(key=key, version=1, modified=now)
+        except IntegrityError:
+            ContentVersion.objects.filter(key=key).update(version=F('version') + 1, modified=now)
+
+
+def bump_game_list():
+    bump(GAME_LIST_KEY)
+
+
+def bump_games(gameids):
+    """Game name, questions or answers changed"""
+    bump(*(game_key(gameid) for gameid in set(gameids)))
+
+
+def bump_question_answers(questids):
+    """Answers of the questions changed, which also changes their games"""
+
+    questids = set(questids)
+    bump(*(question_key(questid) for questid in questids))
+    bump_games(Question.objects.filter(questid__in=questids).values_list('game_id', flat=True))
+
+
+def check_conditional(request, key):
+    """(etag, last_modified, 304 response or None) for the content version of `key`"""
+
+    version, modified = get_version(key)
+    etag = f'"{key}:{version}:{representation(request)}"'
+    last_modified = timegm(modified.utctimetuple()) if modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    return etag, last_modified, not_modified
+
+
+def representation(request):
+    """Digest of what besides the content shapes a response: path, query string and rendered format.
+
+    A strong ETag must differ between a JSON array, a page of it and the
+    browsable API's HTML of the same content version.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    query = '&'.join(
+        f'{name}={value}' for name, values in sorted(request.GET.lists()) for value in values
+    )
+    variant = f"{renderer.format if renderer else 'json'}:{request.path}?{query}"
+    return md5(variant.encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # The format is negotiated on Accept, shared caches must keep one entry per format
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def versioned(key_func, cached=False):
+    """Serve a GET view method conditionally on the content version of `key_func(request)`.
+
+    Sets a strong ETag, one per content version and `representation`, and
+    Last-Modified, and answers If-None-Match or If-Modified-Since with 304
+    after reading only the version row. `key_func` returns None for
+    requests the view should reject itself.
+    With `cached` the rendered JSON body is kept in the response cache
+    under that version, so a repeated request skips the view entirely.
+    """
+    def decorator(method):
+
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            key = key_func(request)
+            if key is None:
+                return method(view, request, *args, **kwargs)
+
+            etag, last_modified, response = check_conditional(request, key)
+            if response is None and cached:
+                response = response_cache.get(request, etag)
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                if cached:
+                    response = response_cache.store(request, etag, response)
+
+            return set_validators(response, etag, last_modified)
+
+        return wrapper
+    return decorator
@@ -1,24 +1,109 @@
+from datetime import datetime, time
+from itertools import islice
 from django.shortcuts import render
+from django.http import HttpResponse, StreamingHttpResponse
 from django.db.utils import IntegrityError
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import is_naive, make_aware
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from .models import Game, User, Question, Answer, Rank
+from .models import Game, User, Question, Answer
 from .serializers import GameSerializer, UserSerializer, QuestionSerializer, AnswerSerializer
-from .auth import get_current_user
-from .validators import Validator
+from .auth import get_current_user, forget_user
+from .validators import Schema
+from . import schemas
+from .answer_keys import answer_keys
+from . import versions
+from .versions import versioned
+from .bundles import get_bundle
+from .pagination import list_response, encode_cursor, decode_cursor, PAGE_SIZE, MAX_PAGE_SIZE
+from . import exports
+from . import imports
+from . import provisioning
+from . import directory
+from . import scores
+from . import game_sessions
+from . import rollups
+from .leaderboard import get_leaderboard, TOP_LIMIT_DEFAULT, TOP_LIMIT_MAX, AROUND_DEFAULT, AROUND_MAX
+
+PLAY_BATCH_MAX = 200
+PROVISION_USERS_MAX = 1000
+
+
+def int_param(params, param, invalid=None):
+    """(value, error details) for a required integer query parameter, shared with the async views"""
+
+    try:
+        return int(params[param]), None
+    except KeyError:
+        return None, f"Query parameter `{param}` is required"
+    except ValueError:
+        return None, invalid or f"Query parameter `{param}` must be integer"
+
+
+def _param_key(request, param, key_func):
+    """Content version key for the id the listing views read from `param`"""
+
+    try:
+        return key_func(int(request.query_params[param]))
+    except (KeyError, ValueError):
+        return None
+
+
+def _moment_param(request, param):
+    """Aware datetime of an ISO 8601 date or datetime query parameter, None if absent, False if invalid"""
+
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+
+    try:
+        moment = parse_datetime(value) or parse_date(value)
+    except ValueError:
+        return False
+    if moment is None:
+        return False
+
+    if not isinstance(moment, datetime):
+        moment = datetime.combine(moment, time.min)
+    if is_naive(moment):
+        moment = make_aware(moment)
+    return moment
+
+
+def _session_from(request):
+    """The current user's session named by `session_id`, or the error Response"""
+
+    session_id, error = int_param(request.query_params, 'session_id')
+    if error:
+        return Response(
+            {"details": error},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    session = game_sessions.get_session(get_current_user(request).id, session_id)
+    if session is None:
+        return Response(
+            {"details": "Session not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    return session
 
 
 class GameCRUD(APIView):
     permission_classes = (IsAuthenticated,)
+    create_schema = schemas.game_create
+    update_schema = schemas.game_update
 
+    @versioned(lambda request: versions.GAME_LIST_KEY, cached=True)
     def get(self, request):
         """Get game list"""
 
         games = Game.objects.all()
-        serializer = GameSerializer(games, many=True)
-        return Response(serializer.data)
+        return list_response(request, games, GameSerializer)
     
 
     def post(self, request):
@@ -31,9 +116,7 @@ class GameCRUD(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        validator = Validator()
-        validator.map_field('name', str, True, 2, 50)
-        validated = validator.validate(request.data)
+        validated = self.create_schema.validate(request.data)
 
         new_game = Game.objects.create(**validated)
         serializer = GameSerializer(new_game, many=False)
@@ -66,11 +149,11 @@ class GameCRUD(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        validator = Validator()
-        validator.map_field('name', str, False, 2, 50)
-        validated = validator.validate(request.data)
+        validated = self.update_schema.validate(request.data)
 
         upd_game = Game.objects.filter(gameid=gameid).update(**validated)
+        versions.bump_games([gameid])
+        versions.bump_game_list()
 
         if not upd_game:
             return Response(
@@ -94,12 +177,17 @@ class GameCRUD(APIView):
             )
         
         try:
-            gameid = request.query_params['gameid'][0]
-        except (KeyError, IndexError):
+            gameid = int(request.query_params['gameid'])
+        except KeyError:
             return Response(
                 {"details": "Query parameter `gameid` is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except ValueError:
+            return Response(
+                {"details": "Query parameter `gameid` must be integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         del_game = Game.objects.filter(gameid=gameid).delete()
 
@@ -115,24 +203,47 @@ class GameCRUD(APIView):
         )
 
 
+class GameBundle(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """Get game with all questions and answer variants"""
+
+        gameid, error = int_param(request.query_params, 'gameid')
+        if error:
+            return Response(
+                {"details": error},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        content = get_bundle(gameid)
+        if content is None:
+            return Response(
+                {"details": "Game not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return HttpResponse(content, content_type='application/json')
+
+
 class QuestionCRUD(APIView):
     permission_classes = (IsAuthenticated,)
+    create_schema = schemas.question_create
+    update_schema = schemas.question_update
 
+    @versioned(lambda request: _param_key(request, 'gameid', versions.game_key), cached=True)
     def get(self, request):
         """Get questions"""
-        
-        try:
-            gameid = request.query_params['gameid'][0]
-        except (KeyError, IndexError):
+
+        gameid, error = int_param(request.query_params, 'gameid')
+        if error:
             return Response(
-                {"details": "Query parameter `gameid` is required"},
+                {"details": error},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        quests = Question.objects.filter(game_id=gameid)
-        serializer = QuestionSerializer(quests, many=True)
 
-        return Response(serializer.data)
+        quests = Question.objects.filter(game_id=gameid)
+        return list_response(request, quests, QuestionSerializer)
         
 
     def post(self, request):
@@ -160,10 +271,7 @@ class QuestionCRUD(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        validator = Validator()
-        validator.map_field('question', str, True, 1, 250)
-        validator.map_field('points', int, True, allowed=[5, 10, 15])
-        validated = validator.validate(request.data)
+        validated = self.create_schema.validate(request.data)
         validated['game_id'] = gameid
 
         try:
@@ -202,14 +310,16 @@ class QuestionCRUD(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        validator = Validator()
-        validator.map_field('question', str, False, 1, 250)
-        validator.map_field('points', int, False, allowed=[5, 10, 15])
-        validator.map_field('game_id', int, False)
-        validated = validator.validate(request.data)
+        validated = self.update_schema.validate(request.data)
+
+        game_ids = set(Question.objects.filter(questid=quest_id).values_list('game_id', flat=True))
+        if 'game_id' in validated:
+            game_ids.add(validated['game_id'])
 
         try:
             quest_upd = Question.objects.filter(questid=quest_id).update(**validated)
+            answer_keys.invalidate_questions([quest_id])
+            versions.bump_games(game_ids)
 
         except IntegrityError:
             return Response(
@@ -240,12 +350,17 @@ class QuestionCRUD(APIView):
             )
         
         try:
-            quest_id = request.query_params['questid'][0]
-        except (KeyError, IndexError):
+            quest_id = int(request.query_params['questid'])
+        except KeyError:
             return Response(
                 {"details": "Query parameter `questid` is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except ValueError:
+            return Response(
+                {"details": "Query parameter `questid` must be integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         del_quest = Question.objects.filter(questid=quest_id).delete()
 
@@ -263,23 +378,22 @@ class QuestionCRUD(APIView):
 
 class AnswerCRUD(APIView):
     permission_classes = (IsAuthenticated,)
+    create_schema = schemas.answer_create
+    update_schema = schemas.answer_update
 
+    @versioned(lambda request: _param_key(request, 'questid', versions.question_key), cached=True)
     def get(self, request):
         """Gets all answers"""
 
-        try:
-            questid = request.query_params['questid'][0]
-
-        except(KeyError, IndexError):
+        questid, error = int_param(request.query_params, 'questid')
+        if error:
             return Response(
-                {"details": "Query parameter `questid` is required"},
+                {"details": error},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        answer = Answer.objects.filter(quest_id=questid)
-        serializer = AnswerSerializer(answer, many=True)
 
-        return Response(serializer.data)
+        answer = Answer.objects.filter(quest_id=questid)
+        return list_response(request, answer, AnswerSerializer)
 
 
     def post(self, request):
@@ -307,10 +421,7 @@ class AnswerCRUD(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        validator = Validator()
-        validator.map_field('variant', str, True, 1, 80)
-        validator.map_field('status', bool, True)
-        validated = validator.validate(request.data)
+        validated = self.create_schema.validate(request.data)
         validated['quest_id'] = questid
 
         try:
@@ -351,16 +462,18 @@ class AnswerCRUD(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        validator = Validator()
-        validator.map_field('quest', int, False)
-        validator.map_field('variant', str, False, 1, 80)
-        validator.map_field('status', bool, False)
-        validated = validator.validate(request.data)
+        validated = self.update_schema.validate(request.data)
+
+        quest_ids = set(Answer.objects.filter(choiceid=choiceid).values_list('quest_id', flat=True))
+        if 'quest' in validated:
+            quest_ids.add(validated['quest'])
 
         try:
             Answer.objects.filter(choiceid=choiceid).update(
                 **validated
             )
+            answer_keys.invalidate_questions(quest_ids)
+            versions.bump_question_answers(quest_ids)
         
         except IntegrityError:
             return Response(
@@ -414,6 +527,8 @@ class AnswerCRUD(APIView):
 
 class ManageUsers(APIView):
     permission_classes = (IsAuthenticated,)
+    create_schema = schemas.user_create
+    update_schema = schemas.user_update
 
     def get(self, request):
         """Gets all users"""
@@ -423,9 +538,8 @@ class ManageUsers(APIView):
                 {"details": "Accessible with administrator privileges"}
             )
         
-        users = User.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        users = User.objects.prefetch_related('groups', 'user_permissions')
+        return list_response(request, users, UserSerializer)
 
     
     def post(self, request):
@@ -437,14 +551,7 @@ class ManageUsers(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        validator = Validator()
-        validator.map_field('username', str, True, 8, 15)
-        validator.map_field('password', str, True, 8, 20)
-        validator.map_field('email', 'email', True)
-        validator.map_field('first_name', str, False, 2, 30)
-        validator.map_field('last_name', str, False)
-        validator.map_field('is_staff', bool, False)
-        validated = validator.validate(request.data)
+        validated = self.create_schema.validate(request.data)
         
         user = User.objects.create_user(
             **validated
@@ -518,16 +625,10 @@ class ManageUsers(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        validator = Validator()
-        validator.map_field('username', str, False, 8, 15)
-        validator.map_field('password', str, False, 8, 20)
-        validator.map_field('email', 'email', False)
-        validator.map_field('first_name', str, False, 2, 30)
-        validator.map_field('last_name', str, False)
-        validator.map_field('is_staff', bool, False)
-        validated = validator.validate(request.data)
+        validated = self.update_schema.validate(request.data)
 
         upd_user = User.objects.filter(id=userid).update(**validated)
+        forget_user(userid)
 
         if not upd_user:
             return Response(
@@ -548,49 +649,162 @@ class Play(APIView):
         """Add choice"""
 
         current_user = get_current_user(request)
-        try:
-            choiceid = int(request.query_params['choiceid'])
-        
-        except KeyError:
+        choiceid, error = int_param(request.query_params, 'choiceid', "choiceid must be integer value")
+        if error:
             return Response(
-                {"details": "Query parameter `choiceid` is required"},
+                {"details": error},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        except ValueError:
+
+        result = scores.play_choice(current_user.id, choiceid)
+        if result is None:
             return Response(
-                {"details": "choiceid must be integer value"},
+                {"details": "Answer not found"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        current_answer = Answer.objects.get(choiceid=choiceid)
-        current_question = Question.objects.get(questid=current_answer.quest_id)
-        current_game = Game.objects.get(gameid=current_question.game_id)
-        correct_answer = Answer.objects.filter(quest_id=current_question.questid, status=True)
+        return Response(result, status=status.HTTP_200_OK)
 
-        if current_answer.status:
-            points = current_question.points
-        else:
-            points = 0
-        
-        Rank.objects.create(
-            user = current_user,
-            game = current_game,
-            quest = current_question,
-            points = points
-        )
+
+class PlayBatch(APIView):
+    permission_classes = (IsAuthenticated,)
+    create_schema = (
+        Schema()
+        .map_field('choiceids', list, True, 1, PLAY_BATCH_MAX)
+    )
+
+    def post(self, request):
+        """Add list of choices"""
+
+        current_user = get_current_user(request)
+
+        choiceids = self.create_schema.validate(request.data)['choiceids']
+
+        if not all(isinstance(choiceid, int) for choiceid in choiceids):
+            return Response(
+                {"details": "choiceids must be a list of integer values"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        answer_keys_found = answer_keys.get_many(choiceids)
+
+        # The first choice per question is the one played
+        played = {}
+        for choiceid in choiceids:
+            answer_key = answer_keys_found.get(choiceid)
+            if answer_key is not None and answer_key.questid not in played:
+                played[answer_key.questid] = (
+                    answer_key.game_id, answer_key.questid, scores.choice_points(answer_key)
+                )
+
+        recorded = scores.submit_answers(current_user.id, list(played.values()))
+        recorded = {questid: recorded.get(questid, points) for questid, (_, _, points) in played.items()}
+
+        results = []
+        for choiceid in choiceids:
+            answer_key = answer_keys_found.get(choiceid)
+            if answer_key is None:
+                results.append({"choiceid": choiceid, "details": "Answer not found"})
+                continue
+            results.append({
+                "choiceid": choiceid,
+                **scores.play_result(answer_key, recorded[answer_key.questid])
+            })
 
         return Response(
             {
-                "answer_status": current_answer.status,
-                "points": points,
-                "correct_answer_id": correct_answer.first().choiceid,
-                "correct_answer": correct_answer.first().variant
+                "points": sum(recorded.values()),
+                "results": results
             },
             status=status.HTTP_200_OK
         )
 
 
+class GameSessionView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        """Start a session over a game's questions in shuffled order"""
+
+        current_user = get_current_user(request)
+        gameid, error = int_param(request.query_params, 'gameid')
+        if error:
+            return Response(
+                {"details": error},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        session = game_sessions.start_session(current_user.id, gameid)
+        if session is None:
+            return Response(
+                {"details": "Game not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(game_sessions.state(session), status=status.HTTP_201_CREATED)
+
+    def get(self, request):
+        """Get session progress"""
+
+        session = _session_from(request)
+        if isinstance(session, Response):
+            return session
+
+        return Response(game_sessions.state(session), status=status.HTTP_200_OK)
+
+
+class GameSessionNext(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """Get the session's current question with its answer variants"""
+
+        session = _session_from(request)
+        if isinstance(session, Response):
+            return session
+
+        question = game_sessions.next_question(session)
+
+        return Response(
+            {**game_sessions.state(session), "question": question},
+            status=status.HTTP_200_OK
+        )
+
+
+class GameSessionAnswer(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        """Answer the session's current question"""
+
+        session = _session_from(request)
+        if isinstance(session, Response):
+            return session
+
+        choiceid, error = int_param(request.query_params, 'choiceid', "choiceid must be integer value")
+        if error:
+            return Response(
+                {"details": error},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        answer_key = answer_keys.get(choiceid)
+        if answer_key is None:
+            return Response(
+                {"details": "Answer not found"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        result = game_sessions.answer(session, get_current_user(request).id, answer_key)
+        if result is None:
+            return Response(
+                {"details": "Answer is not for the current question"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({**result, **game_sessions.state(session)}, status=status.HTTP_200_OK)
+
+
 class Points(APIView):
     permission_classes = (IsAuthenticated,)
 
@@ -598,14 +812,9 @@ class Points(APIView):
         """Get current user points"""
         current_user = get_current_user(request)
 
-        ranks = Rank.objects.filter(user_id=current_user.id)
-        points_total = 0
-        for rank in ranks:
-            points_total += rank.points
-
         return Response(
             {
-                "points_total": points_total 
+                "points_total": scores.user_points(current_user.id)
             },
             status=status.HTTP_200_OK
         )
@@ -624,15 +833,10 @@ class RankView(APIView):
         
         current_user = get_current_user(request)
         
+        score = scores.user_counters(current_user.id, game_id)
+
         if game_id:
-            answers = Rank.objects.filter(game_id=game_id, user_id=current_user.id)
-            correct_answers_count = 0
-            total_answers = 0
-            for ans in answers:
-                total_answers += 1
-                if ans.points:
-                    correct_answers_count += 1
-            if not total_answers:
+            if not score['total_answers']:
                 return Response(
                     status=status.HTTP_204_NO_CONTENT
                 )
@@ -640,23 +844,285 @@ class RankView(APIView):
             return Response(
                 {
                     "game_id": game_id,
-                    "total_answers": total_answers,
-                    "correct_answers_count": correct_answers_count
+                    "total_answers": score['total_answers'],
+                    "correct_answers_count": score['correct_answers']
                 },
                 status=status.HTTP_200_OK
             )            
 
-        answers = Rank.objects.filter(user_id=current_user.id)
-        total_answers = 0
-        correct_answers_count = 0
-        for ans in answers:
-            total_answers += 1
-            if ans.points:
-                correct_answers_count += 1
         return Response(
             {
-                'total_answers': total_answers,
-                'correct_answers_count': correct_answers_count
+                'total_answers': score['total_answers'],
+                'correct_answers_count': score['correct_answers']
             },
             status=status.HTTP_200_OK
         )
+
+
+class Leaderboard(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """Get top users by points, globally or by game, with current user position"""
+
+        try:
+            game_id = request.query_params.get('game_id')
+            game_id = int(game_id) if game_id else None
+            limit = int(request.query_params.get('limit', TOP_LIMIT_DEFAULT))
+            around = int(request.query_params.get('around', AROUND_DEFAULT))
+
+        except ValueError:
+            return Response(
+                {"details": "Query parameters `game_id`, `limit` and `around` must be integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not 0 < limit <= TOP_LIMIT_MAX or not 0 <= around <= AROUND_MAX:
+            return Response(
+                {"details": f"`limit` must be in [1, {TOP_LIMIT_MAX}], `around` in [0, {AROUND_MAX}]"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        current_user = get_current_user(request)
+
+        return Response(
+            get_leaderboard(current_user.id, game_id, limit, around),
+            status=status.HTTP_200_OK
+        )
+
+
+class LeaderboardWindow(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """Get top users by points within [start, end) or one hour, day or week, globally or by game"""
+
+        period = request.query_params.get('period', 'week')
+        if period not in rollups.PERIODS:
+            return Response(
+                {"details": f"`period` must be one of {', '.join(rollups.PERIODS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        start, end = _moment_param(request, 'start'), _moment_param(request, 'end')
+        for param, moment in (('start', start), ('end', end)):
+            if moment is False:
+                return Response(
+                    {"details": f"`{param}` must be an ISO 8601 date or datetime"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        if end is not None and (start is None or start >= end):
+            return Response(
+                {"details": "`end` needs an earlier `start`"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            game_id = request.query_params.get('game_id')
+            game_id = int(game_id) if game_id else None
+            limit = int(request.query_params.get('limit', rollups.WINDOW_LIMIT_DEFAULT))
+
+        except ValueError:
+            return Response(
+                {"details": "Query parameters `game_id` and `limit` must be integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not 0 < limit <= rollups.WINDOW_LIMIT_MAX:
+            return Response(
+                {"details": f"`limit` must be in [1, {rollups.WINDOW_LIMIT_MAX}]"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            rollups.window_leaderboard(period, start, game_id, limit, end=end),
+            status=status.HTTP_200_OK
+        )
+
+
+class AnswerKeyCacheStats(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """Get answer key cache counters of this worker"""
+
+        current_user = get_current_user(request)
+        if not current_user.is_superuser:
+            return Response(
+                {"details": "Accessible with administrator privileges"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        return Response(answer_keys.stats(), status=status.HTTP_200_OK)
+
+
+class RankExport(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """Stream answer history as NDJSON or CSV"""
+
+        current_user = get_current_user(request)
+        if not current_user.is_superuser:
+            return Response(
+                {"details": "Accessible with administrator privileges"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in exports.EXPORT_FORMATS:
+            return Response(
+                {"details": f"Query parameter `output` must be one of {exports.EXPORT_FORMATS}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        filters = {}
+        for param in ('user_id', 'game_id', 'min_id', 'max_id', 'after_id'):
+            try:
+                if param in request.query_params:
+                    filters[param] = int(request.query_params[param])
+
+            except ValueError:
+                return Response(
+                    {"details": f"Query parameter `{param}` must be integer"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        response = StreamingHttpResponse(
+            exports.render(exports.rank_rows(**filters), export_format),
+            content_type='text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        )
+        response['Content-Disposition'] = f'attachment; filename="ranks.{export_format}"'
+        return response
+
+
+class GameImport(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        """Import games, questions and answers from uploaded file"""
+
+        current_user = get_current_user(request)
+        if not current_user.is_superuser:
+            return Response(
+                {"details": "Accessible with administrator privileges"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        try:
+            upload = request.FILES['file']
+        except KeyError:
+            return Response(
+                {"details": "File field `file` is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        import_format = request.query_params.get('input') or imports.guess_format(upload.name)
+        if import_format not in imports.IMPORT_FORMATS:
+            return Response(
+                {"details": f"Query parameter `input` must be one of {imports.IMPORT_FORMATS}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        report = imports.import_games(
+            imports.text_stream(upload.file),
+            import_format,
+            dry_run=request.query_params.get('dry_run') in ('1', 'true')
+        )
+
+        return Response(
+            report,
+            status=status.HTTP_400_BAD_REQUEST if report['error_count'] else status.HTTP_200_OK
+        )
+
+
+class UserDirectory(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """Get a page of users, optionally those whose username or email starts with `q`"""
+
+        current_user = get_current_user(request)
+        if not current_user.is_superuser:
+            return Response(
+                {"details": "Accessible with administrator privileges"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        try:
+            page_size = int(request.query_params.get('page_size', PAGE_SIZE))
+
+        except ValueError:
+            return Response(
+                {"details": "page_size must be integer value"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not 0 < page_size <= MAX_PAGE_SIZE:
+            return Response(
+                {"details": f"page_size must be in [1, {MAX_PAGE_SIZE}]"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        cursor = request.query_params.get('cursor')
+        rows, more = directory.user_page(
+            request.query_params.get('q', '').strip() or None,
+            decode_cursor(cursor) if cursor else None,
+            page_size
+        )
+
+        return Response(
+            {
+                "results": rows,
+                "next": encode_cursor(rows[-1]['id']) if more else None
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class ProvisionUsers(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        """Add users in bulk from `users` list or uploaded file"""
+
+        current_user = get_current_user(request)
+        if not current_user.is_superuser:
+            return Response(
+                {"details": "Accessible with administrator privileges"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        if 'file' in request.FILES:
+            upload = request.FILES['file']
+            input_format = request.query_params.get('input') or imports.guess_format(upload.name)
+            if input_format not in provisioning.PROVISION_FORMATS:
+                return Response(
+                    {"details": f"Query parameter `input` must be one of {provisioning.PROVISION_FORMATS}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                # One past the limit is enough to refuse an oversized file
+                users = list(islice(
+                    provisioning.read_users(imports.text_stream(upload.file), input_format),
+                    PROVISION_USERS_MAX + 1
+                ))
+            except (ValueError, KeyError) as exc:
+                return Response(
+                    {"details": f"Unreadable file: {exc}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            users = request.data.get('users') if isinstance(request.data, dict) else None
+
+        if not isinstance(users, list) or not 0 < len(users) <= PROVISION_USERS_MAX:
+            return Response(
+                {"details": f"Provide 1 to {PROVISION_USERS_MAX} users as `users` list or `file`"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            provisioning.provision_users(users),
+            status=status.HTTP_200_OK
+        )
@@ -0,0 +1,116 @@
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections
+from django.db.models import Sum
+from django.urls import get_resolver, resolve, reverse
+from django.utils import timezone
+from .answer_keys import answer_keys
+from .bundles import get_bundle
+from .models import Game, ScoreRollup
+from .projections import projection_of
+from .renderers import FastJSONRenderer
+from .openapi import SCHEMA_RENDERERS
+from .serializers import GameSerializer, QuestionSerializer, UserSerializer, AnswerSerializer
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ON_BOOT = getattr(settings, 'WARMUP_ON_BOOT', False)
+WARMUP_GAMES = getattr(settings, 'WARMUP_GAMES', 10)
+# Games with the most answers over this many past hours count as hot
+WARMUP_HOT_HOURS = 24
+
+SERIALIZERS = (GameSerializer, QuestionSerializer, UserSerializer, AnswerSerializer)
+
+
+def on_boot():
+    """`warm_up` when WARMUP_ON_BOOT is set, called by the WSGI and ASGI entry points"""
+
+    if WARMUP_ON_BOOT:
+        warm_up()
+
+
+def warm_up(games=WARMUP_GAMES):
+    """Build what the first requests to a worker would otherwise build on live traffic.
+
+    Opens the database connections, compiles the URL resolver, constructs
+    serializer fields and projections, generates and renders the OpenAPI
+    document and loads the answer keys and bundles of the `games` hottest
+    games. Each step is best effort, a failing one is logged and the worker
+    boots anyway. The connections are closed at the end: a server that
+    imports the application before forking (`gunicorn --preload`) must not
+    hand one SQLite connection to every worker. Workers open their own on
+    their first query. Returns {step: seconds}.
+    """
+    timings = {}
+    for step, build in (
+        ('database', _connect),
+        ('urls', _compile_urls),
+        ('serializers', _build_serializers),
+        ('schema', _build_schema),
+        ('games', lambda: _load_games(games))
+    ):
+        started = time.perf_counter()
+        try:
+            build()
+        except Exception:
+            logger.exception("Warm-up step %s failed", step)
+        timings[step] = time.perf_counter() - started
+    connections.close_all()
+
+    logger.info(
+        "Warmed up in %.0f ms (%s)", sum(timings.values()) * 1000,
+        ', '.join(f'{step} {seconds * 1000:.0f} ms' for step, seconds in timings.items())
+    )
+    return timings
+
+
+def hot_games(limit, now=None):
+    """Ids of the `limit` games answered most over WARMUP_HOT_HOURS, topped up with the newest games"""
+
+    since = (now or timezone.now()) - timedelta(hours=WARMUP_HOT_HOURS)
+    busiest = (
+        ScoreRollup.objects.filter(period='hour', start__gte=since).order_by()
+        .values('game_id').annotate(answers=Sum('total_answers')).order_by('-answers', 'game_id')[:limit]
+    )
+    game_ids = [row['game_id'] for row in busiest]
+
+    if len(game_ids) < limit:
+        game_ids += Game.objects.exclude(gameid__in=game_ids).order_by('-gameid').values_list(
+            'gameid', flat=True
+        )[:limit - len(game_ids)]
+    return game_ids
+
+
+def _connect():
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+def _compile_urls():
+    # Populating the reverse lookups compiles the pattern of every route
+    get_resolver().reverse_dict
+
+
+def _build_serializers():
+    for serializer_class in SERIALIZERS:
+        serializer_class().fields
+        projection_of(serializer_class)
+    FastJSONRenderer().render({})
+
+
+def _build_schema():
+    generator = resolve(reverse('openapi-schema')).func.initkwargs.get('schema_generator')
+    if generator is None:
+        return
+    document = generator.get_schema()
+    for renderer_class in SCHEMA_RENDERERS:
+        renderer_class().render(document)
+
+
+def _load_games(limit):
+    game_ids = hot_games(limit)
+    answer_keys.preload_games(game_ids)
+    for gameid in game_ids:
+        get_bundle(gameid)
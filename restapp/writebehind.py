@@ -0,0 +1,193 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_BUFFERED = 'buffered'
+DURABILITY_COMMIT = 'commit'
+
+_STOP = object()
+
+
+class _Entry:
+    __slots__ = ('user_id', 'answers', 'done', 'error')
+
+    def __init__(self, user_id, answers, wait):
+        self.user_id = user_id
+        self.answers = answers
+        self.done = threading.Event() if wait else None
+        self.error = None
+
+
+class WriteBehindBuffer:
+    """In-process queue of play results written in batches by a background thread.
+
+    `submit` queues (user_id, [(game_id, quest_id, points), ...]) and the
+    flusher hands everything queued within `interval` seconds, at most
+    `batch_rows` answers, to one `flush([(user_id, answers), ...])` call.
+    The queue holds `max_queue` submissions, when it is full `submit`
+    blocks for up to `put_timeout` seconds and then writes synchronously. With `commit`
+    durability `submit` returns once the batch holding its answers is
+    committed, with `buffered` right away, so a crash loses what is queued.
+    When a batch fails, its submissions are retried one at a time, so a bad
+    one, say for a deleted user, loses only its own answers.
+
+    Queued answers are tracked as pending (points, answers, correct) deltas
+    per user and per user and game, `read_with_pending` adds them to a
+    database read. The pending view is per process.
+    """
+
+    def __init__(self, flush, interval, batch_rows, max_queue, durability=DURABILITY_BUFFERED,
+            put_timeout=1.0):
+        self.flush = flush
+        self.interval = interval
+        self.batch_rows = batch_rows
+        self.durability = durability
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(max_queue)
+        self._pending = {}
+        self._pending_lock = threading.Condition()
+        # Batches started so far, and the pending keys of the latest one while it commits
+        self._flushes = 0
+        self._flush_keys = frozenset()
+        self._committing = False
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, user_id, answers):
+        if not answers:
+            return
+        self._start()
+
+        entry = _Entry(user_id, answers, self.durability == DURABILITY_COMMIT)
+        self._track(entry, 1)
+        try:
+            self._queue.put(entry, timeout=self.put_timeout)
+        except queue.Full:
+            # Backpressure gave up, write this one ourselves
+            self._track(entry, -1)
+            self.flush([(user_id, answers)])
+            return
+
+        if entry.done is not None:
+            entry.done.wait()
+            if entry.error is not None:
+                raise entry.error
+
+    def read_with_pending(self, key, read):
+        """(read(), [points, answers, correct] pending) for ('user', user_id) or ('game', user_id, game_id)"""
+
+        if key not in self._pending:
+            return read(), [0, 0, 0]
+
+        while True:
+            with self._pending_lock:
+                # Its answers are being committed, they are in neither place for now
+                while self._committing and key in self._flush_keys:
+                    self._pending_lock.wait()
+                pending = list(self._pending.get(key, (0, 0, 0)))
+                flushes = self._flushes
+
+            value = read()
+
+            with self._pending_lock:
+                # Unless a batch holding the key started meanwhile, nothing is counted twice
+                if self._flushes == flushes or (
+                    self._flushes == flushes + 1 and key not in self._flush_keys
+                ):
+                    return value, pending
+
+    def close(self, timeout=10):
+        """Flush everything queued and stop the flusher"""
+
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='restapp-write-behind', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            if entry is _STOP:
+                break
+
+            batch, rows = [entry], len(entry.answers)
+            deadline = time.monotonic() + self.interval
+            while rows < self.batch_rows:
+                try:
+                    entry = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+                rows += len(entry.answers)
+
+            self._write(batch)
+
+    def _write(self, batch):
+        with self._pending_lock:
+            self._flushes += 1
+            self._flush_keys = frozenset(key for entry in batch for key in _deltas(entry))
+            self._committing = True
+
+        try:
+            self.flush([(entry.user_id, entry.answers) for entry in batch])
+        except Exception:
+            # The batch was rolled back, write the submissions one by one so only the bad ones are lost
+            logger.warning("Write-behind flush of %d submissions failed, retrying one by one", len(batch))
+            for entry in batch:
+                try:
+                    self.flush([(entry.user_id, entry.answers)])
+                except Exception as exc:
+                    logger.exception("Write-behind dropped %d answers of user %s", len(entry.answers), entry.user_id)
+                    entry.error = exc
+        finally:
+            with self._pending_lock:
+                for entry in batch:
+                    self._track(entry, -1)
+                self._committing = False
+                self._pending_lock.notify_all()
+            close_old_connections()
+
+        for entry in batch:
+            if entry.done is not None:
+                entry.done.set()
+
+    def _track(self, entry, sign):
+        with self._pending_lock:
+            for key, totals in _deltas(entry).items():
+                pending = self._pending.setdefault(key, [0, 0, 0])
+                for slot, value in enumerate(totals):
+                    pending[slot] += sign * value
+                if not pending[1]:
+                    del self._pending[key]
+
+
+def _deltas(entry):
+    """{key: [points, answers, correct]} an entry adds per user and per user and game"""
+
+    deltas = {}
+    for game_id, quest_id, points in entry.answers:
+        totals = deltas.setdefault(('game', entry.user_id, game_id), [0, 0, 0])
+        totals[0] += points
+        totals[1] += 1
+        totals[2] += 1 if points else 0
+    deltas[('user', entry.user_id)] = list(map(sum, zip(*deltas.values())))
+    return deltas